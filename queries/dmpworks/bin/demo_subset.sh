@@ -0,0 +1,21 @@
+#!/usr/bin/env bash
+
+# Generates a subset of the transformed Crossref Metadata, DataCite and OpenAlex
+# Works Parquet files, by copying every row for the works associated with a
+# specific ROR ID. The same DOIs are selected from each dataset, so the subset
+# is consistent across sources. OpenAlex Funders and ROR are copied in full.
+#
+# Required environment variables:
+#   TRANSFORM_DIR: path to the transformed parquet files, with a sub-directory per dataset.
+#   DEMO_TRANSFORM_DIR: path where the demo subset will be saved.
+#   ROR_ID: the institution's ROR ID, e.g. "01an7q238".
+
+for var in TRANSFORM_DIR DEMO_TRANSFORM_DIR ROR_ID; do
+  if [ -z "${!var}" ]; then
+    echo "Environment variable $var is not set"
+    exit 1
+  fi
+done
+
+mkdir -p "${DEMO_TRANSFORM_DIR}"
+dmpworks transform demo-subset "${TRANSFORM_DIR}" "${DEMO_TRANSFORM_DIR}" --ror-id="${ROR_ID}"
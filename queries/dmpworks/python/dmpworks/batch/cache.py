@@ -0,0 +1,171 @@
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import shutil
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+log = logging.getLogger(__name__)
+GB = 1024**3
+
+# The directory of the node-local cache of downloaded S3 prefixes, the cache is disabled when it isn't set. Tasks on
+# the same node only share the cache when it is on a volume mounted from the host, on the same filesystem as /data.
+CACHE_DIR_ENV = "DMPWORKS_S3_CACHE_DIR"
+
+# The maximum GB of files kept in the cache, the least recently used prefixes are evicted beyond it
+CACHE_GB_ENV = "DMPWORKS_S3_CACHE_GB"
+
+
+class S3Cache:
+    """A node-local cache of the objects below S3 prefixes, so that a task that lands on the node that downloaded or
+    uploaded a prefix doesn't fetch it from S3 again.
+
+    Each prefix is stored with the ETag of each of its objects, and a cached copy is only used while the ETags below
+    the prefix are unchanged. Files are hard linked into and out of the cache where possible, so that caching a
+    directory a task is about to delete doesn't copy it. Once the cache is larger than max_bytes, the least recently
+    used prefixes are evicted. A lock file serialises tasks on the same node.
+
+    As the files are hard linked, only directories that aren't modified in place, such as downloaded source files and
+    Parquet files, should be cached.
+    """
+
+    def __init__(self, cache_dir: pathlib.Path, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def from_env(cls) -> Optional["S3Cache"]:
+        cache_dir = os.environ.get(CACHE_DIR_ENV)
+        if not cache_dir:
+            return None
+        return cls(pathlib.Path(cache_dir), int(float(os.environ.get(CACHE_GB_ENV, "100")) * GB))
+
+    def restore(self, s3_uri: str, etags: dict[str, str], target_dir: pathlib.Path) -> bool:
+        """Make target_dir a copy of the cached objects below s3_uri, when they have the given ETags.
+
+        :param s3_uri: the S3 prefix.
+        :param etags: the ETag of each object below the prefix, keyed by the key relative to the prefix.
+        :param target_dir: the directory to copy the files to.
+        :return: whether the prefix was in the cache.
+        """
+
+        with self.lock():
+            metadata = self.read_metadata(s3_uri)
+            if metadata is None or metadata["etags"] != etags:
+                log.info(f"Cache miss for {s3_uri}")
+                return False
+
+            entry_dir = self.entry_dir(s3_uri)
+            if target_dir.exists():
+                for file_path in target_dir.rglob("*"):
+                    if file_path.is_file() and file_path.relative_to(target_dir).as_posix() not in etags:
+                        file_path.unlink()
+            for path in etags:
+                link_or_copy(entry_dir / path, target_dir / path)
+
+            metadata["last_used"] = time.time()
+            self.write_metadata(s3_uri, metadata)
+        log.info(f"Restored {len(etags)} files below {s3_uri} from the cache to {target_dir}")
+        return True
+
+    def store(self, s3_uri: str, etags: dict[str, str], local_dir: pathlib.Path):
+        """Cache the files below local_dir as the objects below s3_uri, which have the given ETags.
+
+        Nothing is cached when a file is missing from local_dir, or when the files are larger than the cache.
+
+        :param s3_uri: the S3 prefix.
+        :param etags: the ETag of each object below the prefix, keyed by the key relative to the prefix.
+        :param local_dir: the directory with a copy of the objects.
+        """
+
+        files = [local_dir / path for path in etags]
+        missing = [file_path for file_path in files if not file_path.is_file()]
+        if missing:
+            log.info(f"Not caching {s3_uri}, {len(missing)} files aren't in {local_dir}")
+            return
+        size = sum(file_path.stat().st_size for file_path in files)
+        if size > self.max_bytes:
+            log.info(f"Not caching {s3_uri}, {size} bytes is more than the cache's {self.max_bytes} bytes")
+            return
+
+        with self.lock():
+            # Anything left in tmp while the lock is held is from a store that failed part way through
+            shutil.rmtree(self.cache_dir / "tmp", ignore_errors=True)
+            self.remove(s3_uri)
+            tmp_dir = self.cache_dir / "tmp" / self.entry_dir(s3_uri).name
+            for path in etags:
+                link_or_copy(local_dir / path, tmp_dir / path)
+            tmp_dir.mkdir(parents=True, exist_ok=True)
+            tmp_dir.rename(self.entry_dir(s3_uri))
+            self.write_metadata(s3_uri, {"s3_uri": s3_uri, "etags": etags, "size": size, "last_used": time.time()})
+            self.evict(keep=s3_uri)
+        log.info(f"Cached {len(etags)} files below {s3_uri}, {size} bytes")
+
+    def evict(self, keep: str):
+        """Remove the least recently used prefixes, other than keep, until the cache is no larger than max_bytes."""
+
+        entries = [metadata for metadata in self.list_metadata() if metadata["s3_uri"] != keep]
+        total = sum(metadata["size"] for metadata in entries)
+        kept = self.read_metadata(keep)
+        if kept is not None:
+            total += kept["size"]
+        for metadata in sorted(entries, key=lambda metadata: metadata["last_used"]):
+            if total <= self.max_bytes:
+                break
+            log.info(f"Evicting {metadata['s3_uri']} from the cache, {metadata['size']} bytes")
+            self.remove(metadata["s3_uri"])
+            total -= metadata["size"]
+
+    def remove(self, s3_uri: str):
+        self.metadata_file(s3_uri).unlink(missing_ok=True)
+        shutil.rmtree(self.entry_dir(s3_uri), ignore_errors=True)
+
+    def list_metadata(self) -> list[dict]:
+        return [json.loads(path.read_text()) for path in sorted((self.cache_dir / "entries").glob("*.json"))]
+
+    def read_metadata(self, s3_uri: str) -> Optional[dict]:
+        metadata_file = self.metadata_file(s3_uri)
+        if not metadata_file.is_file():
+            return None
+        return json.loads(metadata_file.read_text())
+
+    def write_metadata(self, s3_uri: str, metadata: dict):
+        # Written last, and replaced atomically, so that an entry without metadata is never used
+        metadata_file = self.metadata_file(s3_uri)
+        tmp_file = metadata_file.with_suffix(".tmp")
+        tmp_file.write_text(json.dumps(metadata, indent=2))
+        tmp_file.replace(metadata_file)
+
+    def entry_dir(self, s3_uri: str) -> pathlib.Path:
+        return self.cache_dir / "entries" / hashlib.sha256(s3_uri.encode()).hexdigest()
+
+    def metadata_file(self, s3_uri: str) -> pathlib.Path:
+        return self.entry_dir(s3_uri).with_suffix(".json")
+
+    @contextmanager
+    def lock(self):
+        (self.cache_dir / "entries").mkdir(parents=True, exist_ok=True)
+        with open(self.cache_dir / ".lock", "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def link_or_copy(src: pathlib.Path, dst: pathlib.Path):
+    """Hard link src to dst, or copy it when they are on different filesystems, replacing dst."""
+
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if dst.exists():
+        if dst.samefile(src):
+            return
+        dst.unlink()
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
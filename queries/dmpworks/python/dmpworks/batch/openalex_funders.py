@@ -4,8 +4,10 @@ from typing import Optional
 from cyclopts import App
 
 from dmpworks.batch.tasks import download_source_task, transform_parquets_task
+from dmpworks.batch.utils import s3_uri
 from dmpworks.transform.cli import OpenAlexFundersConfig
 from dmpworks.transform.openalex_funders import transform_openalex_funders
+from dmpworks.transform.pipeline import merge_shard_manifests
 from dmpworks.transform.utils_file import setup_multiprocessing_logging
 from dmpworks.utils import copy_dict, run_process
 
@@ -45,26 +47,62 @@ def transform_cmd(
     task_id: str,
     *,
     config: Optional[OpenAlexFundersConfig] = None,
+    stream_download: bool = False,
+    stream_upload: bool = False,
 ):
     """Download OpenAlex Funders from the DMP Tool S3 bucket, transform it to
     Parquet format, and upload the results to same bucket.
 
+    When config.shard_count is greater than 1, only one shard of the files is
+    transformed, streaming the downloads and uploads, e.g. by each job of an
+    AWS Batch array job. Run merge-shards once every shard has finished.
+
     Args:
         bucket_name: DMP Tool S3 bucket name.
         task_id: a unique task ID.
         config: optional configuration parameters.
+        stream_download: download the files from the DMP Tool S3 bucket batch
+            by batch as the transform runs, rather than all of them first.
+        stream_upload: upload each batch's Parquet files to the DMP Tool S3
+            bucket as soon as the batch has been transformed, rather than all
+            of them at the end.
     """
 
     config = OpenAlexFundersConfig() if config is None else config
     setup_multiprocessing_logging(logging.INFO)
 
-    with transform_parquets_task(bucket_name, DATASET, task_id) as ctx:
+    with transform_parquets_task(
+        bucket_name,
+        DATASET,
+        task_id,
+        stream_download=stream_download,
+        stream_upload=stream_upload,
+        shard_index=config.shard_index,
+        shard_count=config.shard_count,
+    ) as ctx:
         transform_openalex_funders(
             in_dir=ctx.download_dir,
             out_dir=ctx.transform_dir,
+            source_uri=ctx.source_uri,
+            target_uri=ctx.upload_uri,
             **copy_dict(vars(config), ["log_level"]),
         )
 
 
+@app.command(name="merge-shards")
+def merge_shards_cmd(bucket_name: str, task_id: str, shard_count: int):
+    """Combine the manifests of a sharded OpenAlex Funders transform in the DMP Tool
+    S3 bucket, once every shard has finished.
+
+    Args:
+        bucket_name: DMP Tool S3 bucket name.
+        task_id: a unique task ID.
+        shard_count: the number of shards the transform was split into.
+    """
+
+    setup_multiprocessing_logging(logging.INFO)
+    merge_shard_manifests(s3_uri(bucket_name, DATASET, task_id, "transform"), shard_count)
+
+
 if __name__ == "__main__":
     app()
@@ -3,10 +3,11 @@ from typing import Optional
 
 from cyclopts import App
 
+from dmpworks.batch.cache import S3Cache
 from dmpworks.batch.utils import download_from_s3, local_path, s3_uri
 from dmpworks.cli_utils import DateString, LogLevel
 from dmpworks.opensearch.cli import OpenSearchClientConfig, OpenSearchSyncConfig
-from dmpworks.opensearch.sync_works import sync_works
+from dmpworks.opensearch.sync_works import sync_work_changes, sync_works
 from dmpworks.transform.utils_file import setup_multiprocessing_logging
 
 log = logging.getLogger(__name__)
@@ -20,6 +21,7 @@ def sync_works_cmd(
     bucket_name: str,
     export_date: DateString,
     index_name: str,
+    changes: bool = False,
     client_config: Optional[OpenSearchClientConfig] = None,
     sync_config: Optional[OpenSearchSyncConfig] = None,
     log_level: LogLevel = "INFO",
@@ -30,6 +32,8 @@ def sync_works_cmd(
         bucket_name: DMP Tool S3 bucket name.
         export_date: a unique task ID.
         index_name: the OpenSearch index name.
+        changes: only sync the changes since the previous export, rather
+        than the whole export.
         client_config: the OpenSearch client config settings.
         sync_config: the OpenSearch sync config settings.
         log_level: Python log level.
@@ -41,12 +45,16 @@ def sync_works_cmd(
     setup_multiprocessing_logging(level)
 
     # Download Parquet files from S3
-    export_dir = local_path("sqlmesh", export_date, "export")
-    source_uri = s3_uri(bucket_name, "sqlmesh", export_date, "export")
-    download_from_s3(f"{source_uri}*", export_dir)
+    directory = "changes" if changes else "export"
+    in_dir = local_path("sqlmesh", export_date, directory)
+    source_uri = s3_uri(bucket_name, "sqlmesh", export_date, directory)
+    download_from_s3(f"{source_uri}*", in_dir, cache=S3Cache.from_env())
 
     # Run process
-    sync_works(index_name, export_dir, client_config, sync_config, level)
+    if changes:
+        sync_work_changes(index_name, in_dir, client_config, sync_config, level)
+    else:
+        sync_works(index_name, in_dir, client_config, sync_config, level)
 
 
 if __name__ == "__main__":
@@ -2,12 +2,15 @@ import logging
 import os
 import pathlib
 from dataclasses import dataclass
+from typing import Optional
 
 from cyclopts import App
 
+from dmpworks.batch.cache import S3Cache
 from dmpworks.batch.utils import download_from_s3, local_path, s3_uri, upload_to_s3
 from dmpworks.cli_utils import DateString, LogLevel
 from dmpworks.sql.commands import run_plan
+from dmpworks.sql.resources import ResourceBudget
 from dmpworks.transform.utils_file import setup_multiprocessing_logging
 
 log = logging.getLogger(__name__)
@@ -30,6 +33,16 @@ def plan(
     bucket_name: str,
     task_id: str,
     release_dates: ReleaseDates,
+    materialise_sources: bool = False,
+    read_sources_from_s3: bool = False,
+    incremental_index: bool = False,
+    previous_task_id: Optional[str] = None,
+    export_changes: bool = False,
+    autotune: bool = False,
+    threads: Optional[int] = None,
+    memory_limit_gb: float = 200,
+    max_temp_directory_size_gb: Optional[float] = None,
+    concurrent_tasks: int = 1,
     log_level: LogLevel = "INFO",
 ):
     """
@@ -38,11 +51,41 @@ def plan(
         bucket_name: DMP Tool S3 bucket name.
         task_id: a unique task ID.
         release_dates: the release dates of each dataset.
+        materialise_sources: materialise the OpenAlex, Crossref Metadata and
+        DataCite works as tables sorted by DOI, rather than views over their
+        Parquet files.
+        read_sources_from_s3: read each dataset's Parquet files in place on
+        S3, rather than downloading them first. DuckDB only fetches the
+        columns and row groups that each query needs.
+        incremental_index: only rebuild the index for DOIs updated since the
+        last run, merging them into the index from previous_task_id.
+        previous_task_id: the task ID of a previous run, whose DuckDB database
+        and SQLMesh state are downloaded and updated by this run.
+        export_changes: export the works that have been added, changed or
+        removed since the export from previous_task_id as upserts and deletes.
+        autotune: choose the DuckDB threads and memory limit for each model
+        from the resources it used in previous runs, which are kept with the
+        DuckDB database from previous_task_id.
+        threads: the maximum threads each model can use when autotuning, or
+        the threads shared by the models when they are evaluated
+        concurrently, defaults to the number of CPUs.
+        memory_limit_gb: the maximum DuckDB memory limit for each model when
+        autotuning, or the memory limit shared by the models when they are
+        evaluated concurrently.
+        max_temp_directory_size_gb: the maximum size of the DuckDB temp
+        directory when autotuning or evaluating models concurrently.
+        concurrent_tasks: the number of models that can be evaluated at the
+        same time, so that independent models, such as the DataCite and
+        OpenAlex index models, run alongside each other. Can't be used with
+        autotune.
         log_level: Python log level.
     """
 
     setup_multiprocessing_logging(logging.getLevelName(log_level))
 
+    if export_changes and previous_task_id is None:
+        raise ValueError("previous_task_id is required to export changes")
+
     # Download Parquet files for each dataset from S3.
     datasets = [
         ("openalex_works", release_dates.openalex_works),
@@ -51,10 +94,18 @@ def plan(
         ("datacite", release_dates.datacite),
         ("ror", release_dates.ror),
     ]
-    for dataset, release_date in datasets:
-        transform_dir = local_path(dataset, release_date, "transform")
-        target_uri = s3_uri(bucket_name, dataset, release_date, "transform")
-        download_from_s3(f"{target_uri}*", transform_dir)
+    source_paths = None
+    if read_sources_from_s3:
+        source_paths = {
+            dataset: f"{s3_uri(bucket_name, dataset, release_date, 'transform')}parquets"
+            for dataset, release_date in datasets
+        }
+    else:
+        cache = S3Cache.from_env()
+        for dataset, release_date in datasets:
+            transform_dir = local_path(dataset, release_date, "transform")
+            target_uri = s3_uri(bucket_name, dataset, release_date, "transform")
+            download_from_s3(f"{target_uri}*", transform_dir, cache=cache)
 
     # Configure SQL Mesh environment
     sqlmesh_data_dir = pathlib.Path("/data") / "sqlmesh" / task_id
@@ -62,14 +113,50 @@ def plan(
     export_dir = sqlmesh_data_dir / "export"
     duckdb_dir.parent.mkdir(parents=True, exist_ok=True)
     export_dir.mkdir(parents=True, exist_ok=True)
+    if previous_task_id is not None:
+        download_from_s3(f"s3://{bucket_name}/{DATASET}/{previous_task_id}/duckdb/*", duckdb_dir.parent)
     os.environ["SQLMESH__GATEWAYS__DUCKDB__CONNECTION__DATABASE"] = str(duckdb_dir)
+
+    # The Parquet files are linked to from paths that don't include the release date, as changing a SQLMesh variable
+    # changes the models that use it, which would cause a full rebuild of a database from a previous run. The same
+    # paths are used when reading from S3, as the S3 URIs are given to the models separately, see the source_path macro
+    # and refresh_source_views
     for dataset, release_date in datasets:
-        parquet_path = local_path(dataset, release_date, "transform") / "parquets"
+        parquet_path = pathlib.Path("/data") / DATASET / "parquets" / dataset
+        if not read_sources_from_s3:
+            parquet_path.parent.mkdir(parents=True, exist_ok=True)
+            parquet_path.unlink(missing_ok=True)
+            parquet_path.symlink_to(
+                local_path(dataset, release_date, "transform") / "parquets", target_is_directory=True
+            )
         os.environ[f"SQLMESH__VARIABLES__{dataset.upper()}_PATH"] = str(parquet_path)
     os.environ["SQLMESH__VARIABLES__EXPORT_PATH"] = str(export_dir)
 
+    # Download the previous export to compare this export with
+    if export_changes:
+        previous_export_dir = pathlib.Path("/data") / DATASET / previous_task_id / "export"
+        changes_dir = sqlmesh_data_dir / "changes"
+        changes_dir.mkdir(parents=True, exist_ok=True)
+        download_from_s3(f"s3://{bucket_name}/{DATASET}/{previous_task_id}/export/*", previous_export_dir)
+        os.environ["SQLMESH__VARIABLES__PREVIOUS_EXPORT_PATH"] = str(previous_export_dir)
+        os.environ["SQLMESH__VARIABLES__CHANGES_PATH"] = str(changes_dir)
+
     # Run SQL Mesh
-    run_plan()
+    # The temp directory is outside of the task directory so that spilled data isn't uploaded
+    resource_budget = ResourceBudget(
+        threads=threads or os.cpu_count(),
+        memory_limit_gb=memory_limit_gb,
+        temp_directory=str(pathlib.Path("/data") / DATASET / "tmp"),
+        max_temp_directory_size_gb=max_temp_directory_size_gb,
+    )
+    run_plan(
+        materialise_sources=materialise_sources,
+        incremental_index=incremental_index,
+        autotune=autotune,
+        resource_budget=resource_budget,
+        source_paths=source_paths,
+        concurrent_tasks=concurrent_tasks,
+    )
 
     # Upload exported Parquet files
     sql_mesh_s3_uri = f"s3://{bucket_name}/sqlmesh/{task_id}/"
@@ -3,9 +3,11 @@ import pathlib
 import shutil
 from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Any, ContextManager, Generator
+from typing import Any, ContextManager, Generator, Optional
 
-from dmpworks.batch.utils import clean_s3_prefix, download_from_s3, local_path, s3_uri, upload_to_s3
+from dmpworks.batch.cache import S3Cache
+from dmpworks.batch.utils import cache_s3_prefix, clean_s3_prefix, download_from_s3, local_path, s3_uri, upload_to_s3
+from dmpworks.transform.pipeline import resolve_shard_index
 
 log = logging.getLogger(__name__)
 
@@ -21,8 +23,6 @@ def download_source_task(bucket_name: str, dataset: str, task_id: str) -> Genera
     target_uri = s3_uri(bucket_name, dataset, task_id, "download")
     download_dir = local_path(dataset, task_id, "download")
 
-    clean_s3_prefix(target_uri)
-
     log.info(f"Downloading {dataset}")
     ctx = DownloadTaskContext(
         download_dir=download_dir,
@@ -30,8 +30,13 @@ def download_source_task(bucket_name: str, dataset: str, task_id: str) -> Genera
     )
     yield ctx
 
+    # Only new and changed files are uploaded, and objects left by a previous attempt that aren't in download_dir are
+    # deleted
     upload_to_s3(download_dir, target_uri)
 
+    # Keep a copy on this node when the cache is enabled, in case the transform task lands on it
+    cache_s3_prefix(S3Cache.from_env(), target_uri, download_dir)
+
     # Cleanup files as we can't guarantee that we will end up on the same worker
     # again, and we don't want to take disk space that other tasks might use
     shutil.rmtree(download_dir, ignore_errors=True)
@@ -42,17 +47,46 @@ class TransformTaskContext:
     download_dir: pathlib.Path
     transform_dir: pathlib.Path
     target_uri: str
+    # Set when the transform downloads the source files itself, batch by batch, see process_files_parallel
+    source_uri: Optional[str] = None
+    # Set when the transform uploads each batch's Parquet files itself as soon as the batch completes
+    upload_uri: Optional[str] = None
 
 
 @contextmanager
-def transform_parquets_task(bucket_name: str, dataset: str, task_id: str) -> Generator[TransformTaskContext, Any, None]:
-    download_dir = local_path(dataset, task_id, "download")
-    transform_dir = local_path(dataset, task_id, "transform")
+def transform_parquets_task(
+    bucket_name: str,
+    dataset: str,
+    task_id: str,
+    stream_download: bool = False,
+    stream_upload: bool = False,
+    shard_index: Optional[int] = None,
+    shard_count: int = 1,
+) -> Generator[TransformTaskContext, Any, None]:
+    download_stage, transform_stage = "download", "transform"
+    if shard_count > 1:
+        # Each shard downloads and uploads only its own batches, and shards of an array job may share a node, so they
+        # get their own local directories. The shard manifests are combined by merge_shard_manifests afterwards.
+        shard_index = resolve_shard_index(shard_index, shard_count)
+        log.info(f"Transforming shard {shard_index} of {shard_count}")
+        stream_download = stream_upload = True
+        download_stage = f"download_shard_{shard_index:05d}"
+        transform_stage = f"transform_shard_{shard_index:05d}"
+
+    download_dir = local_path(dataset, task_id, download_stage)
+    transform_dir = local_path(dataset, task_id, transform_stage)
     target_uri = s3_uri(bucket_name, dataset, task_id, "transform")
+    source_uri = s3_uri(bucket_name, dataset, task_id, "download")
 
-    clean_s3_prefix(target_uri)
+    # upload_to_s3 deletes objects left by a previous attempt at the end, the batches uploaded by the transform don't.
+    # Shards can't clean the prefix as they would delete each other's batches, merge_shard_manifests deletes them.
+    if stream_upload and shard_count == 1:
+        clean_s3_prefix(target_uri)
 
-    download_from_s3(f"{s3_uri(bucket_name, dataset, task_id, "download")}*", download_dir)
+    cache = S3Cache.from_env()
+    if not stream_download:
+        download_from_s3(f"{source_uri}*", download_dir, cache=cache)
+    download_dir.mkdir(parents=True, exist_ok=True)
     transform_dir.mkdir(parents=True, exist_ok=True)
 
     log.info(f"Transforming {dataset}")
@@ -60,10 +94,14 @@ def transform_parquets_task(bucket_name: str, dataset: str, task_id: str) -> Gen
         download_dir=download_dir,
         transform_dir=transform_dir,
         target_uri=target_uri,
+        source_uri=source_uri if stream_download else None,
+        upload_uri=target_uri if stream_upload else None,
     )
     yield ctx
 
-    upload_to_s3(transform_dir / "parquets", f"{target_uri}parquets/", "*.parquet")
+    if not stream_upload:
+        upload_to_s3(transform_dir / "parquets", f"{target_uri}parquets/", "*.parquet")
+        cache_s3_prefix(cache, target_uri, transform_dir)
 
     # Cleanup files as we can't guarantee that we will end up on the same worker
     # again, and we don't want to take disk space that other tasks might use
@@ -1,7 +1,10 @@
+import hashlib
 import json
 import logging
 import pathlib
+import shlex
 import subprocess
+import tempfile
 import time
 import urllib.request
 from typing import Optional
@@ -10,11 +13,16 @@ from urllib.parse import urlparse
 import boto3
 from botocore.exceptions import ClientError
 
+from dmpworks.batch.cache import S3Cache
 from dmpworks.utils import run_process
 
 log = logging.getLogger(__name__)
 TOKEN_URL = "http://169.254.169.254/latest/api/token"
 IDENTITY_URL = "http://169.254.169.254/latest/dynamic/instance-identity/document"
+# The SHA-256 checksum and size of each file uploaded by upload_to_s3, written to each directory below the prefix and
+# keyed by the name of the file in that directory, so that the checksums are found when any part of the prefix is
+# downloaded, e.g. sqlmesh/{task_id}/duckdb/ from an upload of sqlmesh/{task_id}/
+CHECKSUMS_FILE = "_checksums.json"
 
 
 def s3_uri(bucket_name: str, dataset: str, task_id: str, stage: str) -> str:
@@ -34,14 +42,240 @@ def clean_s3_prefix(s3_uri: str):
         log.info(f"No objects found at {s3_uri}")
 
 
-def upload_to_s3(local_dir: pathlib.Path, s3_uri: str, glob_pattern: str = "*"):
+def upload_to_s3(
+    local_dir: pathlib.Path,
+    s3_uri: str,
+    glob_pattern: str = "*",
+    *,
+    s3_client: Optional[boto3.client] = None,
+):
+    """Make the S3 prefix a copy of the files in local_dir that match glob_pattern.
+
+    Only new and changed files are uploaded, judged by the checksums in the CHECKSUMS_FILE of each directory, and
+    objects that are no longer in local_dir are deleted, so re-uploading identical files is a no-op.
+    """
+
     log.info(f"Uploading from {local_dir}/{glob_pattern} to {s3_uri}")
-    run_process(["s5cmd", "cp", f"{local_dir}/{glob_pattern}", s3_uri])
+    if s3_client is None:
+        s3_client = boto3.client("s3")
 
+    bucket, prefix = parse_s3_uri(s3_uri)
+    checksums = local_checksums(local_dir, glob_pattern)
+    object_sizes = list_s3_objects(s3_uri, s3_client=s3_client)
+    object_checksums = load_s3_checksums(s3_uri, object_sizes, s3_client=s3_client)
+    changed = [
+        path
+        for path, checksum in checksums.items()
+        if object_sizes.get(path) != checksum["size"] or object_checksums.get(path) != checksum
+    ]
+    orphans = [path for path in object_sizes if path not in checksums and not is_checksums_file(path)]
+    manifests = checksum_manifests(checksums)
+    object_manifests = [path for path in object_sizes if is_checksums_file(path)]
+    log.info(
+        f"Uploading {len(changed)} new or changed files, skipping {len(checksums) - len(changed)} unchanged files, "
+        f"and deleting {len(orphans)} objects that aren't in {local_dir}"
+    )
+    if not changed and not orphans and sorted(manifests) == sorted(object_manifests):
+        return
+
+    # Delete the checksums first, so that if the upload fails part way through, the next upload copies every file
+    for path in object_manifests:
+        s3_client.delete_object(Bucket=bucket, Key=f"{prefix}{path}")
+    run_s5cmd(
+        [["cp", str(local_dir / path), f"{s3_uri}{path}"] for path in changed]
+        + [["rm", f"{s3_uri}{path}"] for path in orphans]
+    )
+    for path, manifest in manifests.items():
+        s3_client.put_object(Bucket=bucket, Key=f"{prefix}{path}", Body=json.dumps(manifest, indent=2).encode())
+
+
+def download_from_s3(
+    source_uri: str,
+    target_dir: pathlib.Path,
+    *,
+    s3_client: Optional[boto3.client] = None,
+    cache: Optional[S3Cache] = None,
+):
+    """Make target_dir a copy of the objects below source_uri, e.g. s3://bucket/dataset/task_id/transform/*.
+
+    Files already in target_dir are kept when their checksum matches the one recorded by upload_to_s3, and files that
+    aren't below source_uri are deleted, so downloading the same objects again is a no-op.
+
+    When a cache is given, a copy of the objects cached on this node is used when their ETags are unchanged, and the
+    downloaded files are cached otherwise, see S3Cache. Only pass a cache for files that aren't modified in place.
+    """
 
-def download_from_s3(source_uri: str, target_dir: pathlib.Path):
     log.info(f"Downloading from {source_uri} to {target_dir}")
-    run_process(["s5cmd", "cp", source_uri, f"{target_dir}/"])
+    if s3_client is None:
+        s3_client = boto3.client("s3")
+
+    source_uri = source_uri.removesuffix("*")
+    etags = None
+    if cache is not None:
+        etags = list_s3_etags(source_uri, s3_client=s3_client)
+        if cache.restore(source_uri, etags, target_dir):
+            return
+
+    object_sizes = list_s3_objects(source_uri, s3_client=s3_client)
+    object_checksums = load_s3_checksums(source_uri, object_sizes, s3_client=s3_client)
+    paths = [path for path in object_sizes if not is_checksums_file(path)]
+    changed = []
+    for path in paths:
+        file_path = target_dir / path
+        checksum = object_checksums.get(path)
+        unchanged = (
+            checksum is not None
+            and file_path.is_file()
+            and file_path.stat().st_size == object_sizes[path] == checksum["size"]
+            and file_checksum(file_path) == checksum["sha256"]
+        )
+        if not unchanged:
+            changed.append(path)
+
+    orphans = []
+    if target_dir.exists():
+        orphans = [
+            file_path
+            for file_path in target_dir.rglob("*")
+            if file_path.is_file() and file_path.relative_to(target_dir).as_posix() not in object_sizes
+        ]
+    log.info(
+        f"Downloading {len(changed)} new or changed files, skipping {len(paths) - len(changed)} unchanged files, "
+        f"and deleting {len(orphans)} files that aren't in {source_uri}"
+    )
+    for file_path in orphans:
+        file_path.unlink()
+
+    # Changed files are deleted rather than overwritten, as they may be hard linked to a cached copy
+    for path in changed:
+        (target_dir / path).unlink(missing_ok=True)
+    target_dir.mkdir(parents=True, exist_ok=True)
+    run_s5cmd([["cp", f"{source_uri}{path}", str(target_dir / path)] for path in changed])
+
+    if cache is not None:
+        cache.store(source_uri, etags, target_dir)
+
+
+def cache_s3_prefix(
+    cache: Optional[S3Cache],
+    s3_uri: str,
+    local_dir: pathlib.Path,
+    *,
+    s3_client: Optional[boto3.client] = None,
+):
+    """Cache local_dir as the copy of the objects below s3_uri that a task has just uploaded, so that a later task on
+    the same node can use it rather than downloading them. Does nothing when cache is None."""
+
+    if cache is None:
+        return
+    cache.store(s3_uri, list_s3_etags(s3_uri, s3_client=s3_client), local_dir)
+
+
+def run_s5cmd(commands: list[list[str]]):
+    """Run s5cmd commands, e.g. ["cp", src, dst], in parallel with s5cmd run."""
+
+    if not commands:
+        return
+
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".txt") as f:
+        f.writelines(f"{shlex.join(command)}\n" for command in commands)
+        f.flush()
+        run_process(["s5cmd", "run", f.name])
+
+
+def file_checksum(path: pathlib.Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def is_checksums_file(path: str) -> bool:
+    return path.rsplit("/", 1)[-1] == CHECKSUMS_FILE
+
+
+def local_checksums(local_dir: pathlib.Path, glob_pattern: str = "*") -> dict[str, dict]:
+    """The checksum and size of each file below local_dir that matches glob_pattern, keyed by relative path."""
+
+    checksums = {}
+    for file_path in sorted(local_dir.rglob(glob_pattern)):
+        if file_path.is_file() and file_path.name != CHECKSUMS_FILE:
+            checksums[file_path.relative_to(local_dir).as_posix()] = {
+                "sha256": file_checksum(file_path),
+                "size": file_path.stat().st_size,
+            }
+    return checksums
+
+
+def checksum_manifests(checksums: dict[str, dict]) -> dict[str, dict]:
+    """Split checksums keyed by relative path into the CHECKSUMS_FILE of each directory, keyed by the path of the
+    CHECKSUMS_FILE, with the checksums in each keyed by file name."""
+
+    manifests = {}
+    for path, checksum in checksums.items():
+        directory, _, name = path.rpartition("/")
+        manifest_path = f"{directory}/{CHECKSUMS_FILE}" if directory else CHECKSUMS_FILE
+        manifests.setdefault(manifest_path, {})[name] = checksum
+    return manifests
+
+
+def list_s3_objects(s3_uri: str, *, s3_client: Optional[boto3.client] = None) -> dict[str, int]:
+    """The size of each object below an S3 prefix, keyed by the key relative to the prefix."""
+
+    if s3_client is None:
+        s3_client = boto3.client("s3")
+
+    bucket, prefix = parse_s3_uri(s3_uri)
+    object_sizes = {}
+    try:
+        for page in s3_client.get_paginator("list_objects_v2").paginate(Bucket=bucket, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                object_sizes[obj["Key"].removeprefix(prefix)] = obj["Size"]
+    except ClientError as err:
+        raise RuntimeError(f"Unable to list {s3_uri}: {err}")
+    return object_sizes
+
+
+def list_s3_etags(s3_uri: str, *, s3_client: Optional[boto3.client] = None) -> dict[str, str]:
+    """The ETag of each object below an S3 prefix, other than the checksums files, keyed by the key relative to the
+    prefix."""
+
+    if s3_client is None:
+        s3_client = boto3.client("s3")
+
+    bucket, prefix = parse_s3_uri(s3_uri)
+    etags = {}
+    try:
+        for page in s3_client.get_paginator("list_objects_v2").paginate(Bucket=bucket, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                path = obj["Key"].removeprefix(prefix)
+                if not is_checksums_file(path):
+                    etags[path] = obj["ETag"]
+    except ClientError as err:
+        raise RuntimeError(f"Unable to list {s3_uri}: {err}")
+    return etags
+
+
+def load_s3_checksums(
+    s3_uri: str, object_sizes: dict[str, int], *, s3_client: Optional[boto3.client] = None
+) -> dict[str, dict]:
+    """Load the checksums recorded by upload_to_s3 below an S3 prefix, keyed by the key relative to the prefix.
+
+    :param s3_uri: the S3 prefix.
+    :param object_sizes: the objects below the prefix, from list_s3_objects.
+    :param s3_client: the S3 client.
+    :return: the checksums, from every CHECKSUMS_FILE below the prefix.
+    """
+
+    if s3_client is None:
+        s3_client = boto3.client("s3")
+
+    bucket, prefix = parse_s3_uri(s3_uri)
+    checksums = {}
+    for path in object_sizes:
+        if is_checksums_file(path):
+            directory = path.removesuffix(CHECKSUMS_FILE)
+            body = s3_client.get_object(Bucket=bucket, Key=f"{prefix}{path}")["Body"].read()
+            checksums.update({f"{directory}{name}": checksum for name, checksum in json.loads(body).items()})
+    return checksums
 
 
 def parse_s3_uri(s3_uri: str) -> tuple[str, str]:
@@ -15,6 +15,7 @@ T = TypeVar("T", bound="AwardID")
 
 class AwardID(ABC):
     parent_ror_ids: list = []  # The funder ROR IDs
+    parent_funder_ids: set = set()  # The funder ROR, Fundref and OpenAlex IDs, normalised to lowercase without URLs
 
     def __init__(self, text: str, fields: list[str]):
         self.text: str = text
@@ -47,6 +48,11 @@ class AwardID(ABC):
         """Returns the URL for the award"""
         raise NotImplementedError("Please implement")
 
+    @abstractmethod
+    def award_key(self) -> str:
+        """The canonical key used to match the award in the works index, the same for all variants of the award"""
+        raise NotImplementedError("Please implement")
+
     @cached_property
     def all_variants(self) -> list[str]:
         award_ids = set()
@@ -62,6 +68,16 @@ class AwardID(ABC):
 
         return list(award_ids)
 
+    @cached_property
+    def all_award_keys(self) -> list[str]:
+        award_keys = {self.award_key()}
+
+        # Add award keys for related awards
+        for related_award in self.related_awards:
+            award_keys.add(related_award.award_key())
+
+        return sorted(award_keys)
+
     def parts(self) -> list[IdentifierPart]:
         """The parts that make up the ID"""
         parts = []
@@ -9,9 +9,14 @@ from dmpworks.funders.nih_funder_api import nih_core_project_to_appl_ids
 
 log = logging.getLogger(__name__)
 
+MAIN_PATTERN = re.compile(r"(?P<institute_code>[A-Z]{2})(?P<serial_number>\d{6})")
+PREFIX_PATTERN = re.compile(r"^(?P<application_type>[1-9])(?P<activity_code>[\dA-Z]{3})$")
+SUFFIX_PATTERN = re.compile(r"^(?P<support_year>[\d]{2})(?P<other_suffixes>[\dA-Z]{2,4})$")
+
 
 class NIHAwardID(AwardID):
     parent_ror_ids = {"01cwqze88"}
+    parent_funder_ids = {"01cwqze88", "10.13039/100000002", "f4320332161"}
 
     def __init__(
         self,
@@ -93,6 +98,12 @@ class NIHAwardID(AwardID):
 
         return "".join(parts)
 
+    def award_key(self) -> str:
+        """The institute code and serial number, which identify the project across application types, activity codes
+        and support years, e.g. nih:ai176039"""
+
+        return f"nih:{self.institute_code}{self.serial_number}".lower()
+
     def award_url(self) -> Optional[str]:
         if self.appl_id is not None:
             return f"https://reporter.nih.gov/project-details/{self.appl_id}"
@@ -145,8 +156,7 @@ def parse_nih_award_id(text: Optional[str]) -> Optional[NIHAwardID]:
 
     # Look for two letter institution code, followed by six digit serial number
     # If we don't find at least this pattern, then don't consider it to be an NIH award ID
-    main_pattern = re.compile(r"(?P<institute_code>[A-Z]{2})(?P<serial_number>\d{6})")
-    match = main_pattern.search(text)
+    match = MAIN_PATTERN.search(text)
     if not match:
         return None
 
@@ -172,8 +182,7 @@ def parse_nih_award_id(text: Optional[str]) -> Optional[NIHAwardID]:
             activity_code = prefix  # R01
         # If there are four or more characters, then try to match both at same time
         elif len(prefix) >= 4:
-            pattern = re.compile(r"^(?P<application_type>[1-9])(?P<activity_code>[\dA-Z]{3})$")
-            match = pattern.match(prefix)
+            match = PREFIX_PATTERN.match(prefix)
             if match:
                 application_type = match.group("application_type")  # 1
                 activity_code = match.group("activity_code")  # R01
@@ -191,8 +200,7 @@ def parse_nih_award_id(text: Optional[str]) -> Optional[NIHAwardID]:
                 other_suffixes = suffix  # R1
         # Otherwise try a full pattern match
         elif len(suffix) >= 3:
-            pattern = re.compile(r"^(?P<support_year>[\d]{2})(?P<other_suffixes>[\dA-Z]{2,4})$")
-            match = pattern.match(suffix)
+            match = SUFFIX_PATTERN.match(suffix)
             if match:
                 support_year = match.group("support_year")  # 01
                 other_suffixes = match.group("other_suffixes")  # R1
@@ -12,6 +12,7 @@ log = logging.getLogger(__name__)
 
 class NSFAwardID(AwardID):
     parent_ror_ids: set = {"021nxhr62"}
+    parent_funder_ids: set = {"021nxhr62", "10.13039/100000001", "f4320306076"}
 
     def __init__(self, text: str, org_id: Optional[str] = None, award_id: Optional[str] = None):
         """Construct an NSF Award ID.
@@ -58,6 +59,11 @@ class NSFAwardID(AwardID):
 
         return str(self.award_id)
 
+    def award_key(self) -> str:
+        """The 7 digit award ID, without the org ID, e.g. nsf:1507101"""
+
+        return f"nsf:{self.award_id}"
+
     def award_url(self) -> Optional[str]:
         if self.award_id is not None:
             return f"https://www.nsf.gov/awardsearch/showAward?AWD_ID={self.award_id}&HistoricalAwards=false"
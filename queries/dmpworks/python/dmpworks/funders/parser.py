@@ -13,20 +13,22 @@ from dmpworks.funders.nsf_funder_api import nsf_fetch_award_publication_dois
 log = logging.getLogger(__name__)
 
 
+PARSER_INDEX: dict[str, Type[AwardID]] = {
+    ror_id: id_type for id_type in [NIHAwardID, NSFAwardID] for ror_id in id_type.parent_ror_ids
+}
+AWARD_SEPARATOR = re.compile(r"[;,]")
+
+
 def parse_award_text(funder_id: str, text: str) -> list[AwardID]:
     award_ids = set()
-    parser_index: dict[str, Type[AwardID]] = {}
-    for id_type in [NIHAwardID, NSFAwardID]:
-        for ror_id in id_type.parent_ror_ids:
-            parser_index[ror_id] = id_type
-    parser = parser_index.get(funder_id)
+    parser = PARSER_INDEX.get(funder_id)
     if parser:
         if text is not None:
             # Handle cases where multiple awards specified, for example:
             # U19 AI111143; U19 AI111143
             # Lead 2126792, 2126793, 2126794, 2126795, 2126796, 2126797, 2126798, 2126799
             # Then parse each part
-            parts = re.split(r"[;,]", text)
+            parts = AWARD_SEPARATOR.split(text)
             for part in parts:
                 award_id = parser.parse(part)
                 if award_id is not None:
@@ -52,6 +52,7 @@ class Award(BaseModel):
     }
 
     award_id: str
+    award_keys: list[str] = []
 
 
 class Source(BaseModel):
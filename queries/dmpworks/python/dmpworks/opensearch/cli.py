@@ -9,7 +9,7 @@ from dmpworks.opensearch.dmp_works import dmp_works_search
 from dmpworks.opensearch.enrich_dmps import enrich_dmps
 from dmpworks.opensearch.index import create_index, update_mapping
 from dmpworks.opensearch.sync_dmps import sync_dmps
-from dmpworks.opensearch.sync_works import sync_works
+from dmpworks.opensearch.sync_works import sync_work_changes, sync_works
 from dmpworks.opensearch.utils import (
     Date,
     make_opensearch_client,
@@ -74,6 +74,7 @@ def update_mapping_cmd(
 def sync_works_cmd(
     index_name: str,
     in_dir: Directory,
+    changes: bool = False,
     client_config: Optional[OpenSearchClientConfig] = None,
     sync_config: Optional[OpenSearchSyncConfig] = None,
     log_level: LogLevel = "INFO",
@@ -83,6 +84,7 @@ def sync_works_cmd(
     Args:
         index_name: The name of the OpenSearch index to sync to (e.g., works).
         in_dir: Path to the DMP Tool Works index table export directory (e.g., /path/to/export).
+        changes: in_dir is a changes directory (e.g., /path/to/changes), only sync the upserts and deletes since the previous export.
         client_config: OpenSearch client settings.
         sync_config: OpenSearch sync settings.
         log_level: Python log level.
@@ -98,7 +100,8 @@ def sync_works_cmd(
     logging.basicConfig(level=level)
     logging.getLogger("opensearch").setLevel(logging.WARNING)
 
-    sync_works(
+    sync_func = sync_work_changes if changes else sync_works
+    sync_func(
         index_name,
         in_dir,
         client_config,
@@ -199,6 +202,7 @@ def dmp_works_search_cmd(
     dmp_inst_ror: Optional[str] = None,
     start_date: Date = None,
     end_date: Date = None,
+    award_keys: bool = True,
     log_level: LogLevel = "INFO",
 ):
     """Enrich DMPs in OpenSearch, including fetching publications that can be
@@ -220,6 +224,9 @@ def dmp_works_search_cmd(
         max_concurrent_searches: the maximum number of concurrent searches.
         max_concurrent_shard_requests: the maximum number of shards searched per node.
         client_config: OpenSearch client settings.
+        award_keys: whether to match awards with one terms query on their
+        canonical award keys and one on their award ID variants, rather than a
+        term query for every award ID variant.
         log_level: Python log level.
     """
 
@@ -247,6 +254,7 @@ def dmp_works_search_cmd(
         dmp_inst_ror=dmp_inst_ror,
         start_date=start_date,
         end_date=end_date,
+        award_keys=award_keys,
     )
 
 
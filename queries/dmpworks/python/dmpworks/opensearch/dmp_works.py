@@ -36,6 +36,7 @@ def dmp_works_search(
     dmp_inst_ror: Optional[str] = None,
     start_date: Optional[pendulum.Date] = None,
     end_date: Optional[pendulum.Date] = None,
+    award_keys: bool = True,
 ):
     client = make_opensearch_client(client_config)
     institutions = None
@@ -96,6 +97,7 @@ def dmp_works_search(
             )
         pbar.update(count)
 
+    took = []
     with tqdm(total=0, desc="Find DMP work matches with OpenSearch", unit="doc") as pbar:
         with yield_dmps(
             client,
@@ -117,6 +119,8 @@ def dmp_works_search(
                             max_results=max_results,
                             project_end_buffer_years=project_end_buffer_years,
                             include_named_queries_score=include_named_queries_score,
+                            award_keys=award_keys,
+                            took=took,
                         )
                         write_works(works, 1)
                     else:
@@ -130,6 +134,8 @@ def dmp_works_search(
                                 project_end_buffer_years=project_end_buffer_years,
                                 max_concurrent_searches=max_concurrent_searches,
                                 max_concurrent_shard_requests=max_concurrent_shard_requests,
+                                award_keys=award_keys,
+                                took=took,
                             )
                             write_works(works, len(batch))
                             batch = []
@@ -143,9 +149,32 @@ def dmp_works_search(
                         project_end_buffer_years=project_end_buffer_years,
                         max_concurrent_searches=max_concurrent_searches,
                         max_concurrent_shard_requests=max_concurrent_shard_requests,
+                        award_keys=award_keys,
+                        took=took,
                     )
                     write_works(works, len(batch))
 
+    log_search_latency(took)
+
+
+def log_search_latency(took: list[int]):
+    """Log a summary of the time OpenSearch took to run each DMP's works query.
+
+    :param took: the took value in milliseconds from each search response.
+    """
+
+    if not took:
+        return
+
+    took = sorted(took)
+    log.info(
+        f"Works queries: {len(took)}, "
+        f"mean: {sum(took) / len(took):.1f}ms, "
+        f"p50: {took[int(0.5 * (len(took) - 1))]}ms, "
+        f"p95: {took[int(0.95 * (len(took) - 1))]}ms, "
+        f"max: {took[-1]}ms"
+    )
+
 
 def msearch_dmp_works(
     client: OpenSearch,
@@ -155,12 +184,14 @@ def msearch_dmp_works(
     project_end_buffer_years: int = 3,
     max_concurrent_searches: int = 125,
     max_concurrent_shard_requests: int = 12,
+    award_keys: bool = True,
+    took: Optional[list[int]] = None,
 ) -> list[RelatedWork]:
     # Execute searches
     body = []
     for dmp in dmps:
         body.append({})
-        body.append(build_query(dmp, max_results, project_end_buffer_years))
+        body.append(build_query(dmp, max_results, project_end_buffer_years, award_keys=award_keys))
 
     responses = client.msearch(
         body=body,
@@ -173,6 +204,8 @@ def msearch_dmp_works(
     results = []
     for i, response in enumerate(responses["responses"]):
         dmp = dmps[i]
+        if took is not None and "took" in response:
+            took.append(response["took"])
         hits = response.get("hits", {}).get("hits", [])
         max_score = response.get("hits", {}).get("max_score")
         results.extend(collate_results(dmp, hits, max_score))
@@ -187,13 +220,17 @@ def search_dmp_works(
     max_results: int = 100,
     project_end_buffer_years: int = 3,
     include_named_queries_score: bool = False,
+    award_keys: bool = True,
+    took: Optional[list[int]] = None,
 ) -> list[RelatedWork]:
-    body = build_query(dmp, max_results, project_end_buffer_years)
+    body = build_query(dmp, max_results, project_end_buffer_years, award_keys=award_keys)
     response = client.search(
         body=body,
         index=index_name,
         include_named_queries_score=include_named_queries_score,
     )
+    if took is not None and "took" in response:
+        took.append(response["took"])
     hits = response.get("hits", {}).get("hits", [])
     max_score = response.get("hits", {}).get("max_score")
     return collate_results(dmp, hits, max_score)
@@ -291,7 +328,7 @@ def to_item_matches(inner_hits: dict, hit_name: str) -> list[ItemMatch]:
     return matches
 
 
-def build_query(dmp: DMPModel, max_results: int, project_end_buffer_years: int) -> dict:
+def build_query(dmp: DMPModel, max_results: int, project_end_buffer_years: int, award_keys: bool = True) -> dict:
     must = []
     should = []
 
@@ -349,6 +386,7 @@ def build_query(dmp: DMPModel, max_results: int, project_end_buffer_years: int)
     awards = build_awards_query(
         "awards",
         dmp.external_data.awards,
+        award_keys=award_keys,
     )
     if awards is not None:
         must.append(awards)
@@ -513,23 +551,53 @@ def build_entity_query(
 def build_awards_query(
     path: str,
     awards: list[Award],
+    award_keys: bool = True,
 ) -> Optional[dict]:
-    """The dis_max ensures that all the variants of a single award only contribute
-    a maximum score of 10."""
+    """Each award contributes a maximum score of 10, however many of its variants
+    or related awards match.
+
+    When award_keys is True, an award matches works whose canonical award keys,
+    computed when the works index was built, include the key of the award or one
+    of its related awards, or whose award ID is one of the award's variants. Award
+    keys are only computed for works funded by the NIH or NSF parent funder IDs,
+    so the variants are still needed to match works credited to a child funder,
+    such as an NIH institute, or to no funder. Both are single terms lookups.
+    Otherwise a term query is made for every variant of the award. In both cases
+    the dis_max limits the score."""
 
     award_queries = []
     for award in awards:
         queries = []
-        for award_id in award.award_id.all_variants:
+        if award_keys:
+            queries.append(
+                {
+                    "constant_score": {
+                        "_name": "awards.award_keys",
+                        "filter": {"terms": {"awards.award_keys": award.award_id.all_award_keys}},
+                        "boost": 10,
+                    }
+                }
+            )
             queries.append(
                 {
                     "constant_score": {
                         "_name": "awards.award_id",
-                        "filter": {"term": {"awards.award_id": award_id}},
+                        "filter": {"terms": {"awards.award_id": award.award_id.all_variants}},
                         "boost": 10,
                     }
                 }
             )
+        else:
+            for award_id in award.award_id.all_variants:
+                queries.append(
+                    {
+                        "constant_score": {
+                            "_name": "awards.award_id",
+                            "filter": {"term": {"awards.award_id": award_id}},
+                            "boost": 10,
+                        }
+                    }
+                )
         award_queries.append(
             {
                 "dis_max": {
@@ -188,7 +188,8 @@ def index_actions(
         raise_on_error=False,
         raise_on_exception=False,
     ):
-        if ok:
+        # Deleting a document that isn't in the index is treated as a success
+        if ok or is_missing_delete(info):
             with counter_lock:
                 success_counter.value += 1
         else:
@@ -201,11 +202,16 @@ def index_actions(
     return errors
 
 
+def is_missing_delete(info: dict) -> bool:
+    return info.get("delete", {}).get("status") == 404
+
+
 def info_to_error_map(info: dict) -> ErrorMap:
-    update = info.get("update", {})
-    doc_id: str = update.get("_id")
-    status: int = update.get("status")
-    error: dict = update.get("error")
+    # The info is keyed by the action's op type, e.g. update or delete
+    result = next(iter(info.values()), {})
+    doc_id: str = result.get("_id")
+    status: int = result.get("status")
+    error: dict = result.get("error")
     return {
         status: {
             "count": 1,
@@ -55,6 +55,18 @@ def batch_to_work_actions(
         }
 
 
+def batch_to_delete_actions(
+    index_name: str,
+    batch: pa.RecordBatch,
+) -> Iterator[dict]:
+    for doi in batch["doi"].to_pylist():
+        yield {
+            "_op_type": "delete",
+            "_index": index_name,
+            "_id": doi,
+        }
+
+
 @timed
 def sync_works(
     index_name: str,
@@ -72,3 +84,43 @@ def sync_works(
         sync_config=sync_config,
         log_level=log_level,
     )
+
+
+@timed
+def sync_work_changes(
+    index_name: str,
+    changes_dir: pathlib.Path,
+    client_config: OpenSearchClientConfig,
+    sync_config: OpenSearchSyncConfig,
+    log_level: int = logging.INFO,
+):
+    """Sync the changes since the previous works export with OpenSearch, see works_index.exports.
+
+    :param index_name: the OpenSearch index name.
+    :param changes_dir: the changes directory, with the upserts and deletes Parquet files.
+    :param client_config: the OpenSearch client config.
+    :param sync_config: the OpenSearch sync config.
+    :param log_level: the log level.
+    """
+
+    log.info("Syncing upserts")
+    sync_docs(
+        index_name=index_name,
+        in_dir=changes_dir / "upserts",
+        batch_to_actions_func=batch_to_work_actions,
+        include_columns=COLUMNS,
+        client_config=client_config,
+        sync_config=sync_config,
+        log_level=log_level,
+    )
+
+    log.info("Syncing deletes")
+    sync_docs(
+        index_name=index_name,
+        in_dir=changes_dir / "deletes",
+        batch_to_actions_func=batch_to_delete_actions,
+        include_columns=["doi"],
+        client_config=client_config,
+        sync_config=sync_config,
+        log_level=log_level,
+    )
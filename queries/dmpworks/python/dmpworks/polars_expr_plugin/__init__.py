@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import Literal, TYPE_CHECKING
 
 import polars as pl
 from dmpworks.polars_expr_plugin._internal import __version__ as __version__
@@ -12,6 +12,8 @@ if TYPE_CHECKING:
 
 LIB = Path(__file__).parent
 
+IdentifierType = Literal["doi", "orcid", "ror", "isni", "fundref"]
+
 
 def revert_inverted_index(expr: IntoExprColumn) -> pl.Expr:
     return register_plugin_function(
@@ -56,3 +58,50 @@ def parse_name(expr: IntoExprColumn) -> pl.Expr:
         function_name="parse_name",
         is_elementwise=True,
     )
+
+
+def canonicalise_identifier(
+    expr: IntoExprColumn,
+    identifier_type: IdentifierType,
+    with_validity: bool = False,
+) -> pl.Expr:
+    """Parse, validate and canonicalise identifiers in a single pass.
+
+    URL and scheme prefixes are removed, identifiers are lowercased and checked against their syntax and, for ORCID,
+    ISNI and ROR IDs, their checksum. DOIs are returned as 10.xxxx/yyyy, ORCIDs as xxxx-xxxx-xxxx-xxxx, ISNIs as 16
+    characters without spaces, ROR IDs as the 9 character ID and Fundref IDs with the 10.13039/ prefix.
+
+    :param expr: the identifiers.
+    :param identifier_type: the type of identifier: doi, orcid, ror, isni or fundref.
+    :param with_validity: when False, invalid identifiers are returned as null. When True, a struct with the cleaned
+    identifier (id) and whether it is valid (valid) is returned.
+    :return: the canonical identifiers.
+    """
+
+    return register_plugin_function(
+        args=[expr],
+        plugin_path=LIB,
+        function_name="canonicalise_identifier",
+        is_elementwise=True,
+        kwargs={"identifier_type": identifier_type, "with_validity": with_validity},
+    )
+
+
+def canonical_doi(expr: IntoExprColumn, with_validity: bool = False) -> pl.Expr:
+    return canonicalise_identifier(expr, "doi", with_validity=with_validity)
+
+
+def canonical_orcid(expr: IntoExprColumn, with_validity: bool = False) -> pl.Expr:
+    return canonicalise_identifier(expr, "orcid", with_validity=with_validity)
+
+
+def canonical_ror(expr: IntoExprColumn, with_validity: bool = False) -> pl.Expr:
+    return canonicalise_identifier(expr, "ror", with_validity=with_validity)
+
+
+def canonical_isni(expr: IntoExprColumn, with_validity: bool = False) -> pl.Expr:
+    return canonicalise_identifier(expr, "isni", with_validity=with_validity)
+
+
+def canonical_fundref(expr: IntoExprColumn, with_validity: bool = False) -> pl.Expr:
+    return canonicalise_identifier(expr, "fundref", with_validity=with_validity)
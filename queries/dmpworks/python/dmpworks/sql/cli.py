@@ -1,3 +1,7 @@
+import os
+import pathlib
+from typing import Optional
+
 from cyclopts import App
 
 
@@ -16,14 +20,97 @@ def test_cmd():
 
 
 @app.command(name="plan")
-def plan_cmd():
-    """Run SQLMesh tests."""
+def plan_cmd(
+    materialise_sources: bool = False,
+    incremental_index: bool = False,
+    autotune: bool = False,
+    threads: Optional[int] = None,
+    memory_limit_gb: float = 200,
+    temp_directory: Optional[str] = None,
+    max_temp_directory_size_gb: Optional[float] = None,
+    concurrent_tasks: int = 1,
+):
+    """Run SQLMesh tests.
+
+    Args:
+        materialise_sources: materialise the OpenAlex, Crossref Metadata and
+        DataCite works as tables sorted by DOI, rather than views over their
+        Parquet files.
+        incremental_index: only rebuild the index for DOIs updated since the
+        last run.
+        autotune: choose the DuckDB threads and memory limit for each model
+        from the resources it used in previous runs, which are kept next to
+        the DuckDB database.
+        threads: the maximum threads each model can use when autotuning, or
+        the threads shared by the models when they are evaluated
+        concurrently, defaults to the number of CPUs.
+        memory_limit_gb: the maximum DuckDB memory limit for each model when
+        autotuning, or the memory limit shared by the models when they are
+        evaluated concurrently.
+        temp_directory: the DuckDB temp directory when autotuning or
+        evaluating models concurrently.
+        max_temp_directory_size_gb: the maximum size of the DuckDB temp
+        directory when autotuning or evaluating models concurrently.
+        concurrent_tasks: the number of models that can be evaluated at the
+        same time, so that independent models, such as the DataCite and
+        OpenAlex index models, run alongside each other. Can't be used with
+        autotune.
+    """
 
     # Imported here as SQLMesh prints unnecessary logs in unrelated parts of
     # system if imported globally
     from dmpworks.sql.commands import run_plan
+    from dmpworks.sql.resources import ResourceBudget
+
+    resource_budget = ResourceBudget(
+        threads=threads or os.cpu_count(),
+        memory_limit_gb=memory_limit_gb,
+        temp_directory=temp_directory,
+        max_temp_directory_size_gb=max_temp_directory_size_gb,
+    )
+    run_plan(
+        materialise_sources=materialise_sources,
+        incremental_index=incremental_index,
+        autotune=autotune,
+        resource_budget=resource_budget,
+        concurrent_tasks=concurrent_tasks,
+    )
+
+
+@app.command(name="profile")
+def profile_cmd(
+    out_file: pathlib.Path,
+    models: Optional[list[str]] = None,
+    sample_percent: Optional[float] = None,
+    threads: Optional[int] = None,
+    baseline_file: Optional[pathlib.Path] = None,
+):
+    """Profile each SQLMesh model's query with DuckDB EXPLAIN ANALYZE.
+
+    The queries are run against the prod environment of the DuckDB database,
+    which must have been built with a plan first.
+
+    Args:
+        out_file: the JSON report with the per operator timings,
+        cardinalities and memory for each model.
+        models: the models to profile, defaults to every model.
+        sample_percent: sample this percentage of the rows of each table that
+        the queries read, rather than the full inputs.
+        threads: the DuckDB threads.
+        baseline_file: a JSON report from a previous run to compare with.
+    """
+
+    # Imported here as SQLMesh prints unnecessary logs in unrelated parts of
+    # system if imported globally
+    from dmpworks.sql.profiling import run_profile
 
-    run_plan()
+    run_profile(
+        out_file,
+        models=models,
+        sample_percent=sample_percent,
+        threads=threads,
+        baseline_file=baseline_file,
+    )
 
 
 if __name__ == "__main__":
@@ -1,13 +1,127 @@
+import json
+import logging
+import os
 import pathlib
+import threading
+import time
+from collections import defaultdict
 from importlib.util import find_spec
 from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
 
-from sqlmesh.core.console import configure_console
+from sqlmesh.core.console import configure_console, set_console, TerminalConsole
 from sqlmesh.core.context import Context
 from sqlmesh.core.plan import Plan
+from sqlmesh.core.snapshot import Snapshot
 from sqlmesh.core.test import ModelTextTestResult
 from sqlmesh.utils import Verbosity
 
+from dmpworks.sql.macros.resource_settings import CONCURRENT_TASKS_ENV
+from dmpworks.sql.macros.source_path import SOURCE_PATHS_ENV
+from dmpworks.sql.resources import (
+    choose_settings,
+    history_path,
+    load_history,
+    ResourceBudget,
+    ResourceSampler,
+    save_history,
+    SETTINGS_FILE_ENV,
+    settings_path,
+    settings_report,
+    temp_directory_statements,
+    write_settings,
+)
+
+log = logging.getLogger(__name__)
+
+
+def critical_path(graph: dict[str, set[str]], seconds: dict[str, float]) -> tuple[float, list[str]]:
+    """Find the chain of dependent models that took the longest to evaluate, which bounds how quickly the models can
+    be evaluated however many are evaluated concurrently.
+
+    :param graph: the upstream dependencies of each model.
+    :param seconds: how long each model took to evaluate.
+    :return: the seconds taken by the models on the critical path and their names, from first to last.
+    """
+
+    paths: dict[str, tuple[float, list[str]]] = {}
+
+    def longest_path(name: str) -> tuple[float, list[str]]:
+        if name not in paths:
+            upstream = max((longest_path(parent) for parent in graph.get(name, ())), default=(0.0, []))
+            paths[name] = (upstream[0] + seconds.get(name, 0.0), upstream[1] + [name])
+        return paths[name]
+
+    return max((longest_path(name) for name in graph), default=(0.0, []))
+
+
+class ModelTimingConsole(TerminalConsole):
+    """Terminal console that records how long each model took to evaluate, and optionally the DuckDB resources it used."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.model_durations_ms: dict[str, int] = defaultdict(int)
+        self.sampler: Optional[ResourceSampler] = None
+        # Models are evaluated on SQLMesh's worker threads when concurrent tasks are enabled
+        self.lock = threading.Lock()
+        self.evaluation_start: Optional[float] = None
+        self.evaluation_end: Optional[float] = None
+
+    def start_snapshot_evaluation_progress(self, snapshot: Snapshot, audit_only: bool = False) -> None:
+        with self.lock:
+            if self.evaluation_start is None:
+                self.evaluation_start = time.monotonic()
+        if self.sampler is not None and not audit_only:
+            self.sampler.start_model(snapshot.name)
+        super().start_snapshot_evaluation_progress(snapshot, audit_only)
+
+    def update_snapshot_evaluation_progress(
+        self,
+        snapshot: Snapshot,
+        interval,
+        batch_idx: int,
+        duration_ms: Optional[int],
+        *args,
+        **kwargs,
+    ) -> None:
+        with self.lock:
+            self.evaluation_end = time.monotonic()
+            if duration_ms is not None:
+                self.model_durations_ms[snapshot.name] += duration_ms
+        if self.sampler is not None:
+            self.sampler.end_model(snapshot.name, duration_ms)
+        super().update_snapshot_evaluation_progress(snapshot, interval, batch_idx, duration_ms, *args, **kwargs)
+
+    def model_runtime_report(self) -> str:
+        """Format the model runtimes as a table, sorted from slowest to fastest."""
+
+        total_ms = sum(self.model_durations_ms.values())
+        lines = [f"{'model':<60} {'seconds':>10} {'%':>6}"]
+        for name, duration_ms in sorted(self.model_durations_ms.items(), key=lambda item: item[1], reverse=True):
+            percent = duration_ms / total_ms * 100 if total_ms else 0
+            lines.append(f"{name:<60} {duration_ms / 1000:>10.1f} {percent:>6.1f}")
+        lines.append(f"{'total':<60} {total_ms / 1000:>10.1f}")
+        return "\n".join(lines)
+
+    def concurrency_report(self, graph: dict[str, set[str]]) -> str:
+        """Summarise how long the models took to evaluate compared with their runtimes and the critical path.
+
+        :param graph: the upstream dependencies of each model.
+        :return: the summary.
+        """
+
+        elapsed = self.evaluation_end - self.evaluation_start
+        total = sum(self.model_durations_ms.values()) / 1000
+        seconds = {name: duration_ms / 1000 for name, duration_ms in self.model_durations_ms.items()}
+        path_seconds, path = critical_path(graph, seconds)
+        return (
+            f"Evaluated {len(seconds)} models in {elapsed:.1f}s, their runtimes add up to {total:.1f}s, "
+            f"{total / elapsed:.2f}x the elapsed time\n"
+            f"Critical path {path_seconds:.1f}s, {path_seconds / elapsed * 100:.0f}% of the elapsed time: "
+            f"{' -> '.join(name for name in path if name in seconds)}"
+        )
+
 
 def sqlmesh_dir(module_name: str = "dmpworks.sql") -> pathlib.Path:
     spec = find_spec(module_name)
@@ -17,13 +131,170 @@ def sqlmesh_dir(module_name: str = "dmpworks.sql") -> pathlib.Path:
     return Path(spec.origin).parent
 
 
-def run_plan() -> Plan:
-    configure_console(ignore_warnings=False)
+def duckdb_s3_secret() -> dict[str, str]:
+    """A DuckDB S3 secret that uses the AWS credentials from the environment.
+
+    The AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY and AWS_SESSION_TOKEN environment variables are used when set,
+    otherwise the AWS credential chain is used, e.g. the Batch job's role. AWS_ENDPOINT_URL_S3 or AWS_ENDPOINT_URL
+    point the secret at an S3 compatible object store.
+    """
+
+    if "AWS_ACCESS_KEY_ID" in os.environ:
+        secret = {
+            "type": "s3",
+            "provider": "config",
+            "key_id": os.environ["AWS_ACCESS_KEY_ID"],
+            "secret": os.environ.get("AWS_SECRET_ACCESS_KEY", ""),
+        }
+        if "AWS_SESSION_TOKEN" in os.environ:
+            secret["session_token"] = os.environ["AWS_SESSION_TOKEN"]
+    else:
+        secret = {"type": "s3", "provider": "credential_chain"}
+
+    region = os.environ.get("AWS_REGION", os.environ.get("AWS_DEFAULT_REGION"))
+    if region:
+        secret["region"] = region
+
+    endpoint_url = os.environ.get("AWS_ENDPOINT_URL_S3", os.environ.get("AWS_ENDPOINT_URL"))
+    if endpoint_url:
+        url = urlparse(endpoint_url)
+        secret["endpoint"] = url.netloc
+        secret["url_style"] = "path"
+        secret["use_ssl"] = "true" if url.scheme == "https" else "false"
+
+    return secret
+
+
+def refresh_source_views(ctx: Context) -> list[str]:
+    """Re-create the views of the source models that read their Parquet files through the source_path macro, so that
+    they read from the current source locations.
+
+    The source locations aren't part of the models' fingerprints, see source_path, so when the DuckDB database from a
+    previous run is reused, neither plan nor run re-create the views, which would keep reading the previous release.
+    Source models materialised as tables are rebuilt by run, which renders them with the current locations.
+
+    :param ctx: the SQLMesh context, after the plan has been applied.
+    :return: the names of the models whose views were re-created.
+    """
+
+    names = []
+    for snapshot in ctx.snapshots.values():
+        if not snapshot.is_model or not snapshot.model.kind.is_view or "source_path" not in snapshot.model.python_env:
+            continue
+        query = snapshot.model.render_query_or_raise(engine_adapter=ctx.engine_adapter)
+        ctx.engine_adapter.create_view(snapshot.table_name(), query, replace=True)
+        names.append(snapshot.name)
+    log.info(f"Re-created {len(names)} source views with the current source locations")
+    return names
+
+
+def run_plan(
+    materialise_sources: bool = False,
+    incremental_index: bool = False,
+    autotune: bool = False,
+    resource_budget: Optional[ResourceBudget] = None,
+    source_paths: Optional[dict[str, str]] = None,
+    concurrent_tasks: int = 1,
+) -> Plan:
+    """Run a SQLMesh plan and log how long each model took.
+
+    :param materialise_sources: materialise openalex.works, crossref_metadata.works and datacite.works as tables
+    sorted by DOI, overriding the materialise_sources variable in config.yaml.
+    :param incremental_index: only rebuild the index for DOIs updated since the last run, overriding the
+    incremental_index variable in config.yaml. Only useful when the DuckDB database from the last run is reused.
+    :param autotune: choose the DuckDB threads and memory limit for each model from the resources it used in previous
+    runs, and record the resources used in this run. The history is kept next to the DuckDB database.
+    :param resource_budget: the resources each model may use when autotune is enabled. Its temp directory settings are
+    set once for the whole run when autotune is enabled or models are evaluated concurrently.
+    :param source_paths: read the Parquet files of these source datasets from these locations rather than their path
+    variables, e.g. {"openalex_works": "s3://bucket/openalex_works/2025-06-01/transform/parquets"}. S3 URIs are read
+    in place with the httpfs extension, using the AWS credentials from the environment, see duckdb_s3_secret. The
+    source views are re-created with these locations on every run, see refresh_source_views.
+    :param concurrent_tasks: the number of models that may be evaluated at the same time. Models are evaluated as soon
+    as the models they depend on have been, so that independent branches of the DAG, e.g. the datacite_index and
+    openalex_index models, run alongside each other. DuckDB's threads and memory limit are global, so rather than each
+    model setting its own, they are set once from resource_budget and DuckDB shares them between the running queries.
+    Can't be used with autotune, which records the resources used by each model on its own.
+    :return: the applied plan.
+    """
+
+    if concurrent_tasks > 1 and autotune:
+        raise ValueError("autotune can't be used with concurrent_tasks, as it records the resources of each model")
+
+    if materialise_sources:
+        os.environ["SQLMESH__VARIABLES__MATERIALISE_SOURCES"] = "true"
+    if incremental_index:
+        os.environ["SQLMESH__VARIABLES__INCREMENTAL_INDEX"] = "true"
+    if source_paths:
+        os.environ[SOURCE_PATHS_ENV] = json.dumps(source_paths)
+        if any(path.startswith("s3://") for path in source_paths.values()):
+            secret = duckdb_s3_secret()
+            extensions = ["httpfs", "aws"] if secret["provider"] == "credential_chain" else ["httpfs"]
+            os.environ["SQLMESH__GATEWAYS__DUCKDB__CONNECTION__EXTENSIONS"] = json.dumps(extensions)
+            os.environ["SQLMESH__GATEWAYS__DUCKDB__CONNECTION__SECRETS"] = json.dumps([secret])
+    os.environ["SQLMESH__GATEWAYS__DUCKDB__CONNECTION__CONCURRENT_TASKS"] = str(concurrent_tasks)
+    os.environ[CONCURRENT_TASKS_ENV] = str(concurrent_tasks)
+
+    console = ModelTimingConsole(ignore_warnings=False)
+    set_console(console)
     ctx = Context(
         paths=[sqlmesh_dir()],
         load=True,
     )
-    plan = ctx.plan(environment="prod", no_prompts=True, auto_apply=True)
+
+    if autotune:
+        resource_budget = resource_budget or ResourceBudget()
+        database = ctx.engine_adapter.fetchone(
+            "SELECT path FROM duckdb_databases() WHERE database_name = current_database()"
+        )[0]
+        history_file = history_path(database)
+        history = load_history(history_file)
+        settings = choose_settings(history, resource_budget)
+        settings_file = settings_path(database)
+        write_settings(settings_file, settings, resource_budget)
+        os.environ[SETTINGS_FILE_ENV] = str(settings_file)
+        if settings:
+            log.info(f"DuckDB resource settings from {len(history)} previous runs:\n{settings_report(settings)}")
+        else:
+            log.info(f"No resource history at {history_file}, using the threads variables and resource budget")
+
+        console.sampler = ResourceSampler(ctx.engine_adapter.connection)
+        console.sampler.start()
+
+    if concurrent_tasks > 1:
+        resource_budget = resource_budget or ResourceBudget()
+        ctx.engine_adapter.execute(
+            [
+                f"SET threads = {resource_budget.threads}",
+                f"SET memory_limit = '{resource_budget.memory_limit_gb}GiB'",
+            ]
+        )
+        log.info(f"Evaluating up to {concurrent_tasks} models concurrently with {resource_budget.threads} threads")
+
+    # The temp directory is set once for the connection, as DuckDB can't switch it once a model has spilled to it
+    if autotune or concurrent_tasks > 1:
+        statements = temp_directory_statements(resource_budget)
+        if statements:
+            ctx.engine_adapter.execute(statements)
+
+    try:
+        plan = ctx.plan(environment="prod", no_prompts=True, auto_apply=True)
+        if source_paths:
+            refresh_source_views(ctx)
+
+        # A plan only evaluates new and changed models, when the database from a previous run is reused the unchanged
+        # models are evaluated by run
+        ctx.run(environment="prod")
+    finally:
+        if console.sampler is not None:
+            console.sampler.stop()
+
+    if console.model_durations_ms:
+        console.log_status_update(f"Model runtimes:\n{console.model_runtime_report()}")
+        console.log_status_update(console.concurrency_report(ctx.dag.graph))
+    if console.sampler is not None and console.sampler.model_runs:
+        save_history(history_file, history, console.sampler.model_runs)
+        log.info(f"Saved the resources used by {len(console.sampler.model_runs)} models to {history_file}")
     return plan
 
 
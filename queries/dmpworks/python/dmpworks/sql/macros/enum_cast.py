@@ -0,0 +1,61 @@
+from sqlglot import exp
+from sqlmesh.core.macros import macro, MacroEvaluator
+
+# The values of the columns of the index tables that have a small, fixed set of values. These are stored as DuckDB
+# ENUMs, which are written to Parquet files as strings when the works index is exported
+ENUMS = {
+    # The normalised DataCite types in datacite_index.types and the OpenAlex types in openalex_index.openalex_index
+    "work_type": (
+        "ARTICLE",
+        "AUDIO_VISUAL",
+        "BOOK",
+        "BOOK_CHAPTER",
+        "COLLECTION",
+        "DATASET",
+        "DATA_PAPER",
+        "DISSERTATION",
+        "EDITORIAL",
+        "ERRATUM",
+        "EVENT",
+        "GRANT",
+        "IMAGE",
+        "INTERACTIVE_RESOURCE",
+        "LETTER",
+        "LIBGUIDES",
+        "MODEL",
+        "OTHER",
+        "OUTPUT_MANAGEMENT_PLAN",
+        "PARATEXT",
+        "PEER_REVIEW",
+        "PHYSICAL_OBJECT",
+        "PREPRINT",
+        "REFERENCE_ENTRY",
+        "REPORT",
+        "RETRACTION",
+        "REVIEW",
+        "SERVICE",
+        "SOFTWARE",
+        "SOUND",
+        "STANDARD",
+        "SUPPLEMENTARY_MATERIALS",
+        "TEXT",
+        "WORKFLOW",
+    ),
+    "source_name": ("DataCite", "OpenAlex"),
+}
+
+
+@macro()
+def enum_cast(evaluator: MacroEvaluator, value: exp.Expression, enum: exp.Expression) -> exp.Expression:
+    """Cast a value to one of the ENUMs above, e.g. @enum_cast(type, work_type).
+
+    Values that aren't in the ENUM become 'OTHER' when the ENUM has an OTHER value and NULL otherwise, so that a new
+    value in a source dataset, which is reported by a non-blocking audit, doesn't fail the model.
+    """
+
+    values = ENUMS[enum.name]
+    data_type = exp.DataType.build(f"ENUM({', '.join(repr(value) for value in values)})", dialect="duckdb")
+    cast = exp.TryCast(this=value, to=data_type)
+    if "OTHER" in values:
+        return exp.Coalesce(this=cast, expressions=[exp.cast(exp.Literal.string("OTHER"), data_type)])
+    return cast
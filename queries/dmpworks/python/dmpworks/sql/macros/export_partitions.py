@@ -0,0 +1,83 @@
+import pathlib
+import posixpath
+
+from sqlglot import exp
+from sqlmesh.core.macros import macro, MacroEvaluator
+
+MANIFEST_FILE = "_manifest.jsonl"
+
+
+def export_file_name(partition: int) -> str:
+    return f"export_{partition:04d}.parquet"
+
+
+def remove_stale_exports(export_path: str, partitions: int):
+    """Delete the export_*.parquet files in export_path that this export won't write, such as those left by an export
+    with more partitions, so that readers of the directory don't pick them up. Files that will be written are
+    overwritten by their COPY, so the export is still complete if it is rendered more than once. Remote export paths,
+    such as S3 URIs, are left as they are.
+
+    SQLMesh serialises the globals of macros, so nothing is logged here, as loggers can't be serialised.
+    """
+
+    if "://" in export_path:
+        return
+
+    expected = {export_file_name(partition) for partition in range(partitions)}
+    for file_path in pathlib.Path(export_path).glob("export_*.parquet"):
+        if file_path.name not in expected:
+            file_path.unlink()
+
+
+@macro()
+def export_partitions(
+    evaluator: MacroEvaluator,
+    table: exp.Expression,
+    export_path: exp.Expression,
+    partitions: exp.Expression,
+) -> list[str]:
+    """Copy each export partition in table to its own Parquet file in export_path, sorted by DOI, without the
+    export_partition and row_hash columns, and write MANIFEST_FILE with each file's row count, DOI range and a
+    checksum of its row hashes. The manifest is also left in the export_manifest temp table.
+
+    A COPY to a single file is used for each partition, as DuckDB doesn't keep the order of the rows when a COPY
+    writes multiple files, either with PARTITION_BY or FILE_SIZE_BYTES. Export files from earlier exports that this
+    export doesn't write are deleted first. Only runs when the model is evaluated.
+    """
+
+    if evaluator.runtime_stage != "evaluating":
+        return []
+
+    table = table.sql(dialect="duckdb")
+    export_path = export_path.name
+    partitions = int(partitions.name)
+    remove_stale_exports(export_path, partitions)
+
+    manifest = (
+        "CREATE OR REPLACE TEMP TABLE export_manifest AS "
+        "SELECT "
+        "'export_' || lpad(CAST(partitions.export_partition AS VARCHAR), 4, '0') || '.parquet' AS file_name, "
+        "partitions.export_partition, "
+        "COALESCE(stats.row_count, 0) AS row_count, "
+        "stats.min_doi, "
+        "stats.max_doi, "
+        "COALESCE(stats.checksum, md5('')) AS checksum "
+        f"FROM (SELECT range AS export_partition FROM range({partitions})) AS partitions "
+        "LEFT JOIN ("
+        "SELECT export_partition, COUNT(*) AS row_count, MIN(doi) AS min_doi, MAX(doi) AS max_doi, "
+        "md5(string_agg(row_hash, '' ORDER BY doi)) AS checksum "
+        f"FROM {table} GROUP BY export_partition"
+        ") AS stats ON partitions.export_partition = stats.export_partition "
+        "ORDER BY partitions.export_partition"
+    )
+    copies = [
+        f"COPY (SELECT * EXCLUDE (export_partition, row_hash) FROM {table} "
+        f"WHERE export_partition = {partition} ORDER BY doi) "
+        f"TO '{posixpath.join(export_path, export_file_name(partition))}' (FORMAT PARQUET)"
+        for partition in range(partitions)
+    ]
+    return [
+        manifest,
+        *copies,
+        f"COPY export_manifest TO '{posixpath.join(export_path, MANIFEST_FILE)}' (FORMAT JSON)",
+    ]
@@ -0,0 +1,12 @@
+import posixpath
+
+from sqlglot import exp
+from sqlmesh.core.macros import macro, MacroEvaluator
+
+
+@macro()
+def path_join(evaluator: MacroEvaluator, *paths: exp.Expression) -> exp.Literal:
+    """Join paths, e.g. COPY ... TO @path_join(@VAR('export_path'), 'file.parquet'), as DuckDB's COPY ... TO only
+    accepts a string literal."""
+
+    return exp.Literal.string(posixpath.join(*(path.name for path in paths)))
@@ -0,0 +1,46 @@
+import json
+import os
+from typing import Optional
+
+from sqlglot import exp
+from sqlmesh.core.macros import macro, MacroEvaluator
+
+# Set by dmpworks.sql.commands.run_plan when autotune is enabled, see dmpworks.sql.resources
+SETTINGS_FILE_ENV = "DMPWORKS_SQLMESH_RESOURCE_SETTINGS"
+
+# Set by dmpworks.sql.commands.run_plan to the number of models that may be evaluated concurrently
+CONCURRENT_TASKS_ENV = "DMPWORKS_SQLMESH_CONCURRENT_TASKS"
+
+
+@macro()
+def resource_settings(evaluator: MacroEvaluator, threads: exp.Expression) -> Optional[list[str]]:
+    """Set the DuckDB threads and memory limit used to evaluate a model.
+
+    By default only the threads are set, from the model's threads variable. When the settings file chosen from the
+    resource history of previous runs is given, the model's settings are read from it at evaluation time, so that
+    changing them doesn't change the model's fingerprint. The temp directory is set once for the whole run by run_plan,
+    as DuckDB can't switch it once a model has spilled to it.
+
+    DuckDB's settings are global to the database, so when models are evaluated concurrently nothing is set, and the
+    models share the threads and memory limit that run_plan sets for the whole run.
+    """
+
+    threads = int(threads.name)
+    concurrent_tasks = int(os.environ.get(CONCURRENT_TASKS_ENV, "1"))
+    if evaluator.runtime_stage == "evaluating" and concurrent_tasks > 1:
+        return None
+
+    path = os.environ.get(SETTINGS_FILE_ENV)
+    snapshot = evaluator.locals.get("snapshot")
+    if evaluator.runtime_stage != "evaluating" or not path or snapshot is None:
+        return [f"PRAGMA threads={threads}"]
+
+    with open(path) as f:
+        settings_file = json.load(f)
+
+    # Every setting is set for every model, so that settings don't carry over from the previous model
+    settings = settings_file["models"].get(snapshot.name, settings_file["default"])
+    return [
+        f"SET threads = {settings.get('threads', threads)}",
+        f"SET memory_limit = '{settings['memory_limit_gb']}GiB'",
+    ]
@@ -0,0 +1,31 @@
+import json
+import os
+import posixpath
+
+from sqlglot import exp
+from sqlmesh.core.macros import macro, MacroEvaluator
+
+# Set by dmpworks.sql.commands.run_plan when the source datasets are read from other locations, such as S3
+SOURCE_PATHS_ENV = "DMPWORKS_SQLMESH_SOURCE_PATHS"
+
+
+@macro()
+def source_path(
+    evaluator: MacroEvaluator,
+    dataset: exp.Expression,
+    path: exp.Expression,
+    pattern: exp.Expression,
+) -> exp.Literal:
+    """Join a file pattern to the path of a source dataset's Parquet files, e.g.
+    read_parquet(@source_path('ror', @VAR('ror_path'), 'ror.parquet')).
+
+    When a location is given for the dataset in the source paths environment variable, such as an S3 URI, the files
+    are read from there instead. The location is read when the query is rendered rather than from a SQLMesh variable,
+    so that changing it doesn't change the model's fingerprint, which would cause a full rebuild of a database from a
+    previous run. As a result, SQLMesh doesn't re-create the views of the source models when the location changes, so
+    dmpworks.sql.commands.run_plan re-creates them on every run, see refresh_source_views.
+    """
+
+    source_paths = json.loads(os.environ.get(SOURCE_PATHS_ENV, "{}"))
+    location = source_paths.get(dataset.name, path.name)
+    return exp.Literal.string(posixpath.join(location, pattern.name))
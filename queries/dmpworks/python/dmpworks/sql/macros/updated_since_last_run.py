@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from sqlglot import exp
+from sqlmesh.core.macros import macro, MacroEvaluator
+from sqlmesh.utils.date import to_datetime
+
+
+@macro()
+def updated_since_last_run(evaluator: MacroEvaluator, column: exp.Expression) -> exp.Expression:
+    """Filter for rows updated since the model was last evaluated, less incremental_index_lookback_days.
+
+    The lookback covers records that were updated after a dataset's release date but before the previous run. When
+    the model hasn't been evaluated before, e.g. on the first run or after a restatement, every row is kept.
+    """
+
+    snapshot = evaluator.locals.get("snapshot")
+    if snapshot is None or not snapshot.intervals:
+        return exp.true()
+
+    last_run_end = to_datetime(snapshot.intervals[-1][1])
+    updated_since = last_run_end - timedelta(days=int(evaluator.var("incremental_index_lookback_days")))
+    return exp.GTE(
+        this=column,
+        expression=exp.cast(
+            exp.Literal.string(updated_since.strftime("%Y-%m-%d %H:%M:%S")), exp.DataType.Type.TIMESTAMP
+        ),
+    )
@@ -1,13 +1,24 @@
+/*
+  crossref_index.works_metadata:
+
+  The title and abstract lengths and updated date of the Crossref Metadata
+  works that are indexed from OpenAlex, keyed by doi_key, see
+  works_index.doi_registry.
+*/
+
 MODEL (
   name crossref_index.works_metadata,
   dialect duckdb,
   kind FULL
 );
 
-PRAGMA threads=CAST(@VAR('default_threads') AS INT64);
+@resource_settings(@VAR('default_threads'));
 
 SELECT
-  doi,
-  LENGTH(title) AS title_length,
-  LENGTH(abstract) AS abstract_length,
-FROM crossref_metadata.works;
\ No newline at end of file
+  reg.doi_key,
+  LENGTH(cfw.title) AS title_length,
+  LENGTH(cfw.abstract) AS abstract_length,
+  cfw.updated_date
+FROM crossref_metadata.works cfw
+INNER JOIN works_index.doi_registry reg ON cfw.doi = reg.doi
+WHERE reg.in_openalex AND NOT reg.in_datacite;
@@ -1,7 +1,7 @@
 MODEL (
   name crossref_metadata.works,
   dialect duckdb,
-  kind VIEW,
+  kind @IF(@VAR('materialise_sources'), FULL, VIEW),
   audits (
     number_of_rows(threshold := CAST(@VAR('audit_crossref_metadata_works_threshold') AS INT64)),
     unique_values(columns := (doi), blocking := false),
@@ -18,7 +18,19 @@ MODEL (
   )
 );
 
-PRAGMA threads=CAST(@VAR('default_threads') AS INT64);
+@resource_settings(@VAR('default_threads'));
 
-SELECT *
-FROM read_parquet(@VAR('crossref_metadata_path') || '/crossref_works_[0-9]*.parquet');
\ No newline at end of file
+SELECT
+  doi,
+  title,
+  abstract,
+  type,
+  updated_date,
+  container_title,
+  volume,
+  issue,
+  page,
+  publisher,
+  publisher_location
+FROM read_parquet(@source_path('crossref_metadata', @VAR('crossref_metadata_path'), 'crossref_works_[0-9]*.parquet'))
+@ORDER_BY(@VAR('materialise_sources')) doi;
\ No newline at end of file
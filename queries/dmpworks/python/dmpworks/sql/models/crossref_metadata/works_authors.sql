@@ -7,7 +7,7 @@ MODEL (
   )
 );
 
-PRAGMA threads=CAST(@VAR('default_threads') AS INT64);
+@resource_settings(@VAR('default_threads'));
 
 SELECT *
-FROM read_parquet(@VAR('crossref_metadata_path') || '/crossref_works_authors_[0-9]*.parquet');
\ No newline at end of file
+FROM read_parquet(@source_path('crossref_metadata', @VAR('crossref_metadata_path'), 'crossref_works_authors_[0-9]*.parquet'));
\ No newline at end of file
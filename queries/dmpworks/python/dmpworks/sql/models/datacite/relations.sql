@@ -7,8 +7,8 @@ MODEL (
   )
 );
 
-PRAGMA threads=CAST(@VAR('default_threads') AS INT64);
+@resource_settings(@VAR('default_threads'));
 
 SELECT *
-FROM read_parquet(@VAR('datacite_path') || '/datacite_works_relations_[0-9]*.parquet');
+FROM read_parquet(@source_path('datacite', @VAR('datacite_path'), 'datacite_works_relations_[0-9]*.parquet'));
 
@@ -1,7 +1,7 @@
 MODEL (
   name datacite.works,
   dialect duckdb,
-  kind VIEW,
+  kind @IF(@VAR('materialise_sources'), FULL, VIEW),
   audits (
     number_of_rows(threshold := CAST(@VAR('audit_datacite_works_threshold') AS INT64)),
     unique_values(columns := (doi), blocking := false),
@@ -19,7 +19,18 @@ MODEL (
   )
 );
 
-PRAGMA threads=CAST(@VAR('default_threads') AS INT64);
+@resource_settings(@VAR('default_threads'));
 
-SELECT *
-FROM read_parquet(@VAR('datacite_path') || '/datacite_works_[0-9]*.parquet');
\ No newline at end of file
+SELECT
+  doi,
+  title,
+  abstract,
+  type,
+  publication_date,
+  updated_date,
+  publication_venue,
+  authors,
+  institutions,
+  funders
+FROM read_parquet(@source_path('datacite', @VAR('datacite_path'), 'datacite_works_[0-9]*.parquet'))
+@ORDER_BY(@VAR('materialise_sources')) doi;
\ No newline at end of file
@@ -2,7 +2,8 @@
   datacite_index.awards:
 
   Aggregates distinct award identifiers for DataCite works found in DataCite and
-  OpenAlex, grouped by DOI.
+  OpenAlex, grouped by DOI. Each award carries the canonical keys of the NIH and
+  NSF award IDs parsed from it, see openalex_index.awards.
 */
 
 MODEL (
@@ -10,35 +11,37 @@ MODEL (
   dialect duckdb,
   kind FULL,
   audits (
-    unique_values(columns := (doi))
+    unique_values(columns := (doi_key))
   ),
   enabled true
 );
 
-PRAGMA threads=CAST(@VAR('default_threads') AS INT64);
+@resource_settings(@VAR('default_threads'));
 
 WITH award_ids AS (
   SELECT
-    doi,
-    @array_agg_distinct(award_id) AS award_ids,
+    doi_key,
+    award_id,
+    list_sort(list_distinct(flatten(list(award_keys)))) AS award_keys
   FROM (
     -- DataCite
-    SELECT doi, funder.award_number AS award_id
+    SELECT doi_key, funder.award_number AS award_id, list_transform(funder.awards, x -> x.key) AS award_keys
     FROM datacite_index.works, UNNEST(funders) AS item(funder)
     WHERE funder.award_number IS NOT NULL
 
     UNION ALL
 
     -- OpenAlex
-    SELECT dw.doi, fund.award_id
+    SELECT dw.doi_key, fund.award_id, list_transform(fund.awards, x -> x.key) AS award_keys
     FROM datacite_index.works dw
-    INNER JOIN openalex.works ow ON dw.doi = ow.doi, UNNEST(ow.grants) AS item(fund)
+    INNER JOIN openalex.works_grants fund ON dw.doi = fund.work_doi
     WHERE fund.award_id IS NOT NULL
   )
-  GROUP BY doi
+  GROUP BY doi_key, award_id
 )
 
 SELECT
-  award_ids.doi,
-  list_transform(award_ids.award_ids, x -> {'award_id': x}) AS awards
+  doi_key,
+  list({'award_id': award_id, 'award_keys': award_keys} ORDER BY LOWER(award_id)) AS awards
 FROM award_ids
+GROUP BY doi_key
@@ -1,26 +1,30 @@
 /*
   datacite_index.datacite_index:
 
-  Creates the DataCite index table.
+  Creates the DataCite index table. The datacite_index models are joined on
+  doi_key, see works_index.doi_registry. When incremental_index is enabled, only
+  the DOIs in works_index.updated_dois are rebuilt and merged into the table.
 */
 
 MODEL (
   name datacite_index.datacite_index,
   dialect duckdb,
-  kind FULL,
+  kind INCREMENTAL_BY_UNIQUE_KEY (
+    unique_key doi
+  ),
   audits (
     unique_values(columns := (doi))
   ),
   enabled true
 );
 
-PRAGMA threads=CAST(@VAR('default_threads') AS INT64);
+@resource_settings(@VAR('default_threads'));
 
 SELECT
   dw.doi,
   dw.title,
   dw.abstract AS abstract_text,
-  COALESCE(datacite_index.types.type, 'OTHER') AS work_type,
+  @enum_cast(datacite_index.types.type, work_type) AS work_type,
   dw.publication_date,
   datacite_index.updated_dates.updated_date,
   dw.publication_venue,
@@ -28,10 +32,10 @@ SELECT
   dw.authors,
   COALESCE(datacite_index.funders.funders, []) AS funders,
   COALESCE(datacite_index.awards.awards, []) AS awards,
-  {name := 'DataCite', url := 'https://commons.datacite.org/doi.org/' || dw.doi} AS source
+  {name := @enum_cast('DataCite', source_name), url := 'https://commons.datacite.org/doi.org/' || dw.doi} AS source
 FROM datacite_index.works dw
-LEFT JOIN datacite_index.types ON dw.doi = datacite_index.types.doi
-LEFT JOIN datacite_index.updated_dates ON dw.doi = datacite_index.updated_dates.doi
-LEFT JOIN datacite_index.institutions ON dw.doi = datacite_index.institutions.doi
-LEFT JOIN datacite_index.funders ON dw.doi = datacite_index.funders.doi
-LEFT JOIN datacite_index.awards ON dw.doi = datacite_index.awards.doi
+LEFT JOIN datacite_index.types ON dw.doi_key = datacite_index.types.doi_key
+LEFT JOIN datacite_index.updated_dates ON dw.doi_key = datacite_index.updated_dates.doi_key
+LEFT JOIN datacite_index.institutions ON dw.doi_key = datacite_index.institutions.doi_key
+LEFT JOIN datacite_index.funders ON dw.doi_key = datacite_index.funders.doi_key
+LEFT JOIN datacite_index.awards ON dw.doi_key = datacite_index.awards.doi_key
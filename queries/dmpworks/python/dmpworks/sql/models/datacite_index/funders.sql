@@ -11,15 +11,15 @@ MODEL (
   dialect duckdb,
   kind FULL,
   audits (
-    unique_values(columns := (doi))
+    unique_values(columns := (doi_key))
   ),
   enabled true
 );
 
-PRAGMA threads=CAST(@VAR('default_threads') AS INT64);
+@resource_settings(@VAR('default_threads'));
 
 SELECT
-  doi,
+  dw.doi_key,
   array_agg(
     {
       'name': funder.funder_name,
@@ -28,4 +28,4 @@ SELECT
   ) AS funders
 FROM datacite_index.works AS dw, UNNEST(dw.funders) WITH ORDINALITY AS item(funder, pos)
 LEFT JOIN ror.index ON funder.funder_identifier = ror.index.identifier
-GROUP BY dw.doi;
+GROUP BY dw.doi_key;
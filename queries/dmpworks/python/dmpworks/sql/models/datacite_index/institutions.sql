@@ -12,15 +12,15 @@ MODEL (
   dialect duckdb,
   kind FULL,
   audits (
-    unique_values(columns := (doi))
+    unique_values(columns := (doi_key))
   ),
   enabled true
 );
 
-PRAGMA threads=CAST(@VAR('default_threads') AS INT64);
+@resource_settings(@VAR('default_threads'));
 
 SELECT
-  doi,
+  dw.doi_key,
   array_agg(
     {
       'name': inst.name,
@@ -29,4 +29,4 @@ SELECT
   ) AS institutions
 FROM datacite_index.works AS dw, UNNEST(dw.institutions) WITH ORDINALITY AS item(inst, pos)
 LEFT JOIN ror.index ON inst.affiliation_identifier = ror.index.identifier
-GROUP BY dw.doi;
+GROUP BY dw.doi_key;
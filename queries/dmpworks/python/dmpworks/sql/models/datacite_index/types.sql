@@ -2,7 +2,7 @@
   datacite_index.types:
 
   Consolidates DataCite types into a set of types more compatible with OpenAlex
-  types.
+  types. The types are stored as the work_type ENUM, see macros/enum_cast.py.
 */
 
 MODEL (
@@ -10,12 +10,12 @@ MODEL (
   dialect duckdb,
   kind FULL,
   audits (
-    unique_values(columns := (doi))
+    unique_values(columns := (doi_key))
   ),
   enabled true
 );
 
-PRAGMA threads=CAST(@VAR('default_threads') AS INT64);
+@resource_settings(@VAR('default_threads'));
 
  -- Mapping table to normalise DataCite types
 WITH type_map AS (
@@ -58,7 +58,7 @@ WITH type_map AS (
 )
 
 SELECT
-  doi,
-  type_map.normalized_type AS type
+  dw.doi_key,
+  @enum_cast(type_map.normalized_type, work_type) AS type
 FROM datacite_index.works dw
 INNER JOIN type_map ON dw.type = type_map.original_type;
\ No newline at end of file
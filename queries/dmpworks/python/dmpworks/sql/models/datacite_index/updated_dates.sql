@@ -9,26 +9,27 @@ MODEL (
   dialect duckdb,
   kind FULL,
   audits (
-    unique_values(columns := (doi))
+    unique_values(columns := (doi_key))
   ),
   enabled true,
 );
 
-PRAGMA threads=CAST(@VAR('default_threads') AS INT64);
+@resource_settings(@VAR('default_threads'));
 
 -- Choose the most recent updated date from DataCite and OpenAlex
 SELECT
-  doi,
+  doi_key,
   MAX(updated_date) AS updated_date
 FROM (
-  SELECT doi, updated_date
+  SELECT doi_key, updated_date
   FROM datacite_index.works
   WHERE updated_date IS NOT NULL
 
   UNION ALL
 
-  SELECT doi, updated_date
-  FROM openalex.works
-  WHERE doi IS NOT NULL AND updated_date IS NOT NULL
+  SELECT reg.doi_key, oaw.updated_date
+  FROM openalex.works oaw
+  INNER JOIN works_index.doi_registry reg ON oaw.doi = reg.doi
+  WHERE reg.in_datacite AND oaw.updated_date IS NOT NULL
 )
-GROUP BY doi;
\ No newline at end of file
+GROUP BY doi_key;
\ No newline at end of file
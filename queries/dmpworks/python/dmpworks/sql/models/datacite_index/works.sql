@@ -4,6 +4,8 @@
   The DataCite data file contains a small number of duplicate records, so we
   pick the record with the most recent update date. QUALIFY allows us to filter
   on a window function: https://duckdb.org/docs/stable/sql/query_syntax/qualify.html.
+  Each work is given the doi_key of its DOI, which the datacite_index models are
+  joined on, see works_index.doi_registry.
 */
 
 MODEL (
@@ -16,8 +18,11 @@ MODEL (
   enabled true
 );
 
-PRAGMA threads=CAST(@VAR('default_threads') AS INT64);
+@resource_settings(@VAR('default_threads'));
 
-SELECT works.*
+SELECT
+  reg.doi_key,
+  works.*
 FROM datacite.works works
-QUALIFY ROW_NUMBER() OVER (PARTITION BY doi ORDER BY updated_date DESC NULLS LAST) = 1;
+INNER JOIN works_index.doi_registry reg ON works.doi = reg.doi
+QUALIFY ROW_NUMBER() OVER (PARTITION BY reg.doi_key ORDER BY works.updated_date DESC NULLS LAST) = 1;
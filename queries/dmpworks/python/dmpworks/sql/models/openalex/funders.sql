@@ -7,7 +7,7 @@ MODEL (
   )
 );
 
-PRAGMA threads=CAST(@VAR('default_threads') AS INT64);
+@resource_settings(@VAR('default_threads'));
 
 SELECT *
-FROM read_parquet(@VAR('openalex_funders_path') || '/openalex_funders_[0-9]*.parquet');
+FROM read_parquet(@source_path('openalex_funders', @VAR('openalex_funders_path'), 'openalex_funders_[0-9]*.parquet'));
@@ -1,7 +1,7 @@
 MODEL (
   name openalex.works,
   dialect duckdb,
-  kind VIEW,
+  kind @IF(@VAR('materialise_sources'), FULL, VIEW),
   audits (
     number_of_rows(threshold := CAST(@VAR('audit_openalex_works_threshold') AS INT64)),
     unique_values(columns := (id), blocking := false),
@@ -17,7 +17,19 @@ MODEL (
   )
 );
 
-PRAGMA threads=CAST(@VAR('default_threads') AS INT64);
+@resource_settings(@VAR('default_threads'));
 
-SELECT *
-FROM read_parquet(@VAR('openalex_works_path') || '/openalex_works_[0-9]*.parquet');
\ No newline at end of file
+SELECT
+  id,
+  doi,
+  ids,
+  title,
+  abstract,
+  type,
+  publication_date,
+  updated_date,
+  publication_venue,
+  authors,
+  institutions
+FROM read_parquet(@source_path('openalex_works', @VAR('openalex_works_path'), 'openalex_works_[0-9]*.parquet'))
+@ORDER_BY(@VAR('materialise_sources')) doi;
\ No newline at end of file
@@ -0,0 +1,13 @@
+MODEL (
+  name openalex.works_institutions,
+  dialect duckdb,
+  kind VIEW,
+  audits (
+    number_of_rows(threshold := 1),
+  )
+);
+
+@resource_settings(@VAR('default_threads'));
+
+SELECT *
+FROM read_parquet(@source_path('openalex_works', @VAR('openalex_works_path'), 'openalex_works_institutions_[0-9]*.parquet'));
\ No newline at end of file
@@ -1,5 +1,5 @@
 /*
-  openalex_index.titles:
+  openalex_index.abstracts:
 
   Chooses the longest abstract for each DOI from OpenAlex and Crossref Metadata.
 */
@@ -9,21 +9,21 @@ MODEL (
   dialect duckdb,
   kind FULL,
   audits (
-    unique_values(columns := (doi))
+    unique_values(columns := (doi_key))
   ),
   enabled true
 );
 
-PRAGMA threads=CAST(@VAR('openalex_index_abstracts_threads') AS INT64);
+@resource_settings(@VAR('openalex_index_abstracts_threads'));
 
 SELECT
-  stats.doi,
+  br.doi_key,
   CASE
-    WHEN cwm.abstract_length > stats.abstract_length THEN cfw.abstract
-    WHEN cwm.abstract_length IS NOT NULL AND stats.abstract_length IS NULL THEN cfw.abstract
+    WHEN br.crossref_abstract_length > br.abstract_length THEN cfw.abstract
+    WHEN br.crossref_abstract_length IS NOT NULL AND br.abstract_length IS NULL THEN cfw.abstract
     ELSE oaw.abstract
   END AS abstract
-FROM openalex_index.abstract_stats AS stats
-LEFT JOIN openalex.works oaw ON stats.id = oaw.id
-LEFT JOIN crossref_index.works_metadata cwm ON stats.doi = cwm.doi
-LEFT JOIN crossref_metadata.works cfw ON stats.doi = cfw.doi;
+FROM openalex_index.best_records AS br
+LEFT JOIN openalex.works oaw ON br.abstract_id = oaw.id
+LEFT JOIN crossref_metadata.works cfw ON br.doi = cfw.doi
+WHERE br.has_abstract;
@@ -5,6 +5,10 @@
   Metadata work, grouped by DOI. Grouping by DOI also handles cases where
   multiple OpenAlex records share the same DOI. DataCite works are excluded via
   openalex_index.works_metadata.
+
+  Each award carries the canonical keys of the NIH and NSF award IDs parsed from
+  it in the transform step, e.g. nih:ai176039, so that DMP awards can be matched
+  with a single terms query rather than one query per award ID variant.
 */
 
 MODEL (
@@ -12,36 +16,38 @@ MODEL (
   dialect duckdb,
   kind FULL,
   audits (
-    unique_values(columns := (doi))
+    unique_values(columns := (doi_key))
   ),
   enabled true
 );
 
-PRAGMA threads=CAST(@VAR('default_threads') AS INT64);
+@resource_settings(@VAR('default_threads'));
 
 WITH award_ids AS (
   SELECT
-    doi,
-    @array_agg_distinct(award_id) AS award_ids
+    doi_key,
+    award_id,
+    list_sort(list_distinct(flatten(list(award_keys)))) AS award_keys
   FROM (
     -- OpenAlex
-    SELECT owm.id, owm.doi, grnt.award_id
+    SELECT owm.doi_key, grnt.award_id, list_transform(grnt.awards, x -> x.key) AS award_keys
     FROM openalex_index.works_metadata AS owm
-    INNER JOIN openalex.works works ON owm.id = works.id, UNNEST(works.grants) AS item(grnt)
+    INNER JOIN openalex.works_grants grnt ON owm.id = grnt.work_id
     WHERE grnt.award_id IS NOT NULL
 
     UNION ALL
 
     -- Crossref Metadata
-    SELECT owm.id, owm.doi, award AS award_id
+    SELECT owm.doi_key, award AS award_id, list_transform(awards, x -> x.key) AS award_keys
     FROM openalex_index.works_metadata AS owm
     INNER JOIN crossref_metadata.works_funders ON owm.doi = work_doi
     WHERE award IS NOT NULL
   )
-  GROUP BY doi
+  GROUP BY doi_key, award_id
 )
 
 SELECT
-  award_ids.doi,
-  list_transform(award_ids.award_ids, x -> {'award_id': x}) AS awards
+  doi_key,
+  list({'award_id': award_id, 'award_keys': award_keys} ORDER BY LOWER(award_id)) AS awards
 FROM award_ids
+GROUP BY doi_key
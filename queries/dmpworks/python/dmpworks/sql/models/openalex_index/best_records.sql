@@ -0,0 +1,87 @@
+/*
+  openalex_index.best_records:
+
+  Chooses the best OpenAlex record for each unique DOI in a single pass over
+  openalex_index.works_metadata. DataCite works are excluded in
+  openalex_index.works_metadata. For DOIs shared by several OpenAlex works, the
+  work with the longest title is chosen as the title record and the work with
+  the longest abstract as the abstract record, falling back to the work with the
+  smallest id when none of them have a title or abstract. The Crossref Metadata
+  title and abstract lengths are included, so that openalex_index.titles and
+  openalex_index.abstracts can check Crossref Metadata for more suitable titles
+  and abstracts. has_title and has_abstract are false when neither OpenAlex nor
+  Crossref Metadata have a title or abstract for the DOI.
+
+  The updated_date is the most recent updated_date for the DOI from OpenAlex and
+  Crossref Metadata. Records are keyed by doi_key, see works_index.doi_registry,
+  the DOI is kept for looking up Crossref Metadata titles and abstracts.
+*/
+
+MODEL (
+  name openalex_index.best_records,
+  dialect duckdb,
+  kind FULL,
+  audits (
+    unique_values(columns := (doi_key))
+  ),
+  enabled true
+);
+
+@resource_settings(@VAR('default_threads'));
+
+-- Choose the OpenAlex records for each DOI first, so that Crossref Metadata is only joined once per DOI. Only the
+-- works with duplicate DOIs need to be aggregated
+WITH openalex_works AS (
+  SELECT
+    owm.id,
+    owm.doi_key,
+    owm.doi,
+    owm.title_length,
+    owm.abstract_length,
+    owm.is_duplicate,
+    oaw.updated_date
+  FROM openalex_index.works_metadata owm
+  LEFT JOIN openalex.works oaw ON owm.id = oaw.id
+),
+
+openalex_records AS (
+  SELECT
+    doi_key,
+    ANY_VALUE(doi) AS doi,
+    COALESCE(ARG_MAX(id, title_length), MIN(id)) AS title_id,
+    MAX(title_length) AS title_length,
+    COALESCE(ARG_MAX(id, abstract_length), MIN(id)) AS abstract_id,
+    MAX(abstract_length) AS abstract_length,
+    MAX(updated_date) AS updated_date
+  FROM openalex_works
+  WHERE is_duplicate = TRUE
+  GROUP BY doi_key
+
+  UNION ALL
+
+  SELECT
+    doi_key,
+    doi,
+    id AS title_id,
+    title_length,
+    id AS abstract_id,
+    abstract_length,
+    updated_date
+  FROM openalex_works
+  WHERE is_duplicate = FALSE
+)
+
+SELECT
+  oar.doi_key,
+  oar.doi,
+  oar.title_id,
+  oar.title_length,
+  cwm.title_length AS crossref_title_length,
+  COALESCE(oar.title_length > 0 OR cwm.title_length > 0, FALSE) AS has_title,
+  oar.abstract_id,
+  oar.abstract_length,
+  cwm.abstract_length AS crossref_abstract_length,
+  COALESCE(oar.abstract_length > 0 OR cwm.abstract_length > 0, FALSE) AS has_abstract,
+  GREATEST(oar.updated_date, cwm.updated_date) AS updated_date
+FROM openalex_records oar
+LEFT JOIN crossref_index.works_metadata cwm ON oar.doi_key = cwm.doi_key;
@@ -2,8 +2,8 @@
   openalex_index.funder_ids:
 
   Creates a list of funders for each OpenAlex DOI. Converts OpenAlex funder IDs
-  to ROR IDs. The order of the funders is maintained through WITH ORDINALITY
-  and sorting on pos.
+  to ROR IDs. The order of the funders is maintained by sorting on the pos
+  column of openalex.works_grants.
 */
 
 MODEL (
@@ -11,24 +11,24 @@ MODEL (
   dialect duckdb,
   kind FULL,
   audits (
-    unique_values(columns := (id, doi))
+    unique_values(columns := (id, doi_key))
   ),
   enabled true
 );
 
-PRAGMA threads=CAST(@VAR('default_threads') AS INT64);
+@resource_settings(@VAR('default_threads'));
 
 SELECT
   owm.id,
-  owm.doi,
+  owm.doi_key,
   array_agg(
     {
       'name': grnt.funder_display_name,
       'ror': funders.ids.ror
-    } ORDER BY pos
+    } ORDER BY grnt.pos
   ) AS funders
 FROM openalex_index.works_metadata AS owm
-LEFT JOIN openalex.works works ON owm.id = works.id, UNNEST(works.grants) WITH ORDINALITY AS item(grnt, pos)
+INNER JOIN openalex.works_grants grnt ON owm.id = grnt.work_id
 LEFT JOIN openalex.funders funders ON grnt.funder_id = funders.id
 WHERE owm.is_primary_doi = TRUE
-GROUP BY owm.id, owm.doi
+GROUP BY owm.id, owm.doi_key
@@ -1,41 +1,52 @@
 /*
   openalex_index.openalex_index:
 
-  Creates the OpenAlex index table.
+  Creates the OpenAlex index table. The openalex_index models are joined on
+  doi_key, see works_index.doi_registry, and the DOIs are taken from
+  openalex_index.works_metadata. When incremental_index is enabled, only the
+  DOIs in works_index.updated_dois are rebuilt and merged into the table, and
+  works that are now found in DataCite are removed.
 */
 
 MODEL (
   name openalex_index.openalex_index,
   dialect duckdb,
-  kind FULL,
+  kind INCREMENTAL_BY_UNIQUE_KEY (
+    unique_key doi
+  ),
+  depends_on (datacite_index.works), -- used by the post-statement
   audits (
     unique_values(columns := (doi))
   ),
   enabled true
 );
 
-PRAGMA threads=CAST(@VAR('openalex_index_openalex_index_threads') AS INT64);
+@resource_settings(@VAR('openalex_index_openalex_index_threads'));
 
 
 SELECT
-  works.doi,
+  owm.doi,
   openalex_index.titles.title,
   openalex_index.abstracts.abstract AS abstract_text,
-  COALESCE(UPPER(REPLACE(works.type, '-', '_')), 'OTHER') AS work_type,
+  @enum_cast(UPPER(REPLACE(works.type, '-', '_')), work_type) AS work_type,
   works.publication_date,
-  openalex_index.updated_dates.updated_date,
+  openalex_index.best_records.updated_date,
   works.publication_venue,
   works.institutions,
   works.authors,
   COALESCE(openalex_index.funders.funders, []) AS funders,
   COALESCE(openalex_index.awards.awards, []) AS awards,
-  {name := 'OpenAlex', url := 'https://openalex.org/works/' || owm.id} AS source
+  {name := @enum_cast('OpenAlex', source_name), url := 'https://openalex.org/works/' || owm.id} AS source
 FROM openalex_index.works_metadata AS owm
 LEFT JOIN openalex.works works ON owm.id = works.id
-LEFT JOIN openalex_index.titles ON owm.doi = openalex_index.titles.doi
-LEFT JOIN openalex_index.abstracts ON owm.doi = openalex_index.abstracts.doi
-LEFT JOIN openalex_index.updated_dates ON owm.doi = openalex_index.updated_dates.doi
-LEFT JOIN openalex_index.awards ON owm.doi = openalex_index.awards.doi
+LEFT JOIN openalex_index.titles ON owm.doi_key = openalex_index.titles.doi_key
+LEFT JOIN openalex_index.abstracts ON owm.doi_key = openalex_index.abstracts.doi_key
+LEFT JOIN openalex_index.best_records ON owm.doi_key = openalex_index.best_records.doi_key
+LEFT JOIN openalex_index.awards ON owm.doi_key = openalex_index.awards.doi_key
 LEFT JOIN openalex_index.funders ON owm.id = openalex_index.funders.id
-WHERE owm.is_primary_doi = TRUE
+WHERE owm.is_primary_doi = TRUE;
 
+@IF(
+  @runtime_stage = 'evaluating' AND @VAR('incremental_index'),
+  DELETE FROM @this_model WHERE doi IN (SELECT doi FROM datacite_index.works)
+);
@@ -9,21 +9,21 @@ MODEL (
   dialect duckdb,
   kind FULL,
   audits (
-    unique_values(columns := (doi))
+    unique_values(columns := (doi_key))
   ),
   enabled true
 );
 
-PRAGMA threads=CAST(@VAR('openalex_index_titles_threads') AS INT64);
+@resource_settings(@VAR('openalex_index_titles_threads'));
 
 SELECT
-  stats.doi,
+  br.doi_key,
   CASE
-    WHEN cwm.title_length > stats.title_length THEN cfw.title
-    WHEN cwm.title_length IS NOT NULL AND stats.title_length IS NULL THEN cfw.title
+    WHEN br.crossref_title_length > br.title_length THEN cfw.title
+    WHEN br.crossref_title_length IS NOT NULL AND br.title_length IS NULL THEN cfw.title
     ELSE oaw.title
   END AS title
-FROM openalex_index.title_stats AS stats
-LEFT JOIN openalex.works oaw ON stats.id = oaw.id
-LEFT JOIN crossref_index.works_metadata cwm ON stats.doi = cwm.doi
-LEFT JOIN crossref_metadata.works cfw ON stats.doi = cfw.doi;
+FROM openalex_index.best_records AS br
+LEFT JOIN openalex.works oaw ON br.title_id = oaw.id
+LEFT JOIN crossref_metadata.works cfw ON br.doi = cfw.doi
+WHERE br.has_title;
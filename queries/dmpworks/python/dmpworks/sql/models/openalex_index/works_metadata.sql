@@ -9,7 +9,8 @@
   share the same DOI (the work with the most metadata).
 
   This table is used by downstream queries as the leftmost table in joins, so
-  that non-DataCite OpenAlex works are used in further processing.
+  that non-DataCite OpenAlex works are used in further processing. Works are
+  joined and grouped on doi_key, see works_index.doi_registry.
 */
 
 MODEL (
@@ -19,16 +20,18 @@ MODEL (
   enabled true
 );
 
-PRAGMA threads=CAST(@VAR('default_threads') AS INT64);
+@resource_settings(@VAR('default_threads'));
 
 -- Remove works that can be found in DataCite
 -- And works without DOIs
 WITH base AS (
   SELECT
-    id,
-    doi
+    oaw.id,
+    reg.doi_key,
+    oaw.doi
   FROM openalex.works oaw
-  WHERE doi IS NOT NULL AND NOT EXISTS (SELECT 1 FROM datacite.works WHERE oaw.doi = datacite.works.doi)
+  INNER JOIN works_index.doi_registry reg ON oaw.doi = reg.doi
+  WHERE NOT reg.in_datacite
 ),
 
 -- Count how many unique ORCID IDs per work
@@ -37,7 +40,7 @@ orcid_counts AS (
     base.id,
     COUNT(DISTINCT author.orcid) AS orcid_count
   FROM base
-  LEFT JOIN openalex.works ow ON base.id = ow.id, UNNEST(ow.authors) AS item(author)
+  INNER JOIN openalex.works_authors author ON base.id = author.work_id
   WHERE author.orcid IS NOT NULL
   GROUP BY base.id
 ),
@@ -49,7 +52,7 @@ grant_counts AS (
     COUNT(DISTINCT grnt.funder_id) AS funder_id_count,
     COUNT(DISTINCT grnt.award_id) AS award_id_count
   FROM base
-  LEFT JOIN openalex.works ow ON base.id = ow.id, UNNEST(ow.grants) AS item(grnt)
+  INNER JOIN openalex.works_grants grnt ON base.id = grnt.work_id
   GROUP BY base.id
 ),
 
@@ -59,7 +62,7 @@ inst_id_counts AS (
     base.id,
     COUNT(DISTINCT inst.ror) AS inst_id_count
   FROM base
-  LEFT JOIN openalex.works ow ON base.id = ow.id, UNNEST(ow.institutions) AS item(inst)
+  INNER JOIN openalex.works_institutions inst ON base.id = inst.work_id
   WHERE inst.ror IS NOT NULL
   GROUP BY base.id
 ),
@@ -67,16 +70,16 @@ inst_id_counts AS (
 -- Count how many instances of each DOI
 doi_counts AS (
   SELECT
-    doi,
+    doi_key,
     COUNT(*) AS doi_count
   FROM base
-  GROUP BY doi
+  GROUP BY doi_key
 ),
 
 counts AS (
   SELECT
     base.id,
-    base.doi,
+    base.doi_key,
     dc.doi_count,
     ((CASE WHEN ow.ids.mag IS NOT NULL THEN 1 ELSE 0 END) + (CASE WHEN ow.ids.pmid IS NOT NULL THEN 1 ELSE 0 END) + (CASE WHEN ow.ids.pmcid IS NOT NULL THEN 1 ELSE 0 END)) AS id_count,
     COALESCE(oc.orcid_count, 0) AS orcid_count,
@@ -84,7 +87,7 @@ counts AS (
     COALESCE(gc.award_id_count, 0) AS award_id_count,
     COALESCE(ic.inst_id_count, 0) AS inst_id_count
   FROM base
-  LEFT JOIN doi_counts dc ON base.doi = dc.doi
+  LEFT JOIN doi_counts dc ON base.doi_key = dc.doi_key
   LEFT JOIN openalex.works ow ON base.id = ow.id
   LEFT JOIN orcid_counts AS oc ON ow.id = oc.id
   LEFT JOIN grant_counts AS gc ON ow.id = gc.id
@@ -96,7 +99,7 @@ ranked_works AS (
     *,
     (id_count + orcid_count + funder_id_count + award_id_count + inst_id_count) AS total_count,
     ROW_NUMBER() OVER(
-      PARTITION BY doi
+      PARTITION BY doi_key
       ORDER BY (id_count + orcid_count + funder_id_count + award_id_count + inst_id_count) DESC, id
     ) AS doi_rank
   FROM counts
@@ -104,6 +107,7 @@ ranked_works AS (
 
 SELECT
   base.id,
+  base.doi_key,
   base.doi,
   LENGTH(oaw.title) AS title_length,
   LENGTH(oaw.abstract) AS abstract_length,
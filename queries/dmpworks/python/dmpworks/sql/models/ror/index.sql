@@ -7,9 +7,9 @@ MODEL (
   )
 );
 
-PRAGMA threads=CAST(@VAR('default_threads') AS INT64);
+@resource_settings(@VAR('default_threads'));
 
 SELECT *
-FROM read_parquet(@VAR('ror_path') || '/ror.parquet');
+FROM read_parquet(@source_path('ror', @VAR('ror_path'), 'ror.parquet'));
 
 
@@ -0,0 +1,58 @@
+/*
+  works_index.doi_registry:
+
+  Assigns each DOI found in OpenAlex or DataCite a dense integer key, doi_key,
+  and records which sources it was found in. The *_index models join on doi_key
+  rather than comparing DOI strings, and only openalex_index.openalex_index and
+  datacite_index.datacite_index, the tables that are exported, contain DOIs
+  again. Keys are assigned in DOI order, but can change between runs, so they
+  must not be stored in the index tables.
+
+  Crossref Metadata is only used to add metadata to OpenAlex works, so DOIs
+  only found in Crossref Metadata aren't registered. When incremental_index is
+  enabled, only the DOIs in works_index.updated_dois are registered.
+*/
+
+MODEL (
+  name works_index.doi_registry,
+  dialect duckdb,
+  kind FULL,
+  audits (
+    unique_values(columns := (doi_key)),
+    unique_values(columns := (doi))
+  ),
+  enabled true
+);
+
+@resource_settings(@VAR('default_threads'));
+
+SELECT
+  ROW_NUMBER() OVER (ORDER BY doi) AS doi_key,
+  doi,
+  in_openalex,
+  in_crossref_metadata,
+  in_datacite
+FROM (
+  SELECT
+    doi,
+    BOOL_OR(source = 'openalex') AS in_openalex,
+    BOOL_OR(source = 'crossref_metadata') AS in_crossref_metadata,
+    BOOL_OR(source = 'datacite') AS in_datacite
+  FROM (
+    SELECT doi, 'openalex' AS source
+    FROM openalex.works
+
+    UNION ALL
+
+    SELECT doi, 'crossref_metadata' AS source
+    FROM crossref_metadata.works
+
+    UNION ALL
+
+    SELECT doi, 'datacite' AS source
+    FROM datacite.works
+  )
+  WHERE doi IS NOT NULL AND @IF(@VAR('incremental_index'), doi IN (SELECT doi FROM works_index.updated_dois), TRUE)
+  GROUP BY doi
+  HAVING in_openalex OR in_datacite
+);
@@ -3,6 +3,19 @@
 
   Exports the works index to Parquet files to the export_path specified in
   config.yaml. Updates the works_index.exports with the export date.
+
+  Works are split into export_partitions partitions by a hash of their DOI, so
+  a DOI is always exported to the same partition, and each partition is written
+  to its own file, export_0000.parquet etc, sorted by DOI. _manifest.jsonl lists
+  each file with its row count, DOI range and a checksum of its contents, so
+  that the files from two exports can be compared without reading them. Export
+  files left in export_path by an earlier export with more partitions are
+  deleted, see the export_partitions macro.
+
+  When previous_export_path is set, the works that are new or have changed
+  since that export are written to changes_path/upserts and the DOIs of the
+  works that have been removed to changes_path/deletes, so that OpenSearch can
+  be updated with only the changes, see dmpworks.opensearch.sync_works.
 */
 
 MODEL (
@@ -17,15 +30,23 @@ MODEL (
   enabled true
 );
 
-PRAGMA threads=CAST(@VAR('default_threads') AS INT64);
+@resource_settings(@VAR('default_threads'));
 
 -- Record export date
 SELECT @end_ds AS export_date;
 
 -- Export data
+-- https://sqlmesh.readthedocs.io/en/stable/concepts/macros/macro_variables/#runtime-variables
+@IF(@runtime_stage = 'evaluating', SET preserve_insertion_order = true);
+
 @IF(
-  @runtime_stage = 'evaluating', -- https://sqlmesh.readthedocs.io/en/stable/concepts/macros/macro_variables/#runtime-variables
-  COPY (
+  @runtime_stage = 'evaluating',
+  CREATE OR REPLACE TEMP TABLE export_works AS
+  SELECT
+    *,
+    md5_number_lower(doi) % CAST(@VAR('export_partitions') AS INT64) AS export_partition,
+    md5(CAST(works AS VARCHAR)) AS row_hash
+  FROM (
     SELECT
       *
     FROM datacite_index.datacite_index
@@ -35,5 +56,73 @@ SELECT @end_ds AS export_date;
     SELECT
       *
     FROM openalex_index.openalex_index
-  ) TO @VAR('export_path') (FORMAT PARQUET, OVERWRITE true, FILE_SIZE_BYTES '100MB', FILENAME_PATTERN 'export_')
-)
\ No newline at end of file
+  ) AS works
+  ORDER BY export_partition, doi
+);
+
+-- Also writes _manifest.jsonl and creates the export_manifest temp table
+@export_partitions(export_works, @VAR('export_path'), @VAR('export_partitions'));
+
+-- Export changes since the previous export. Only the files whose checksums differ from the previous export's are
+-- compared
+@IF(
+  @runtime_stage = 'evaluating' AND @VAR('previous_export_path') <> '',
+  CREATE OR REPLACE TEMP TABLE changed_files AS
+  SELECT
+    COALESCE(manifest.file_name, previous_manifest.file_name) AS file_name,
+    manifest.export_partition
+  FROM export_manifest AS manifest
+  FULL OUTER JOIN read_json(@path_join(@VAR('previous_export_path'), '_manifest.jsonl')) AS previous_manifest
+    ON manifest.file_name = previous_manifest.file_name
+  WHERE manifest.checksum IS DISTINCT FROM previous_manifest.checksum
+);
+
+@IF(
+  @runtime_stage = 'evaluating' AND @VAR('previous_export_path') <> '',
+  CREATE OR REPLACE TEMP TABLE previous_works AS
+  SELECT
+    doi,
+    md5(CAST(works AS VARCHAR)) AS row_hash
+  FROM (
+    SELECT
+      * EXCLUDE (filename)
+    FROM read_parquet(@path_join(@VAR('previous_export_path'), 'export_*.parquet'), filename = true)
+    WHERE parse_filename(filename) IN (SELECT file_name FROM changed_files)
+  ) AS works
+);
+
+@IF(
+  @runtime_stage = 'evaluating' AND @VAR('previous_export_path') <> '',
+  COPY (
+    SELECT
+      * EXCLUDE (export_partition, row_hash)
+    FROM export_works
+    WHERE
+      export_partition IN (SELECT export_partition FROM changed_files)
+      AND NOT EXISTS (
+        SELECT 1
+        FROM previous_works
+        WHERE previous_works.doi = export_works.doi AND previous_works.row_hash = export_works.row_hash
+      )
+  ) TO @path_join(@VAR('changes_path'), 'upserts') (FORMAT PARQUET, OVERWRITE true, FILE_SIZE_BYTES '100MB', FILENAME_PATTERN 'upserts_')
+);
+
+@IF(
+  @runtime_stage = 'evaluating' AND @VAR('previous_export_path') <> '',
+  COPY (
+    SELECT
+      doi
+    FROM previous_works
+    WHERE doi NOT IN (SELECT doi FROM export_works)
+  ) TO @path_join(@VAR('changes_path'), 'deletes') (FORMAT PARQUET, OVERWRITE true, FILE_SIZE_BYTES '100MB', FILENAME_PATTERN 'deletes_')
+);
+
+@IF(@runtime_stage = 'evaluating' AND @VAR('previous_export_path') <> '', DROP TABLE previous_works);
+
+@IF(@runtime_stage = 'evaluating' AND @VAR('previous_export_path') <> '', DROP TABLE changed_files);
+
+@IF(@runtime_stage = 'evaluating', DROP TABLE export_works);
+
+@IF(@runtime_stage = 'evaluating', DROP TABLE export_manifest);
+
+@IF(@runtime_stage = 'evaluating', SET preserve_insertion_order = false);
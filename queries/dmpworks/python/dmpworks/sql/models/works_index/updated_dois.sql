@@ -0,0 +1,41 @@
+/*
+  works_index.updated_dois:
+
+  The DOIs that need to be reindexed when incremental_index is enabled: those
+  that have been updated in OpenAlex, Crossref Metadata or DataCite since the
+  last run, or every DOI on the first run. The *_index models only process these
+  DOIs and openalex_index.openalex_index and datacite_index.datacite_index merge
+  the results into the existing index. Empty when incremental_index is disabled.
+*/
+
+MODEL (
+  name works_index.updated_dois,
+  dialect duckdb,
+  kind FULL,
+  audits (
+    unique_values(columns := (doi))
+  ),
+  enabled true
+);
+
+@resource_settings(@VAR('default_threads'));
+
+SELECT doi
+FROM (
+  SELECT doi
+  FROM openalex.works
+  WHERE doi IS NOT NULL AND @updated_since_last_run(updated_date)
+
+  UNION
+
+  SELECT doi
+  FROM crossref_metadata.works
+  WHERE @updated_since_last_run(updated_date)
+
+  UNION
+
+  SELECT doi
+  FROM datacite.works
+  WHERE @updated_since_last_run(updated_date)
+)
+WHERE @VAR('incremental_index');
@@ -0,0 +1,228 @@
+"""Profile the query of each SQLMesh model with DuckDB's EXPLAIN ANALYZE.
+
+The queries are rendered against the prod environment, so a plan must have been run on the DuckDB database first.
+"""
+
+import json
+import logging
+import pathlib
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+import pendulum
+from sqlglot import exp
+from sqlmesh.core.context import Context
+
+from dmpworks.sql.commands import sqlmesh_dir
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class OperatorProfile:
+    """An operator in a model's query plan, in depth first order."""
+
+    depth: int
+    operator_name: str
+    operator_type: str
+    seconds: float
+    cardinality: int
+    rows_scanned: int
+    result_set_bytes: int
+    extra_info: dict = field(default_factory=dict)
+
+
+@dataclass
+class ModelProfile:
+    name: str
+    seconds: float = 0
+    cpu_seconds: float = 0
+    rows: int = 0
+    peak_buffer_memory_bytes: int = 0
+    peak_temp_dir_bytes: int = 0
+    operators: list[OperatorProfile] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def sample_tables(query: exp.Expression, sample_percent: float) -> exp.Expression:
+    """Sample every table that the query reads from, apart from its CTEs."""
+
+    query = query.copy()
+    cte_names = {cte.alias for cte in query.find_all(exp.CTE)}
+    for table in query.find_all(exp.Table):
+        if not table.db and table.name in cte_names:
+            continue
+        table.set("sample", exp.TableSample(percent=exp.Literal.number(sample_percent)))
+    return query
+
+
+def parse_profile(name: str, profile: dict) -> ModelProfile:
+    """Parse the JSON output of EXPLAIN (ANALYZE, FORMAT JSON)."""
+
+    model_profile = ModelProfile(
+        name=name,
+        seconds=profile.get("latency", 0),
+        cpu_seconds=profile.get("cpu_time", 0),
+        peak_buffer_memory_bytes=profile.get("system_peak_buffer_memory", 0),
+        peak_temp_dir_bytes=profile.get("system_peak_temp_dir_size", 0),
+    )
+
+    # The root of the plan is the EXPLAIN_ANALYZE operator, its child is the query's last operator
+    stack = [(child, 0) for child in reversed(profile.get("children", []))]
+    while stack:
+        node, depth = stack.pop()
+        if node.get("operator_type") == "EXPLAIN_ANALYZE":
+            stack.extend((child, depth) for child in reversed(node.get("children", [])))
+            continue
+
+        if depth == 0:
+            model_profile.rows = node.get("operator_cardinality", 0)
+        model_profile.operators.append(
+            OperatorProfile(
+                depth=depth,
+                operator_name=node.get("operator_name", ""),
+                operator_type=node.get("operator_type", ""),
+                seconds=node.get("operator_timing", 0),
+                cardinality=node.get("operator_cardinality", 0),
+                rows_scanned=node.get("operator_rows_scanned", 0),
+                result_set_bytes=node.get("result_set_size", 0),
+                extra_info=node.get("extra_info", {}),
+            )
+        )
+        stack.extend((child, depth + 1) for child in reversed(node.get("children", [])))
+
+    return model_profile
+
+
+def profile_model(ctx: Context, name: str, sample_percent: Optional[float] = None) -> ModelProfile:
+    """Run a model's rendered query with EXPLAIN ANALYZE.
+
+    :param ctx: the SQLMesh context.
+    :param name: the model name.
+    :param sample_percent: sample this percentage of the rows of each table the query reads.
+    :return: the model's profile.
+    """
+
+    query = ctx.render(name)
+    if sample_percent is not None:
+        query = sample_tables(query, sample_percent)
+
+    try:
+        result = ctx.engine_adapter.fetchone(f"EXPLAIN (ANALYZE, FORMAT JSON) {query.sql(dialect='duckdb')}")
+    except Exception as e:
+        log.error(f"Failed to profile {name}: {e}")
+        return ModelProfile(name=name, error=str(e))
+
+    # A JSON array is returned by some versions of DuckDB
+    profile = json.loads(result[1])
+    if isinstance(profile, list):
+        profile = profile[0]
+    return parse_profile(name, profile)
+
+
+def load_profiles(path: pathlib.Path) -> dict[str, ModelProfile]:
+    with open(path) as f:
+        report = json.load(f)
+
+    profiles = {}
+    for model in report["models"]:
+        operators = [OperatorProfile(**operator) for operator in model.pop("operators")]
+        profiles[model["name"]] = ModelProfile(**model, operators=operators)
+    return profiles
+
+
+def save_profiles(path: pathlib.Path, profiles: list[ModelProfile], sample_percent: Optional[float]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(
+            {
+                "created": pendulum.now().to_iso8601_string(),
+                "sample_percent": sample_percent,
+                "models": [asdict(profile) for profile in profiles],
+            },
+            f,
+            indent=2,
+            sort_keys=True,
+            default=str,
+        )
+
+
+def profile_summary(profiles: list[ModelProfile], baseline: Optional[dict[str, ModelProfile]] = None) -> str:
+    """Format the profiles as a table ranked from slowest to fastest model, with each model's slowest operator and,
+    when a baseline is given, how much slower or faster each model was than in the baseline."""
+
+    total = sum(profile.seconds for profile in profiles)
+    header = f"{'model':<50} {'seconds':>9} {'%':>6} {'rows':>14} {'memory MB':>10} {'temp MB':>8}"
+    if baseline is not None:
+        header += f" {'baseline':>9} {'change':>7}"
+    lines = [header + "  slowest operator"]
+
+    for profile in sorted(profiles, key=lambda p: p.seconds, reverse=True):
+        if profile.error is not None:
+            lines.append(f"{profile.name:<50} failed: {profile.error.splitlines()[0]}")
+            continue
+
+        percent = profile.seconds / total * 100 if total else 0
+        line = (
+            f"{profile.name:<50} {profile.seconds:>9.2f} {percent:>6.1f} {profile.rows:>14,} "
+            f"{profile.peak_buffer_memory_bytes / 1024**2:>10.1f} {profile.peak_temp_dir_bytes / 1024**2:>8.1f}"
+        )
+        if baseline is not None:
+            previous = baseline.get(profile.name)
+            if previous is None or previous.error is not None or not previous.seconds:
+                line += f" {'':>9} {'':>7}"
+            else:
+                change = (profile.seconds - previous.seconds) / previous.seconds * 100
+                line += f" {previous.seconds:>9.2f} {change:>+6.0f}%"
+
+        if profile.operators:
+            slowest = max(profile.operators, key=lambda operator: operator.seconds)
+            operator_percent = slowest.seconds / profile.seconds * 100 if profile.seconds else 0
+            line += (
+                f"  {slowest.operator_name} ({slowest.seconds:.2f}s, {operator_percent:.0f}%, "
+                f"{slowest.cardinality:,} rows)"
+            )
+        lines.append(line)
+
+    lines.append(f"{'total':<50} {total:>9.2f}")
+    return "\n".join(lines)
+
+
+def run_profile(
+    out_file: pathlib.Path,
+    models: Optional[list[str]] = None,
+    sample_percent: Optional[float] = None,
+    threads: Optional[int] = None,
+    baseline_file: Optional[pathlib.Path] = None,
+) -> list[ModelProfile]:
+    """Profile the query of each SQLMesh model and save a JSON report.
+
+    :param out_file: the JSON report to save.
+    :param models: the models to profile, defaults to every model.
+    :param sample_percent: sample this percentage of the rows of each table each query reads.
+    :param threads: the DuckDB threads, defaults to the gateway's threads.
+    :param baseline_file: a JSON report from a previous run to compare with.
+    :return: the model profiles.
+    """
+
+    ctx = Context(
+        paths=[sqlmesh_dir()],
+        load=True,
+    )
+    if threads is not None:
+        ctx.engine_adapter.execute(f"SET threads = {threads}")
+
+    # Profile the models in dependency order
+    names = [ctx.get_model(name).fqn for name in models] if models else list(ctx.dag)
+    profiles = []
+    for fqn in names:
+        model = ctx.get_model(fqn)
+        if not model.kind.is_materialized and not model.kind.is_view:
+            continue
+        log.info(f"Profiling {model.name}")
+        profiles.append(profile_model(ctx, model.name, sample_percent=sample_percent))
+
+    save_profiles(out_file, profiles, sample_percent)
+    baseline = load_profiles(baseline_file) if baseline_file is not None else None
+    log.info(f"Saved profile to {out_file}:\n{profile_summary(profiles, baseline)}")
+    return profiles
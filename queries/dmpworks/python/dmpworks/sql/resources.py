@@ -0,0 +1,283 @@
+"""Per-model DuckDB resource settings chosen from the history of previous SQLMesh runs.
+
+Each run records how long each model took, the peak memory DuckDB used and how much it spilled to disk. Before the next
+run choose_settings picks the threads and memory limit for each model from its most recent runs, within a global
+budget. The resource_settings macro applies them when a model is evaluated.
+"""
+
+import dataclasses
+import json
+import logging
+import os
+import pathlib
+import re
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+import duckdb
+
+from dmpworks.sql.macros.resource_settings import SETTINGS_FILE_ENV
+
+log = logging.getLogger(__name__)
+
+GB = 1024**3
+MAX_HISTORY_RUNS = 10
+
+
+@dataclass
+class ResourceBudget:
+    """The resources that can be given to a single model.
+
+    By default models are evaluated one at a time, so each model may use the whole budget. When models are evaluated
+    concurrently, the budget is shared by the models that are running, see run_plan.
+    """
+
+    threads: int = os.cpu_count()
+    memory_limit_gb: float = 200
+    temp_directory: Optional[str] = None
+    max_temp_directory_size_gb: Optional[float] = None
+    min_memory_limit_gb: float = 4
+    memory_headroom: float = 1.5
+    min_seconds_to_tune_threads: float = 60
+
+
+@dataclass
+class ModelRun:
+    """The resources a model used in one run."""
+
+    seconds: float
+    threads: int
+    memory_limit_bytes: int
+    peak_memory_bytes: int
+    spill_bytes: int
+
+
+@dataclass
+class ResourceSettings:
+    """The DuckDB settings for a model and why they were chosen."""
+
+    threads: int
+    memory_limit_gb: float
+    reason: str = ""
+
+
+def parse_size(size: str) -> int:
+    """Parse a DuckDB size setting such as '186.2 GiB' or '200GB' into bytes."""
+
+    match = re.fullmatch(r"\s*([\d.]+)\s*([KMGT]i?B|bytes?)?\s*", size, flags=re.IGNORECASE)
+    if match is None:
+        raise ValueError(f"Unable to parse size: {size}")
+
+    value, unit = match.groups()
+    unit = (unit or "bytes").upper()
+    if unit.startswith("BYTE"):
+        return int(float(value))
+    base = 1024 if "I" in unit else 1000
+    return int(float(value) * base ** ("KMGT".index(unit[0]) + 1))
+
+
+def load_history(path: pathlib.Path) -> list[dict[str, ModelRun]]:
+    """Load the model runs from previous SQLMesh runs, oldest first."""
+
+    if not path.exists():
+        return []
+
+    with open(path) as f:
+        runs = json.load(f)
+    return [{name: ModelRun(**model_run) for name, model_run in run["models"].items()} for run in runs]
+
+
+def save_history(path: pathlib.Path, history: list[dict[str, ModelRun]], run: dict[str, ModelRun]):
+    """Append the model runs from this SQLMesh run to the history, keeping the most recent MAX_HISTORY_RUNS."""
+
+    history = (history + [run])[-MAX_HISTORY_RUNS:]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(
+            [
+                {"models": {name: dataclasses.asdict(model_run) for name, model_run in sorted(run.items())}}
+                for run in history
+            ],
+            f,
+            indent=2,
+        )
+
+
+def choose_model_settings(runs: list[ModelRun], budget: ResourceBudget) -> ResourceSettings:
+    """Choose the settings for a model from its previous runs, most recent last.
+
+    :param runs: the model's previous runs.
+    :param budget: the resources available to the model.
+    :return: the settings.
+    """
+
+    last = runs[-1]
+    peak_gb = last.peak_memory_bytes / GB
+    spill_gb = last.spill_bytes / GB
+    limit_gb = last.memory_limit_bytes / GB
+    threads = min(last.threads, budget.threads)
+
+    if last.spill_bytes > 0:
+        # Spilling is slow, give the model enough memory to keep what it spilled in memory, or if it was already at
+        # the budget, halve the threads as each thread needs its own memory for joins and aggregations
+        if limit_gb < budget.memory_limit_gb:
+            memory_limit_gb = min(
+                budget.memory_limit_gb, max(limit_gb * 2, (peak_gb + spill_gb) * budget.memory_headroom)
+            )
+            reason = f"spilled {spill_gb:.1f}GB at a {limit_gb:.1f}GB limit, raising the memory limit"
+        else:
+            memory_limit_gb = budget.memory_limit_gb
+            threads = max(1, threads // 2)
+            reason = f"spilled {spill_gb:.1f}GB at the memory budget, halving threads"
+        return ResourceSettings(threads, round(memory_limit_gb, 1), reason)
+
+    # Without spilling, the memory limit only needs to cover the peak, the rest is left to the OS page cache that the
+    # Parquet files are read through
+    memory_limit_gb = min(budget.memory_limit_gb, max(budget.min_memory_limit_gb, peak_gb * budget.memory_headroom))
+    reason = f"peak {peak_gb:.1f}GB, no spill"
+
+    # Double the threads for slow models while it keeps making them faster
+    previous = next((run for run in reversed(runs[:-1]) if run.threads != last.threads), None)
+    if previous is not None and previous.threads < last.threads and last.seconds > previous.seconds * 0.9:
+        threads = min(previous.threads, budget.threads)
+        reason += f", {last.threads} threads were not faster than {previous.threads}"
+    elif threads < budget.threads and last.seconds >= budget.min_seconds_to_tune_threads:
+        if previous is None or previous.threads < last.threads:
+            threads = min(budget.threads, threads * 2)
+            reason += f", {last.seconds:.0f}s with {last.threads} threads, doubling threads"
+        else:
+            reason += f", keeping {threads} threads"
+
+    return ResourceSettings(threads, round(memory_limit_gb, 1), reason)
+
+
+def choose_settings(history: list[dict[str, ModelRun]], budget: ResourceBudget) -> dict[str, ResourceSettings]:
+    """Choose the settings for each model in the history of previous runs.
+
+    :param history: the model runs from previous SQLMesh runs, oldest first.
+    :param budget: the resources available to each model.
+    :return: the settings for each model, by model name.
+    """
+
+    runs_by_model: dict[str, list[ModelRun]] = {}
+    for run in history:
+        for name, model_run in run.items():
+            runs_by_model.setdefault(name, []).append(model_run)
+
+    return {name: choose_model_settings(runs, budget) for name, runs in sorted(runs_by_model.items())}
+
+
+def temp_directory_statements(budget: ResourceBudget) -> list[str]:
+    """The statements that set DuckDB's temp directory and its maximum size from the budget, when they are given.
+
+    They are run once on the connection before any model is evaluated, rather than by each model, as DuckDB can't
+    switch the temp directory once a query has spilled to it, even to the same path.
+    """
+
+    statements = []
+    if budget.temp_directory is not None:
+        statements.append(f"SET temp_directory = '{budget.temp_directory}'")
+    if budget.max_temp_directory_size_gb is not None:
+        statements.append(f"SET max_temp_directory_size = '{budget.max_temp_directory_size_gb}GiB'")
+    return statements
+
+
+def write_settings(path: pathlib.Path, settings: dict[str, ResourceSettings], budget: ResourceBudget):
+    """Write the settings for the resource_settings macro.
+
+    Models without any history keep the threads set by their threads variable and are given the whole memory budget.
+    """
+
+    default = {"memory_limit_gb": budget.memory_limit_gb}
+    with open(path, "w") as f:
+        json.dump(
+            {
+                "default": default,
+                "models": {name: dataclasses.asdict(model_settings) for name, model_settings in settings.items()},
+            },
+            f,
+            indent=2,
+        )
+
+
+def settings_report(settings: dict[str, ResourceSettings]) -> str:
+    """Format the chosen settings and the reasons for them as a table."""
+
+    lines = [f"{'model':<60} {'threads':>7} {'memory GB':>10}  reason"]
+    for name, model_settings in settings.items():
+        lines.append(
+            f"{name:<60} {model_settings.threads:>7} {model_settings.memory_limit_gb:>10.1f}  {model_settings.reason}"
+        )
+    return "\n".join(lines)
+
+
+class ResourceSampler:
+    """Samples DuckDB's memory use, spill and settings on a background thread while each model is evaluated."""
+
+    def __init__(self, connection: duckdb.DuckDBPyConnection, interval_seconds: float = 1.0):
+        # A cursor is a separate connection to the same database, so it can be queried while a model is evaluated
+        self.cursor = connection.cursor()
+        self.interval_seconds = interval_seconds
+        self.model_runs: dict[str, ModelRun] = {}
+        self.current: Optional[str] = None
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        self.cursor.close()
+
+    def start_model(self, name: str):
+        with self.lock:
+            self.current = name
+        self.sample()
+
+    def end_model(self, name: str, duration_ms: Optional[int]):
+        self.sample()
+        with self.lock:
+            model_run = self.model_runs.get(name)
+            if model_run is not None and duration_ms is not None:
+                model_run.seconds += duration_ms / 1000
+            self.current = None
+
+    def sample(self):
+        with self.lock:
+            name = self.current
+            if name is None:
+                return
+
+            memory_bytes, spill_bytes, threads, memory_limit = self.cursor.sql(
+                "SELECT SUM(memory_usage_bytes), SUM(temporary_storage_bytes), current_setting('threads'), "
+                "current_setting('memory_limit') FROM duckdb_memory()"
+            ).fetchone()
+            model_run = self.model_runs.setdefault(
+                name, ModelRun(seconds=0, threads=threads, memory_limit_bytes=0, peak_memory_bytes=0, spill_bytes=0)
+            )
+            # The settings are set by the model's pre-statements, so the last sample has the settings it ran with
+            model_run.threads = threads
+            model_run.memory_limit_bytes = parse_size(memory_limit)
+            model_run.peak_memory_bytes = max(model_run.peak_memory_bytes, memory_bytes or 0)
+            model_run.spill_bytes = max(model_run.spill_bytes, spill_bytes or 0)
+
+    def run(self):
+        while not self.stopped.wait(self.interval_seconds):
+            try:
+                self.sample()
+            except duckdb.Error as e:
+                log.debug(f"Unable to sample DuckDB resources: {e}")
+
+
+def history_path(database: str) -> pathlib.Path:
+    """The resource history is kept next to the DuckDB database, so that it is carried over with it between runs."""
+
+    return pathlib.Path(database).parent / "resource_history.json"
+
+
+def settings_path(database: str) -> pathlib.Path:
+    return pathlib.Path(database).parent / "resource_settings.json"
@@ -10,10 +10,12 @@ from dmpworks.cli_utils import Directory, LogLevel
 from dmpworks.transform.crossref_metadata import transform_crossref_metadata
 from dmpworks.transform.datacite import transform_datacite
 from dmpworks.transform.demo_dataset import create_demo_dataset
+from dmpworks.transform.demo_subset import create_demo_subset
 from dmpworks.transform.dmps import transform_dmps
 from dmpworks.transform.openalex_funders import transform_openalex_funders
 from dmpworks.transform.openalex_works import transform_openalex_works
 from dmpworks.transform.ror import transform_ror
+from dmpworks.transform.synthetic import generate_synthetic_dataset, SyntheticDataset
 from dmpworks.transform.utils_file import setup_multiprocessing_logging
 from dmpworks.utils import copy_dict
 
@@ -91,6 +93,46 @@ LowMemory = Annotated[
         help="Enable low memory mode for Polars when streaming records from files.",
     ),
 ]
+NumDownloadWorkers = Annotated[
+    int,
+    Parameter(
+        validator=validators.Number(gte=1),
+        help="Number of parallel workers for downloading batches of files, when reading them from S3 (must be >= 1).",
+    ),
+]
+NumUploadWorkers = Annotated[
+    int,
+    Parameter(
+        validator=validators.Number(gte=1),
+        help="Number of parallel workers for uploading each batch's Parquet files, when writing them to S3 (must be >= "
+        "1).",
+    ),
+]
+DiskBudgetGB = Annotated[
+    float,
+    Parameter(
+        validator=validators.Number(gt=0),
+        help="Maximum GB of downloaded files on disk at once, when reading them from S3. Limits how far downloads run "
+        "ahead of the transformation.",
+    ),
+]
+ShardIndex = Annotated[
+    Optional[int],
+    Parameter(
+        validator=validators.Number(gte=0),
+        help="Index of the shard of the input files to process, when the transform is split across nodes (must be >= "
+        "0). Defaults to the AWS_BATCH_JOB_ARRAY_INDEX environment variable.",
+    ),
+]
+ShardCount = Annotated[
+    int,
+    Parameter(
+        validator=validators.Number(gte=1),
+        help="Number of shards the transform is split into, e.g. the size of an AWS Batch array job (must be >= 1). "
+        "Set --batch-size when sharding, as it defaults to the CPU count, and merging fails unless every shard used "
+        "the same batch size.",
+    ),
+]
 
 
 @Parameter(name="*")
@@ -106,6 +148,11 @@ class CrossrefMetadataConfig:
     max_file_processes: MaxFileProcesses = os.cpu_count()
     n_batches: NumBatches = None
     low_memory: LowMemory = False
+    download_workers: NumDownloadWorkers = 2
+    disk_budget_gb: DiskBudgetGB = 50.0
+    upload_workers: NumUploadWorkers = 1
+    shard_index: ShardIndex = None
+    shard_count: ShardCount = 1
     log_level: LogLevel = "INFO"
 
 
@@ -146,6 +193,11 @@ class DataCiteConfig:
     max_file_processes: MaxFileProcesses = os.cpu_count()
     n_batches: NumBatches = None
     low_memory: LowMemory = False
+    download_workers: NumDownloadWorkers = 2
+    disk_budget_gb: DiskBudgetGB = 50.0
+    upload_workers: NumUploadWorkers = 1
+    shard_index: ShardIndex = None
+    shard_count: ShardCount = 1
     log_level: LogLevel = "INFO"
 
 
@@ -186,6 +238,11 @@ class OpenAlexFundersConfig:
     max_file_processes: MaxFileProcesses = os.cpu_count()
     n_batches: NumBatches = None
     low_memory: LowMemory = False
+    download_workers: NumDownloadWorkers = 2
+    disk_budget_gb: DiskBudgetGB = 50.0
+    upload_workers: NumUploadWorkers = 1
+    shard_index: ShardIndex = None
+    shard_count: ShardCount = 1
     log_level: LogLevel = "INFO"
 
 
@@ -226,6 +283,11 @@ class OpenAlexWorksConfig:
     max_file_processes: MaxFileProcesses = os.cpu_count()
     n_batches: NumBatches = None
     low_memory: LowMemory = False
+    download_workers: NumDownloadWorkers = 2
+    disk_budget_gb: DiskBudgetGB = 50.0
+    upload_workers: NumUploadWorkers = 1
+    shard_index: ShardIndex = None
+    shard_count: ShardCount = 1
     log_level: LogLevel = "INFO"
 
 
@@ -266,6 +328,11 @@ class DMPsConfig:
     max_file_processes: MaxFileProcesses = os.cpu_count()
     n_batches: NumBatches = None
     low_memory: LowMemory = False
+    download_workers: NumDownloadWorkers = 2
+    disk_budget_gb: DiskBudgetGB = 50.0
+    upload_workers: NumUploadWorkers = 1
+    shard_index: ShardIndex = None
+    shard_count: ShardCount = 1
     log_level: LogLevel = "INFO"
 
 
@@ -342,5 +409,86 @@ def demo_dataset_cmd(
     create_demo_dataset(dataset, ror_id, institution_name, in_dir, out_dir, level)
 
 
+@app.command(name="demo-subset")
+def demo_subset_cmd(
+    in_dir: Directory,
+    out_dir: Directory,
+    *,
+    ror_id: Optional[str] = None,
+    funder_ror_id: Optional[str] = None,
+    sample_fraction: Annotated[Optional[float], Parameter(validator=validators.Number(gt=0, lte=1))] = None,
+    seed: int = 42,
+    log_level: LogLevel = "INFO",
+):
+    """Create a demo subset from transformed Parquet files, consistent across Crossref Metadata, DataCite
+    and OpenAlex Works.
+
+    Args:
+        in_dir: Path to the transform directory with a sub-directory per dataset (e.g. /path/to/data/transform).
+        out_dir: Path to the output directory (e.g. /path/to/demo/transform).
+        ror_id: Select works with an author affiliated with this ROR ID, without a prefix.
+        funder_ror_id: Select works funded by the funder with this ROR ID, without a prefix.
+        sample_fraction: Select a random fraction of all works, between 0 and 1.
+        seed: The seed used for the random sample.
+        log_level: Python log level.
+    """
+
+    if ror_id is None and funder_ror_id is None and sample_fraction is None:
+        raise ValueError("demo-subset: one of --ror-id, --funder-ror-id or --sample-fraction must be set")
+
+    logging.basicConfig(level=logging.getLevelName(log_level))
+    create_demo_subset(
+        in_dir,
+        out_dir,
+        ror_id=ror_id,
+        funder_ror_id=funder_ror_id,
+        sample_fraction=sample_fraction,
+        seed=seed,
+    )
+
+
+@app.command(name="synthetic")
+def synthetic_cmd(
+    dataset: SyntheticDataset,
+    out_dir: Directory,
+    *,
+    n_records: Annotated[int, Parameter(validator=validators.Number(gte=1))] = 10_000,
+    n_files: Annotated[int, Parameter(validator=validators.Number(gte=1))] = 4,
+    skew: Annotated[float, Parameter(validator=validators.Number(gte=0))] = 1.1,
+    polymorphic_rate: Annotated[float, Parameter(validator=validators.Number(gte=0, lte=1))] = 0.1,
+    duplicate_doi_rate: Annotated[float, Parameter(validator=validators.Number(gte=0, lte=1))] = 0.0,
+    null_doi_rate: Annotated[float, Parameter(validator=validators.Number(gte=0, lte=1))] = 0.0,
+    seed: int = 42,
+    log_level: LogLevel = "INFO",
+):
+    """Generate synthetic source data for benchmarking the transformations.
+
+    Args:
+        dataset: The dataset to generate.
+        out_dir: Path to the output directory (e.g. /path/to/synthetic/openalex_works).
+        n_records: The number of records to generate, ignored for ROR.
+        n_files: The number of files to split the records between, ignored for ROR.
+        skew: The Zipf exponent used when sampling institutions, funders, words and the number of authors, zero is uniform.
+        polymorphic_rate: The fraction of single item DataCite affiliation and nameIdentifiers lists written as objects.
+        duplicate_doi_rate: The fraction of OpenAlex works that have the DOI of an earlier work.
+        null_doi_rate: The fraction of OpenAlex works without a DOI.
+        seed: The random seed.
+        log_level: Python log level.
+    """
+
+    logging.basicConfig(level=logging.getLevelName(log_level))
+    generate_synthetic_dataset(
+        dataset,
+        out_dir,
+        n_records=n_records,
+        n_files=n_files,
+        skew=skew,
+        polymorphic_rate=polymorphic_rate,
+        duplicate_doi_rate=duplicate_doi_rate,
+        null_doi_rate=null_doi_rate,
+        seed=seed,
+    )
+
+
 if __name__ == "__main__":
     app()
@@ -1,10 +1,20 @@
 import logging
 import os
 import pathlib
+from typing import Optional
 
+import dmpworks.polars_expr_plugin as pe
 import polars as pl
+from dmpworks.funders.award_id_expr import parse_award_text
 from dmpworks.transform.pipeline import process_files_parallel
-from dmpworks.transform.transforms import date_parts_to_date, normalise_identifier, remove_markup
+from dmpworks.transform.transforms import (
+    clean_string,
+    date_parts_to_date,
+    normalise_doi,
+    normalise_fundref,
+    normalise_identifier,
+    normalise_orcid,
+)
 from dmpworks.transform.utils_file import extract_gzip, read_jsonls
 from polars._typing import SchemaDefinition
 
@@ -113,9 +123,9 @@ def transform(lz: pl.LazyFrame) -> list[tuple[str, pl.LazyFrame]]:
     lz_cached = lz.cache()
 
     works = lz_cached.select(
-        doi=pl.col("DOI"),
-        title=remove_markup(pl.col("title").list.join(" ")),
-        abstract=remove_markup(pl.col("abstract")),
+        doi=normalise_doi(pl.col("DOI")),
+        title=clean_string(pe.strip_markup(pl.col("title").list.join(" "))),
+        abstract=clean_string(pe.strip_markup(pl.col("abstract"))),
         type=pl.col("type"),
         publication_date=date_parts_to_date(pl.col("issued").struct.field("date-parts").list.get(0, null_on_oob=True)),
         updated_date=pl.col("deposited")
@@ -130,7 +140,9 @@ def transform(lz: pl.LazyFrame) -> list[tuple[str, pl.LazyFrame]]:
     )
 
     exploded_authors = (
-        lz_cached.select(work_doi=pl.col("DOI"), author=pl.col("author")).explode("author").unnest("author")
+        lz_cached.select(work_doi=normalise_doi(pl.col("DOI")), author=pl.col("author"))
+        .explode("author")
+        .unnest("author")
     )
 
     works_authors = exploded_authors.select(
@@ -138,7 +150,7 @@ def transform(lz: pl.LazyFrame) -> list[tuple[str, pl.LazyFrame]]:
         given=pl.col("given"),
         family=pl.col("family"),
         name=pl.col("name"),
-        orcid=normalise_identifier(pl.col("ORCID")),
+        orcid=normalise_orcid(pl.col("ORCID")),
     ).unique()
 
     # TODO: convert these IDs to ROR
@@ -160,16 +172,22 @@ def transform(lz: pl.LazyFrame) -> list[tuple[str, pl.LazyFrame]]:
     )
 
     works_funders = (
-        lz_cached.select(work_doi=pl.col("DOI"), funder=pl.col("funder"))
+        lz_cached.select(work_doi=normalise_doi(pl.col("DOI")), funder=pl.col("funder"))
         .explode("funder")
         .unnest("funder")
-        .select(pl.col("work_doi"), name=pl.col("name"), funder_doi=pl.col("DOI"), award=pl.col("award"))
+        .select(
+            pl.col("work_doi"),
+            name=pl.col("name"),
+            funder_doi=normalise_fundref(pl.col("DOI")),
+            award=pl.col("award"),
+        )
         .explode("award")  # Creates a new row for each element in the award list
         .unique()
+        .with_columns(awards=parse_award_text(pl.col("funder_doi"), pl.col("award")))
     )
 
     works_relations = (
-        lz_cached.select(work_doi=pl.col("DOI"), relation=pl.col("relation"))
+        lz_cached.select(work_doi=normalise_doi(pl.col("DOI")), relation=pl.col("relation"))
         .unnest("relation")
         .unpivot(
             index="work_doi",
@@ -210,6 +228,13 @@ def transform_crossref_metadata(
     max_file_processes: int = os.cpu_count(),
     n_batches: int = None,
     low_memory: bool = False,
+    source_uri: Optional[str] = None,
+    download_workers: int = 2,
+    disk_budget_gb: float = 50.0,
+    target_uri: Optional[str] = None,
+    upload_workers: int = 1,
+    shard_index: Optional[int] = None,
+    shard_count: int = 1,
 ):
     process_files_parallel(
         # Non customizable parameters, specific to Crossref Metadata
@@ -231,4 +256,11 @@ def transform_crossref_metadata(
         max_file_processes=max_file_processes,
         n_batches=n_batches,
         low_memory=low_memory,
+        source_uri=source_uri,
+        download_workers=download_workers,
+        disk_budget_gb=disk_budget_gb,
+        target_uri=target_uri,
+        upload_workers=upload_workers,
+        shard_index=shard_index,
+        shard_count=shard_count,
     )
@@ -1,14 +1,17 @@
 import logging
 import os
 import pathlib
+from typing import Optional
 
 import dmpworks.polars_expr_plugin as pe
 import polars as pl
+from dmpworks.funders.award_id_expr import parse_award_text
 from dmpworks.transform.pipeline import process_files_parallel
 from dmpworks.transform.transforms import (
-    extract_orcid,
+    clean_string,
+    normalise_doi,
     normalise_identifier,
-    remove_markup,
+    normalise_orcid,
     replace_with_null,
 )
 from dmpworks.transform.utils_file import extract_gzip, read_jsonls
@@ -154,22 +157,26 @@ def process_orcid(expr: pl.Expr) -> pl.Expr:
         .otherwise(pl.lit(None))
     )
 
-    return extract_orcid(name_identifier)
+    return normalise_orcid(name_identifier)
 
 
 def transform(lz: pl.LazyFrame) -> list[tuple[str, pl.LazyFrame]]:
     lz_cached = lz.cache()
 
     works = lz_cached.select(
-        doi=pl.col("id"),
-        title=remove_markup(
-            pl.col("attributes").struct.field("titles").list.eval(pl.element().struct.field("title")).list.join(" ")
+        doi=normalise_doi(pl.col("id")),
+        title=clean_string(
+            pe.strip_markup(
+                pl.col("attributes").struct.field("titles").list.eval(pl.element().struct.field("title")).list.join(" ")
+            )
         ),
-        abstract=remove_markup(
-            pl.col("attributes")
-            .struct.field("descriptions")
-            .list.eval(pl.element().struct.field("description"))
-            .list.join(" ")
+        abstract=clean_string(
+            pe.strip_markup(
+                pl.col("attributes")
+                .struct.field("descriptions")
+                .list.eval(pl.element().struct.field("description"))
+                .list.join(" ")
+            )
         ),
         type=pl.col("attributes").struct.field("types").struct.field("resourceTypeGeneral"),
         publication_date=pl.col("attributes")
@@ -224,6 +231,10 @@ def transform(lz: pl.LazyFrame) -> list[tuple[str, pl.LazyFrame]]:
                 funder_name=pl.element().struct.field("funderName"),
                 award_number=pl.element().struct.field("awardNumber"),
                 award_uri=pl.element().struct.field("awardUri"),
+                awards=parse_award_text(
+                    normalise_identifier(pl.element().struct.field("funderIdentifier")),
+                    pl.element().struct.field("awardNumber"),
+                ),
             )
         )
         .list.eval(
@@ -249,7 +260,7 @@ def transform(lz: pl.LazyFrame) -> list[tuple[str, pl.LazyFrame]]:
     )
 
     institutions = (
-        lz_cached.select(work_doi=pl.col("id"), creators=pl.col("attributes").struct.field("creators"))
+        lz_cached.select(work_doi=normalise_doi(pl.col("id")), creators=pl.col("attributes").struct.field("creators"))
         .explode("creators")
         .unnest("creators")
         .select(
@@ -297,7 +308,8 @@ def transform(lz: pl.LazyFrame) -> list[tuple[str, pl.LazyFrame]]:
     # Build relations
     works_relations = (
         lz_cached.select(
-            work_doi=pl.col("id"), relatedIdentifiers=pl.col("attributes").struct.field("relatedIdentifiers")
+            work_doi=normalise_doi(pl.col("id")),
+            relatedIdentifiers=pl.col("attributes").struct.field("relatedIdentifiers"),
         )
         .explode("relatedIdentifiers")
         .unnest("relatedIdentifiers")
@@ -334,6 +346,13 @@ def transform_datacite(
     max_file_processes: int = os.cpu_count(),
     n_batches: int = None,
     low_memory: bool = False,
+    source_uri: Optional[str] = None,
+    download_workers: int = 2,
+    disk_budget_gb: float = 50.0,
+    target_uri: Optional[str] = None,
+    upload_workers: int = 1,
+    shard_index: Optional[int] = None,
+    shard_count: int = 1,
 ):
     process_files_parallel(
         # Non customizable parameters, specific to DataCite
@@ -355,4 +374,11 @@ def transform_datacite(
         max_file_processes=max_file_processes,
         n_batches=n_batches,
         low_memory=low_memory,
+        source_uri=source_uri,
+        download_workers=download_workers,
+        disk_budget_gb=disk_budget_gb,
+        target_uri=target_uri,
+        upload_workers=upload_workers,
+        shard_index=shard_index,
+        shard_count=shard_count,
     )
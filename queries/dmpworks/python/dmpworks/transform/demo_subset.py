@@ -0,0 +1,218 @@
+import logging
+import pathlib
+import shutil
+from typing import Optional
+
+import polars as pl
+
+from dmpworks.utils import timed
+
+log = logging.getLogger(__name__)
+
+# Transformed tables for each source and the column holding the work DOI
+WORK_TABLES: dict[str, dict[str, str]] = {
+    "crossref_metadata": {
+        "crossref_works": "doi",
+        "crossref_works_authors": "work_doi",
+        "crossref_works_affiliations": "work_doi",
+        "crossref_works_funders": "work_doi",
+        "crossref_works_relations": "work_doi",
+    },
+    "datacite": {
+        "datacite_works": "doi",
+        "datacite_works_relations": "work_doi",
+    },
+    "openalex_works": {
+        "openalex_works": "doi",
+        "openalex_works_authors": "work_doi",
+        "openalex_works_grants": "work_doi",
+        "openalex_works_institutions": "work_doi",
+    },
+}
+
+# Small lookup datasets that are copied as is
+LOOKUP_DATASETS = ["openalex_funders", "ror"]
+
+
+def parquet_files(in_dir: pathlib.Path, dataset: str, table: str) -> list[pathlib.Path]:
+    # Same pattern as the SQLMesh source models, so that e.g. crossref_works doesn't match crossref_works_authors
+    return sorted((in_dir / dataset / "parquets").glob(f"{table}_[0-9]*.parquet"))
+
+
+def scan_table(in_dir: pathlib.Path, dataset: str, table: str) -> Optional[pl.LazyFrame]:
+    files = parquet_files(in_dir, dataset, table)
+    if not files:
+        log.warning(f"No parquet files found for {dataset}.{table} in {in_dir / dataset / 'parquets'}")
+        return None
+    return pl.scan_parquet(files)
+
+
+def ror_identifiers(in_dir: pathlib.Path, ror_id: str) -> list[str]:
+    """Return the ROR ID and every other identifier that maps to it in the ROR index, e.g. GRID, ISNI and
+    Crossref Funder IDs."""
+
+    ror_file = in_dir / "ror" / "parquets" / "ror.parquet"
+    identifiers = (
+        pl.scan_parquet(ror_file)
+        .filter(pl.col("ror_id") == ror_id)
+        .select(pl.col("identifier"))
+        .unique()
+        .collect()
+        .get_column("identifier")
+        .to_list()
+    )
+    return sorted({ror_id, *identifiers})
+
+
+def openalex_funder_ids(in_dir: pathlib.Path, ror_id: str) -> list[str]:
+    lz = scan_table(in_dir, "openalex_funders", "openalex_funders")
+    if lz is None:
+        return []
+    return (
+        lz.filter(pl.col("ids").struct.field("ror") == ror_id)
+        .select(pl.col("id"))
+        .unique()
+        .collect()
+        .get_column("id")
+        .to_list()
+    )
+
+
+def list_field_is_in(column: str, field: str, values: list[str]) -> pl.Expr:
+    return pl.col(column).list.eval(pl.element().struct.field(field).is_in(values)).list.any()
+
+
+def institution_dois(in_dir: pathlib.Path, identifiers: list[str]) -> list[pl.LazyFrame]:
+    queries = [
+        ("openalex_works", "openalex_works", "doi", list_field_is_in("institutions", "ror", identifiers)),
+        (
+            "datacite",
+            "datacite_works",
+            "doi",
+            list_field_is_in("institutions", "affiliation_identifier", identifiers),
+        ),
+        (
+            "crossref_metadata",
+            "crossref_works_affiliations",
+            "work_doi",
+            pl.col("affiliation_id").is_in(identifiers),
+        ),
+    ]
+    return select_dois(in_dir, queries)
+
+
+def funder_dois(in_dir: pathlib.Path, identifiers: list[str]) -> list[pl.LazyFrame]:
+    queries = [
+        ("openalex_works", "openalex_works", "doi", list_field_is_in("grants", "funder_id", identifiers)),
+        ("datacite", "datacite_works", "doi", list_field_is_in("funders", "funder_identifier", identifiers)),
+        ("crossref_metadata", "crossref_works_funders", "work_doi", pl.col("funder_doi").is_in(identifiers)),
+    ]
+    return select_dois(in_dir, queries)
+
+
+def sampled_dois(in_dir: pathlib.Path, fraction: float, seed: int) -> list[pl.LazyFrame]:
+    # Hashing the DOI, rather than sampling rows, selects the same DOIs from every source
+    threshold = int(fraction * 2**32)
+    queries = [
+        (dataset, table, key, (pl.col(key).hash(seed=seed) % 2**32) < threshold)
+        for dataset, table, key in [
+            ("openalex_works", "openalex_works", "doi"),
+            ("datacite", "datacite_works", "doi"),
+            ("crossref_metadata", "crossref_works", "doi"),
+        ]
+    ]
+    return select_dois(in_dir, queries)
+
+
+def select_dois(in_dir: pathlib.Path, queries: list[tuple[str, str, str, pl.Expr]]) -> list[pl.LazyFrame]:
+    frames = []
+    for dataset, table, key, predicate in queries:
+        lz = scan_table(in_dir, dataset, table)
+        if lz is not None:
+            frames.append(lz.filter(predicate).select(doi=pl.col(key)))
+    return frames
+
+
+def select_seed_dois(
+    in_dir: pathlib.Path,
+    ror_id: Optional[str] = None,
+    funder_ror_id: Optional[str] = None,
+    sample_fraction: Optional[float] = None,
+    seed: int = 42,
+) -> list[str]:
+    frames = []
+    if ror_id is not None:
+        identifiers = ror_identifiers(in_dir, ror_id)
+        log.info(f"Selecting works affiliated with {ror_id} using identifiers: {identifiers}")
+        frames.extend(institution_dois(in_dir, identifiers))
+
+    if funder_ror_id is not None:
+        identifiers = ror_identifiers(in_dir, funder_ror_id) + openalex_funder_ids(in_dir, funder_ror_id)
+        log.info(f"Selecting works funded by {funder_ror_id} using identifiers: {identifiers}")
+        frames.extend(funder_dois(in_dir, identifiers))
+
+    if sample_fraction is not None:
+        log.info(f"Selecting a {sample_fraction} sample of works with seed {seed}")
+        frames.extend(sampled_dois(in_dir, sample_fraction, seed))
+
+    if not frames:
+        raise ValueError("select_seed_dois: at least one of ror_id, funder_ror_id or sample_fraction must be set")
+
+    return (
+        pl.concat(frames).filter(pl.col("doi").is_not_null()).unique().sort("doi").collect().get_column("doi").to_list()
+    )
+
+
+@timed
+def create_demo_subset(
+    in_dir: pathlib.Path,
+    out_dir: pathlib.Path,
+    ror_id: Optional[str] = None,
+    funder_ror_id: Optional[str] = None,
+    sample_fraction: Optional[float] = None,
+    seed: int = 42,
+):
+    """Create a demo subset from transformed Parquet files. Seed DOIs are selected by institution, funder
+    and / or a random sample, then every row for those DOIs is copied from each source's tables, so that the
+    subset is consistent across Crossref Metadata, DataCite and OpenAlex Works.
+
+    :param in_dir: the transform directory, containing a sub-directory for each dataset.
+    :param out_dir: the output directory, the subset is saved with the same layout as in_dir.
+    :param ror_id: select works with an author affiliated with this ROR ID.
+    :param funder_ror_id: select works funded by the funder with this ROR ID.
+    :param sample_fraction: select a random fraction of all works.
+    :param seed: the seed for the random sample.
+    """
+
+    is_empty = next(out_dir.iterdir(), None) is None
+    if not is_empty:
+        raise Exception(f"Output directory is not empty: {out_dir}")
+
+    dois = select_seed_dois(
+        in_dir, ror_id=ror_id, funder_ror_id=funder_ror_id, sample_fraction=sample_fraction, seed=seed
+    )
+    log.info(f"Selected {len(dois):,} seed DOIs")
+    pl.DataFrame({"doi": dois}).write_parquet(out_dir / "demo_subset_dois.parquet")
+
+    for dataset, tables in WORK_TABLES.items():
+        parquets_dir = out_dir / dataset / "parquets"
+        parquets_dir.mkdir(parents=True, exist_ok=True)
+        for table, key in tables.items():
+            lz = scan_table(in_dir, dataset, table)
+            if lz is None:
+                continue
+
+            # A single pass over each table, the filter is pushed down into the Parquet scan
+            file_path = parquets_dir / f"{table}_00000.parquet"
+            lz.filter(pl.col(key).is_in(dois)).sink_parquet(file_path, compression="snappy")
+            n_rows = pl.scan_parquet(file_path).select(pl.len()).collect().item()
+            log.info(f"Saved {n_rows:,} rows from {dataset}.{table}: {file_path}")
+
+    for dataset in LOOKUP_DATASETS:
+        src = in_dir / dataset / "parquets"
+        if not src.exists():
+            log.warning(f"Skipping {dataset}, directory does not exist: {src}")
+            continue
+        dst = out_dir / dataset / "parquets"
+        log.info(f"Copying {dataset}: {src} to {dst}")
+        shutil.copytree(src, dst)
@@ -1,11 +1,19 @@
 import logging
 import os
 import pathlib
+from typing import Optional
 
 import dmpworks.polars_expr_plugin as pe
 import polars as pl
+from dmpworks.funders.award_id_expr import parse_award_text
 from dmpworks.transform.pipeline import process_files_parallel
-from dmpworks.transform.transforms import clean_string, extract_orcid, normalise_identifier, replace_with_null
+from dmpworks.transform.transforms import (
+    clean_string,
+    normalise_doi,
+    normalise_orcid,
+    normalise_ror,
+    replace_with_null,
+)
 from dmpworks.transform.utils_file import read_jsonls
 from polars._typing import SchemaDefinition
 
@@ -94,14 +102,6 @@ SCHEMA: SchemaDefinition = {
 }
 
 
-def dmp_id_to_doi(expr: pl.Expr) -> pl.Expr:
-    return (
-        pl.when(expr.is_not_null())
-        .then(expr.cast(pl.String).str.to_lowercase().str.strip_chars().str.replace("doi.org/", ""))
-        .otherwise(None)
-    )
-
-
 def clean_name(expr: pl.Expr) -> pl.Expr:
     cleaned = expr.str.strip_chars()
 
@@ -121,7 +121,7 @@ def clean_name(expr: pl.Expr) -> pl.Expr:
 def transform(lz: pl.LazyFrame) -> list[tuple[str, pl.LazyFrame]]:
     dmps = lz.select(
         # dmp_id: strip doi.org/ prefix
-        doi=dmp_id_to_doi(pl.col("dmp_id")),
+        doi=normalise_doi(pl.col("dmp_id")),
         created=pl.col("created"),
         registered=pl.col("registered"),
         modified=pl.col("modified"),
@@ -136,7 +136,7 @@ def transform(lz: pl.LazyFrame) -> list[tuple[str, pl.LazyFrame]]:
         .list.eval(
             pl.struct(
                 name=clean_string(pl.element().struct.field("name")),
-                ror=clean_string(pl.element().struct.field("ror")),
+                ror=normalise_ror(pl.element().struct.field("ror")),
             )
         )
         .list.eval(
@@ -150,7 +150,7 @@ def transform(lz: pl.LazyFrame) -> list[tuple[str, pl.LazyFrame]]:
         .list.eval(
             pl.struct(
                 [
-                    extract_orcid(pl.element().struct.field("orcid")).alias("orcid"),
+                    normalise_orcid(pl.element().struct.field("orcid")).alias("orcid"),
                     pe.parse_name(pl.element().struct.field("name")).struct.unnest(),
                 ]
             )
@@ -182,7 +182,7 @@ def transform(lz: pl.LazyFrame) -> list[tuple[str, pl.LazyFrame]]:
                     name=clean_string(
                         pl.element().struct.field("funder").struct.field("name"),
                     ),
-                    ror=normalise_identifier(pl.element().struct.field("funder").struct.field("id")),
+                    ror=normalise_ror(pl.element().struct.field("funder").struct.field("id")),
                 ),
                 status=pl.element().struct.field("status"),
                 funding_opportunity_id=replace_with_null(
@@ -207,6 +207,20 @@ def transform(lz: pl.LazyFrame) -> list[tuple[str, pl.LazyFrame]]:
             )
         )
         .list.drop_nulls(),
+    ).with_columns(
+        # awards: NIH and NSF award IDs parsed from funding_opportunity_id and award_id
+        awards=pl.col("funding")
+        .list.eval(
+            parse_award_text(
+                pl.element().struct.field("funder").struct.field("ror"),
+                pl.concat_str(
+                    [pl.element().struct.field("funding_opportunity_id"), pl.element().struct.field("award_id")],
+                    separator=",",
+                    ignore_nulls=True,
+                ),
+            )
+        )
+        .list.eval(pl.element().explode()),
     )
 
     return [
@@ -227,6 +241,13 @@ def transform_dmps(
     max_file_processes: int = os.cpu_count(),
     n_batches: int = None,
     low_memory: bool = False,
+    source_uri: Optional[str] = None,
+    download_workers: int = 2,
+    disk_budget_gb: float = 50.0,
+    target_uri: Optional[str] = None,
+    upload_workers: int = 1,
+    shard_index: Optional[int] = None,
+    shard_count: int = 1,
 ):
     process_files_parallel(
         # Non customizable parameters, specific to DMPs
@@ -247,4 +268,11 @@ def transform_dmps(
         max_file_processes=max_file_processes,
         n_batches=n_batches,
         low_memory=low_memory,
+        source_uri=source_uri,
+        download_workers=download_workers,
+        disk_budget_gb=disk_budget_gb,
+        target_uri=target_uri,
+        upload_workers=upload_workers,
+        shard_index=shard_index,
+        shard_count=shard_count,
     )
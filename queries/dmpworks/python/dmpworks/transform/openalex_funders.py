@@ -1,6 +1,7 @@
 import logging
 import os
 import pathlib
+from typing import Optional
 
 import polars as pl
 from dmpworks.transform.openalex_works import normalise_ids
@@ -50,6 +51,13 @@ def transform_openalex_funders(
     max_file_processes: int = os.cpu_count(),
     n_batches: int = None,
     low_memory: bool = False,
+    source_uri: Optional[str] = None,
+    download_workers: int = 2,
+    disk_budget_gb: float = 50.0,
+    target_uri: Optional[str] = None,
+    upload_workers: int = 1,
+    shard_index: Optional[int] = None,
+    shard_count: int = 1,
 ):
     process_files_parallel(
         # Non customizable parameters, specific to Crossref Metadata
@@ -70,4 +78,11 @@ def transform_openalex_funders(
         max_file_processes=max_file_processes,
         n_batches=n_batches,
         low_memory=low_memory,
+        source_uri=source_uri,
+        download_workers=download_workers,
+        disk_budget_gb=disk_budget_gb,
+        target_uri=target_uri,
+        upload_workers=upload_workers,
+        shard_index=shard_index,
+        shard_count=shard_count,
     )
@@ -1,11 +1,19 @@
 import logging
 import os
 import pathlib
+from typing import Optional
 
 import dmpworks.polars_expr_plugin as pe
 import polars as pl
+from dmpworks.funders.award_id_expr import parse_award_text
 from dmpworks.transform.pipeline import process_files_parallel
-from dmpworks.transform.transforms import clean_string, normalise_identifier
+from dmpworks.transform.transforms import (
+    clean_string,
+    normalise_doi,
+    normalise_identifier,
+    normalise_orcid,
+    normalise_ror,
+)
 from dmpworks.transform.utils_file import read_jsonls
 from polars._typing import SchemaDefinition
 
@@ -74,8 +82,16 @@ WORKS_SCHEMA: SchemaDefinition = {
 
 
 def normalise_ids(expr: pl.Expr, field_names: list[str]) -> pl.Expr:
+    # DOIs are canonicalised, other IDs e.g. MAG and PubMed IDs only have their URL prefix removed
     return pl.struct(
-        [normalise_identifier(expr.struct.field(field_name)).alias(field_name) for field_name in field_names]
+        [
+            normalise_doi(expr.struct.field("doi")).alias("doi"),
+            *[
+                normalise_identifier(expr.struct.field(field_name)).alias(field_name)
+                for field_name in field_names
+                if field_name != "doi"
+            ],
+        ]
     )
 
 
@@ -84,7 +100,7 @@ def transform_works(lz: pl.LazyFrame) -> list[tuple[str, pl.LazyFrame]]:
 
     works = lz_cached.select(
         id=normalise_identifier(pl.col("id")),
-        doi=normalise_identifier(pl.col("doi")),
+        doi=normalise_doi(pl.col("doi")),
         ids=normalise_ids(pl.col("ids"), ["doi", "mag", "openalex", "pmid", "pmcid"]),
         title=clean_string(pl.col("title")),
         abstract=clean_string(pe.revert_inverted_index(pl.col("abstract_inverted_index"))),
@@ -96,7 +112,7 @@ def transform_works(lz: pl.LazyFrame) -> list[tuple[str, pl.LazyFrame]]:
         .list.eval(
             pl.struct(
                 [
-                    normalise_identifier(pl.element().struct.field("author").struct.field("orcid")).alias("orcid"),
+                    normalise_orcid(pl.element().struct.field("author").struct.field("orcid")).alias("orcid"),
                     pe.parse_name(pl.element().struct.field("author").struct.field("display_name")).struct.unnest(),
                 ]
             )
@@ -148,6 +164,7 @@ def transform_works(lz: pl.LazyFrame) -> list[tuple[str, pl.LazyFrame]]:
     institutions = (
         lz_cached.select(
             work_id=normalise_identifier(pl.col("id")),
+            work_doi=normalise_doi(pl.col("doi")),
             authorships=pl.col("authorships"),
         )
         .explode("authorships")
@@ -156,8 +173,9 @@ def transform_works(lz: pl.LazyFrame) -> list[tuple[str, pl.LazyFrame]]:
         .unnest("institutions")
         .select(
             pl.col("work_id"),
+            pl.col("work_doi"),
             name=pl.col("display_name"),
-            ror=normalise_identifier(pl.col("ror")),
+            ror=normalise_ror(pl.col("ror")),
         )
         .filter(pl.any_horizontal([pl.col(field).is_not_null() for field in ["name", "ror"]]))
         .unique(maintain_order=True)
@@ -177,11 +195,45 @@ def transform_works(lz: pl.LazyFrame) -> list[tuple[str, pl.LazyFrame]]:
         institutions=pl.col("institutions").fill_null(pl.lit([]).cast(inst_dtype))
     )
 
+    # Flat child tables, so that downstream queries don't need to unnest the lists in openalex_works
+    works_authors = explode_with_pos(works, "authors")
+    works_grants = explode_with_pos(works, "grants").with_columns(
+        awards=parse_award_text(pl.col("funder_id"), pl.col("award_id"))
+    )
+    works_institutions = institutions.select(
+        pl.col("work_id"),
+        pl.col("work_doi"),
+        pos=pl.int_range(pl.len(), dtype=pl.UInt32).over("work_id"),
+        name=pl.col("name"),
+        ror=pl.col("ror"),
+    )
+
     return [
         ("openalex_works", openalex_works),
+        ("openalex_works_authors", works_authors),
+        ("openalex_works_grants", works_grants),
+        ("openalex_works_institutions", works_institutions),
     ]
 
 
+def explode_with_pos(works: pl.LazyFrame, column: str) -> pl.LazyFrame:
+    """Explode a list column of works into one row per item, keyed by work ID and DOI, with the position of the item
+    in the list.
+    """
+
+    return (
+        works.select(
+            work_id=pl.col("id"),
+            work_doi=pl.col("doi"),
+            pos=pl.int_ranges(pl.col(column).list.len(), dtype=pl.UInt32),
+            item=pl.col(column),
+        )
+        .explode(["pos", "item"])
+        .filter(pl.col("item").is_not_null())
+        .unnest("item")
+    )
+
+
 def transform_openalex_works(
     in_dir: pathlib.Path,
     out_dir: pathlib.Path,
@@ -195,6 +247,13 @@ def transform_openalex_works(
     max_file_processes: int = os.cpu_count(),
     n_batches: int = None,
     low_memory: bool = False,
+    source_uri: Optional[str] = None,
+    download_workers: int = 2,
+    disk_budget_gb: float = 50.0,
+    target_uri: Optional[str] = None,
+    upload_workers: int = 1,
+    shard_index: Optional[int] = None,
+    shard_count: int = 1,
 ):
     process_files_parallel(
         # Non customizable parameters, specific to Crossref Metadata
@@ -215,4 +274,11 @@ def transform_openalex_works(
         max_file_processes=max_file_processes,
         n_batches=n_batches,
         low_memory=low_memory,
+        source_uri=source_uri,
+        download_workers=download_workers,
+        disk_budget_gb=disk_budget_gb,
+        target_uri=target_uri,
+        upload_workers=upload_workers,
+        shard_index=shard_index,
+        shard_count=shard_count,
     )
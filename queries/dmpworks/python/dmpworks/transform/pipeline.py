@@ -7,12 +7,17 @@ import shutil
 import threading
 from abc import ABC, abstractmethod
 from concurrent.futures import as_completed, ProcessPoolExecutor
-from pathlib import Path
+from dataclasses import dataclass
+from fnmatch import fnmatch
+from pathlib import Path, PurePosixPath
 from typing import Callable, Optional
 
+import boto3
+import orjson
 from tqdm import tqdm
 
 import polars as pl
+from dmpworks.batch.utils import list_s3_objects, parse_s3_uri
 from dmpworks.transform.utils_file import extract_gzip, read_jsonls, write_parquet
 from dmpworks.utils import timed, to_batches
 from polars._typing import SchemaDefinition
@@ -20,6 +25,137 @@ from polars._typing import SchemaDefinition
 TransformFunc = Callable[[pl.LazyFrame], list[tuple[str, pl.LazyFrame]]]
 
 log = logging.getLogger(__name__)
+GB = 1024**3
+ARRAY_INDEX_ENV = "AWS_BATCH_JOB_ARRAY_INDEX"
+MANIFEST_FILE = "manifest.jsonl"
+
+
+def match_glob(path: str, pattern: str) -> bool:
+    """Match a relative S3 key against a Path.glob pattern, e.g. *.jsonl.gz or **/*.gz."""
+
+    path = PurePosixPath(path)
+    if pattern.startswith("**/"):
+        return fnmatch(path.name, pattern.removeprefix("**/"))
+    return len(path.parts) == len(PurePosixPath(pattern).parts) and path.match(pattern)
+
+
+def resolve_shard_index(shard_index: Optional[int], shard_count: int) -> int:
+    """Return the shard to process, defaulting to the AWS Batch array job index when shard_index isn't given."""
+
+    if shard_count < 1:
+        raise ValueError(f"shard_count must be at least 1: {shard_count}")
+    if shard_index is None:
+        shard_index = int(os.environ.get(ARRAY_INDEX_ENV, "0"))
+    if not 0 <= shard_index < shard_count:
+        raise ValueError(f"shard_index must be between 0 and {shard_count - 1}: {shard_index}")
+    return shard_index
+
+
+def shard_manifest_name(shard_index: int) -> str:
+    return f"manifest_shard_{shard_index:05d}.jsonl"
+
+
+def shard_info_name(shard_index: int) -> str:
+    return f"manifest_shard_{shard_index:05d}.json"
+
+
+@dataclass
+class S3Object:
+    key: str
+    size: int
+
+
+class FileDownloader:
+    """Downloads the objects below an S3 prefix to the same relative paths below a local directory."""
+
+    def __init__(self, source_uri: str, out_dir: Path):
+        self.bucket, self.prefix = parse_s3_uri(source_uri)
+        self.out_dir = out_dir
+        # boto3 clients are thread safe, so the download workers share one
+        self.s3_client = boto3.client("s3")
+
+    def list_objects(self, file_glob: str) -> list[S3Object]:
+        objects = []
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for obj in page.get("Contents", []):
+                if match_glob(obj["Key"].removeprefix(self.prefix), file_glob):
+                    objects.append(S3Object(key=obj["Key"], size=obj["Size"]))
+        return objects
+
+    def __call__(self, obj: S3Object) -> Path:
+        out_file = self.out_dir / obj.key.removeprefix(self.prefix)
+        out_file.parent.mkdir(parents=True, exist_ok=True)
+        self.s3_client.download_file(self.bucket, obj.key, str(out_file))
+        return out_file
+
+
+class FileUploader:
+    """Uploads the Parquet files of a batch to the same relative paths below an S3 prefix, deletes the local copies and
+    records them in a manifest, manifest.jsonl by default, which is uploaded once every batch has been."""
+
+    def __init__(self, target_uri: str, out_dir: Path, manifest_name: str = MANIFEST_FILE):
+        self.bucket, self.prefix = parse_s3_uri(target_uri)
+        self.out_dir = out_dir
+        self.manifest_file = out_dir / manifest_name
+        self.lock = threading.Lock()
+        self.s3_client = boto3.client("s3")
+
+    def __call__(self, idx: int) -> list[Path]:
+        files = sorted((self.out_dir / "parquets").glob(f"*_{idx:05d}.parquet"))
+        entries = []
+        for file in files:
+            relative_path = file.relative_to(self.out_dir).as_posix()
+            entries.append({"file": relative_path, "batch": idx, "size": file.stat().st_size})
+            self.s3_client.upload_file(str(file), self.bucket, f"{self.prefix}{relative_path}")
+            file.unlink()
+
+        with self.lock, open(self.manifest_file, mode="ab") as f:
+            for entry in entries:
+                f.write(orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE))
+        return files
+
+    def upload_manifest(self):
+        self.manifest_file.touch()
+        self.s3_client.upload_file(str(self.manifest_file), self.bucket, f"{self.prefix}{self.manifest_file.name}")
+
+    def upload_shard_info(self, shard_index: int, shard_info: dict):
+        self.s3_client.put_object(
+            Bucket=self.bucket, Key=f"{self.prefix}{shard_info_name(shard_index)}", Body=orjson.dumps(shard_info)
+        )
+
+
+class DiskBudget:
+    """Limits the bytes of downloaded files on disk at once. Downloads block until the files of earlier batches have
+    been extracted and deleted. A batch larger than the budget is downloaded once nothing else is on disk, so that the
+    pipeline can't deadlock."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        self.cancelled = False
+        self.condition = threading.Condition()
+
+    def acquire(self, n_bytes: int):
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.cancelled or self.used_bytes == 0 or self.used_bytes + n_bytes <= self.max_bytes
+            )
+            if self.cancelled:
+                raise RuntimeError("Disk budget cancelled, the pipeline is stopping")
+            self.used_bytes += n_bytes
+
+    def release(self, n_bytes: int):
+        with self.condition:
+            self.used_bytes -= n_bytes
+            self.condition.notify_all()
+
+    def cancel(self):
+        """Wake up and fail the downloads waiting for room on disk, so that the pipeline can stop."""
+
+        with self.condition:
+            self.cancelled = True
+            self.condition.notify_all()
 
 
 class FileExtractor:
@@ -60,20 +196,37 @@ class BatchTransformer:
             write_parquet(lz_frame, parquet_file)
 
 
+@dataclass
+class BatchError:
+    """Put on the completed queue by a worker when it fails to process a batch, so that the pipeline stops."""
+
+    worker: str
+    idx: int
+    error: Exception
+
+
 class BaseWorker(threading.Thread, ABC):
     def __init__(
         self,
         *,
         input_queue: queue.Queue,
         output_queue: queue.Queue,
+        error_queue: Optional[queue.Queue] = None,
+        stop_event: Optional[threading.Event] = None,
         name: Optional[str] = None,
         log_level: int = logging.INFO,
     ):
         super().__init__(name=name)  # daemon=False,
         self.input_queue = input_queue
         self.output_queue = output_queue
+        self.error_queue = error_queue
+        self.stop_event = stop_event
         self.log_level = log_level
 
+    @property
+    def stopping(self) -> bool:
+        return self.stop_event is not None and self.stop_event.is_set()
+
     def run(self):
         log.debug("running worker")
 
@@ -88,9 +241,18 @@ class BaseWorker(threading.Thread, ABC):
             idx, batch = task
             log.debug(f"Picked up task batch={idx}")
             try:
-                self.process_task(idx, batch)
-            except Exception:
-                log.exception(f"Error processing batch={idx}")
+                # Once the pipeline is stopping, the batches still queued are skipped so that the workers exit quickly
+                if self.stopping:
+                    log.debug(f"Skipping batch={idx}, the pipeline is stopping")
+                else:
+                    self.process_task(idx, batch)
+            except Exception as e:
+                if self.stopping:
+                    log.debug(f"Error processing batch={idx} while the pipeline is stopping: {e}")
+                else:
+                    log.exception(f"Error processing batch={idx}")
+                    if self.error_queue is not None:
+                        self.error_queue.put(BatchError(worker=self.name, idx=idx, error=e))
             finally:
                 self.input_queue.task_done()
                 log.debug(f"Task done batch={idx}")
@@ -111,6 +273,47 @@ def init_process_logs(level: int):
     logging.basicConfig(level=level, format="[%(asctime)s] [%(levelname)s] [%(processName)s] %(message)s")
 
 
+class DownloadWorker(BaseWorker):
+    def __init__(
+        self,
+        *,
+        input_queue: queue.Queue,
+        output_queue: queue.Queue,
+        file_downloader: FileDownloader,
+        disk_budget: DiskBudget,
+        error_queue: Optional[queue.Queue] = None,
+        stop_event: Optional[threading.Event] = None,
+        name: str = None,
+        log_level: int = logging.INFO,
+    ):
+        super().__init__(
+            input_queue=input_queue,
+            output_queue=output_queue,
+            error_queue=error_queue,
+            stop_event=stop_event,
+            name=name,
+            log_level=log_level,
+        )
+        self.file_downloader = file_downloader
+        self.disk_budget = disk_budget
+
+    def process_task(self, idx: int, batch: list[S3Object]):
+        # Wait until there is room on disk for the batch, then download its files
+        n_bytes = sum(obj.size for obj in batch)
+        self.disk_budget.acquire(n_bytes)
+        log_stage(log, "DOWNLOAD", "start", idx)
+        try:
+            downloaded_files = [self.file_downloader(obj) for obj in batch]
+        except Exception:
+            # The batch won't reach the extract workers, which would otherwise release its bytes
+            self.disk_budget.release(n_bytes)
+            raise
+
+        # Queue output
+        self.output_queue.put((idx, downloaded_files))
+        log_stage(log, "DOWNLOAD", "end", idx)
+
+
 class ExtractWorker(BaseWorker):
     def __init__(
         self,
@@ -119,12 +322,23 @@ class ExtractWorker(BaseWorker):
         output_queue: queue.Queue,
         file_extractor: Optional[FileExtractor] = None,
         max_processes: int = os.cpu_count(),
+        disk_budget: Optional[DiskBudget] = None,
+        error_queue: Optional[queue.Queue] = None,
+        stop_event: Optional[threading.Event] = None,
         name: str = None,
         log_level: int = logging.INFO,
     ):
-        super().__init__(input_queue=input_queue, output_queue=output_queue, name=name, log_level=log_level)
+        super().__init__(
+            input_queue=input_queue,
+            output_queue=output_queue,
+            error_queue=error_queue,
+            stop_event=stop_event,
+            name=name,
+            log_level=log_level,
+        )
         self.file_extractor = file_extractor
         self.max_processes = max_processes
+        self.disk_budget = disk_budget
         self.executor: Optional[ProcessPoolExecutor] = None
 
     def run(self):
@@ -145,15 +359,26 @@ class ExtractWorker(BaseWorker):
         log_stage(log, "EXTRACT", "start", idx)
 
         futures = []
-        if self.file_extractor is not None:
-            for file in batch:
-                futures.append(self.executor.submit(self.file_extractor, file))
-
-        # Wait for batch to finish
         extracted_files = []
-        for future in as_completed(futures):
-            file_path = future.result()
-            extracted_files.append(file_path)
+        try:
+            if self.file_extractor is not None:
+                for file in batch:
+                    futures.append(self.executor.submit(self.file_extractor, file))
+
+            # Wait for batch to finish
+            for future in as_completed(futures):
+                file_path = future.result()
+                extracted_files.append(file_path)
+        finally:
+            # Downloaded files aren't needed once they have been extracted, or the extraction failed, delete them to
+            # make room for later batches
+            if self.disk_budget is not None:
+                n_bytes = 0
+                for file in batch:
+                    if file.exists():
+                        n_bytes += file.stat().st_size
+                        file.unlink()
+                self.disk_budget.release(n_bytes)
 
         # Queue output
         self.output_queue.put((idx, extracted_files))
@@ -167,10 +392,19 @@ class TransformWorker(BaseWorker):
         input_queue: queue.Queue,
         output_queue: queue.Queue,
         batch_transformer: BatchTransformer,
+        error_queue: Optional[queue.Queue] = None,
+        stop_event: Optional[threading.Event] = None,
         name: str = None,
         log_level: int = logging.INFO,
     ):
-        super().__init__(input_queue=input_queue, output_queue=output_queue, name=name, log_level=log_level)
+        super().__init__(
+            input_queue=input_queue,
+            output_queue=output_queue,
+            error_queue=error_queue,
+            stop_event=stop_event,
+            name=name,
+            log_level=log_level,
+        )
         self.batch_transformer = batch_transformer
 
     def process_task(self, idx: int, batch: list[Path]):
@@ -182,16 +416,56 @@ class TransformWorker(BaseWorker):
         log_stage(log, "TRANSFORM", "end", idx)
 
 
+class UploadWorker(BaseWorker):
+    def __init__(
+        self,
+        *,
+        input_queue: queue.Queue,
+        output_queue: queue.Queue,
+        file_uploader: FileUploader,
+        error_queue: Optional[queue.Queue] = None,
+        stop_event: Optional[threading.Event] = None,
+        name: str = None,
+        log_level: int = logging.INFO,
+    ):
+        super().__init__(
+            input_queue=input_queue,
+            output_queue=output_queue,
+            error_queue=error_queue,
+            stop_event=stop_event,
+            name=name,
+            log_level=log_level,
+        )
+        self.file_uploader = file_uploader
+
+    def process_task(self, idx: int, batch: list[Path]):
+        log_stage(log, "UPLOAD", "start", idx)
+        self.file_uploader(idx)
+
+        # Queue output
+        self.output_queue.put((idx, batch))
+        log_stage(log, "UPLOAD", "end", idx)
+
+
 class CleanupWorker(BaseWorker):
     def __init__(
         self,
         *,
         input_queue: queue.Queue,
         output_queue: queue.Queue,
+        error_queue: Optional[queue.Queue] = None,
+        stop_event: Optional[threading.Event] = None,
         name: str = None,
         log_level: int = logging.INFO,
     ):
-        super().__init__(input_queue=input_queue, output_queue=output_queue, name=name, log_level=log_level)
+        super().__init__(
+            input_queue=input_queue,
+            output_queue=output_queue,
+            error_queue=error_queue,
+            stop_event=stop_event,
+            name=name,
+            log_level=log_level,
+        )
 
     def process_task(self, idx: int, batch: list[Path]):
         log_stage(log, "CLEANUP", "start", idx)
@@ -206,8 +480,13 @@ class Pipeline:
         *,
         file_extractor: Optional[FileExtractor],
         batch_transformer: BatchTransformer,
+        file_downloader: Optional[FileDownloader] = None,
+        disk_budget: Optional[DiskBudget] = None,
+        file_uploader: Optional[FileUploader] = None,
+        download_workers: int = 1,
         extract_workers: int = 1,
         transform_workers: int = 1,
+        upload_workers: int = 1,
         cleanup_workers: int = 1,
         extract_queue_size: int = 0,
         transform_queue_size: int = 0,
@@ -215,16 +494,43 @@ class Pipeline:
         max_file_processes: int = os.cpu_count(),
         log_level: logging.INFO,
     ):
+        self.download_queue = queue.Queue()
         self.extract_queue = queue.Queue(maxsize=extract_queue_size)
         self.transform_queue = queue.Queue(maxsize=transform_queue_size)
+        self.upload_queue = queue.Queue()
         self.cleanup_queue = queue.Queue(maxsize=cleanup_queue_size)
         self.completed_queue = queue.Queue()
+        # Workers put a BatchError on the completed queue when a batch fails, and skip the remaining batches once the
+        # stop event is set
+        self.stop_event = threading.Event()
+        self.disk_budget = disk_budget
+        # When the files are downloaded from S3, the batches are queued for download, and the download workers queue
+        # them for extraction. How far the downloads run ahead of the transform is limited by the disk budget
+        self.download_workers = []
+        if file_downloader is not None:
+            self.download_workers = [
+                DownloadWorker(
+                    input_queue=self.download_queue,
+                    output_queue=self.extract_queue,
+                    file_downloader=file_downloader,
+                    disk_budget=disk_budget,
+                    error_queue=self.completed_queue,
+                    stop_event=self.stop_event,
+                    name=f"Download-Thread-{i}",
+                    log_level=log_level,
+                )
+                for i in range(download_workers)
+            ]
+        self.input_queue = self.download_queue if file_downloader is not None else self.extract_queue
         self.extract_workers = [
             ExtractWorker(
                 input_queue=self.extract_queue,
                 output_queue=self.transform_queue,
                 file_extractor=file_extractor,
                 max_processes=max_file_processes,
+                disk_budget=disk_budget,
+                error_queue=self.completed_queue,
+                stop_event=self.stop_event,
                 name=f"Extract-Thread-{i}",
                 log_level=log_level,
             )
@@ -233,27 +539,53 @@ class Pipeline:
         self.transform_workers = [
             TransformWorker(
                 input_queue=self.transform_queue,
-                output_queue=self.cleanup_queue,
+                output_queue=self.upload_queue if file_uploader is not None else self.cleanup_queue,
                 batch_transformer=batch_transformer,
+                error_queue=self.completed_queue,
+                stop_event=self.stop_event,
                 name=f"Transform-Thread-{i}",
                 log_level=log_level,
             )
             for i in range(transform_workers)
         ]
+        # When the Parquet files are uploaded to S3, each batch's files are uploaded as soon as it has been transformed
+        self.upload_workers = []
+        if file_uploader is not None:
+            self.upload_workers = [
+                UploadWorker(
+                    input_queue=self.upload_queue,
+                    output_queue=self.cleanup_queue,
+                    file_uploader=file_uploader,
+                    error_queue=self.completed_queue,
+                    stop_event=self.stop_event,
+                    name=f"Upload-Thread-{i}",
+                    log_level=log_level,
+                )
+                for i in range(upload_workers)
+            ]
         self.cleanup_workers = [
             CleanupWorker(
                 input_queue=self.cleanup_queue,
                 output_queue=self.completed_queue,
+                error_queue=self.completed_queue,
+                stop_event=self.stop_event,
                 name=f"Cleanup-Thread-{i}",
                 log_level=log_level,
             )
             for i in range(cleanup_workers)
         ]
 
-    def start(self, batches: list[list[Path]]):
+    def start(self, batches: list[tuple[int, list[Path]]] | list[tuple[int, list[S3Object]]]):
         num_batches = len(batches)
-        workers = self.extract_workers + self.transform_workers + self.cleanup_workers
+        workers = (
+            self.download_workers
+            + self.extract_workers
+            + self.transform_workers
+            + self.upload_workers
+            + self.cleanup_workers
+        )
 
+        num_completed = 0
         try:
             # Start workers
             for worker in workers:
@@ -264,19 +596,20 @@ class Pipeline:
                 desc="Transformation Pipeline",
                 unit="batch",
             ) as pbar:
-                # Fill extract queue
-                for idx, batch in enumerate(batches):
+                # Fill download or extract queue
+                for idx, batch in batches:
                     log.debug(f"Queuing batch: {idx}")
-                    self.extract_queue.put((idx, batch))
+                    self.input_queue.put((idx, batch))
 
                 # Wait for tasks to complete
-                num_completed = 0
                 while num_completed < len(batches):
                     try:
                         idx = self.completed_queue.get(timeout=1)
                         log.debug(f"Task completed: {idx}")
                         if idx is None:
                             break
+                        if isinstance(idx, BatchError):
+                            raise RuntimeError(f"Batch {idx.idx} failed in {idx.worker}") from idx.error
 
                         num_completed += 1
                         pbar.update(1)
@@ -288,11 +621,20 @@ class Pipeline:
         except KeyboardInterrupt:
             log.info("Interrupted by user")
         finally:
+            # Stop processing the remaining batches when a batch failed or the pipeline was interrupted, and wake up
+            # the downloads waiting for room on disk
+            if num_completed < num_batches:
+                self.stop_event.set()
+                if self.disk_budget is not None:
+                    self.disk_budget.cancel()
+
             # Signal shutdown
             # Each worker will eventually get a None
             for q, ws in [
+                (self.download_queue, self.download_workers),
                 (self.extract_queue, self.extract_workers),
                 (self.transform_queue, self.transform_workers),
+                (self.upload_queue, self.upload_workers),
                 (self.cleanup_queue, self.cleanup_workers),
             ]:
                 for _ in ws:
@@ -333,9 +675,40 @@ def process_files_parallel(
     max_file_processes: int = os.cpu_count(),
     n_batches: Optional[int] = None,
     low_memory: bool = False,
+    source_uri: Optional[str] = None,
+    download_workers: int = 2,
+    disk_budget_gb: float = 50.0,
+    target_uri: Optional[str] = None,
+    upload_workers: int = 1,
+    shard_index: Optional[int] = None,
+    shard_count: int = 1,
     log_level: int = logging.INFO,
 ):
+    """Extract, transform and write batches of files to Parquet in a pipeline.
+
+    When source_uri is set, the files matching file_glob below the S3 URI are downloaded to in_dir batch by batch as
+    a stage of the pipeline, rather than being read from in_dir, so that early batches are transformed while later
+    ones download. Downloaded files are deleted once they have been extracted, and downloads wait while more than
+    disk_budget_gb of downloaded files are on disk.
+
+    When target_uri is set, each batch's Parquet files are uploaded below target_uri, with the same relative paths as
+    below out_dir, as soon as the batch has been transformed, and then deleted. The uploaded files are listed in
+    manifest.jsonl, which is uploaded to target_uri at the end. When a batch fails in any stage, including its upload,
+    a RuntimeError is raised and the manifest isn't uploaded.
+
+    When shard_count is greater than 1, the files are sorted and batched as in a single run, and only every
+    shard_count-th batch, starting at shard_index, is processed, keeping its batch index, so that the shards of an
+    AWS Batch array job write disjoint Parquet files with the same names as a single run. shard_index defaults to the
+    AWS_BATCH_JOB_ARRAY_INDEX environment variable. Each shard uploads its own manifest, which merge_shard_manifests
+    combines into manifest.jsonl once every shard has finished. Alongside its manifest, each shard uploads the
+    batch_size, the number of batches and the source files it batched, which merge_shard_manifests checks agree across
+    the shards, as batch_size defaults to the CPU count, which differs between instance types.
+    """
+
+    shard_index = resolve_shard_index(shard_index, shard_count)
+
     log.info(f"in_dir: {in_dir}")
+    log.info(f"source_uri: {source_uri}")
     log.info(f"out_dir: {out_dir}")
     log.info(f"schema: {schema}")
     log.info(f"transform_func: {transform_func.__name__}")
@@ -349,6 +722,12 @@ def process_files_parallel(
     log.info(f"max_file_processes: {max_file_processes}")
     log.info(f"n_batches: {n_batches}")
     log.info(f"low_memory: {low_memory}")
+    log.info(f"download_workers: {download_workers}")
+    log.info(f"disk_budget_gb: {disk_budget_gb}")
+    log.info(f"target_uri: {target_uri}")
+    log.info(f"upload_workers: {upload_workers}")
+    log.info(f"shard_index: {shard_index}")
+    log.info(f"shard_count: {shard_count}")
     log.info(f"log_level: {logging.getLevelName(log_level)}")
 
     # Cleanup existing output directory
@@ -360,15 +739,32 @@ def process_files_parallel(
     batch_transformer = BatchTransformer(read_func, transform_func, schema, low_memory, out_dir)
 
     # Process batches in parallel
-    files = list(Path(in_dir).glob(file_glob))
-    batches = list(to_batches(files, batch_size))
+    file_downloader = None
+    disk_budget = None
+    if source_uri is not None:
+        file_downloader = FileDownloader(source_uri, in_dir)
+        disk_budget = DiskBudget(int(disk_budget_gb * GB))
+        files = sorted(file_downloader.list_objects(file_glob), key=lambda obj: obj.key)
+    else:
+        files = sorted(Path(in_dir).glob(file_glob))
+    all_batches = list(enumerate(to_batches(files, batch_size)))
     if n_batches is not None:
-        batches = batches[:n_batches]
+        all_batches = all_batches[:n_batches]
+    batches = [(idx, batch) for idx, batch in all_batches if idx % shard_count == shard_index]
+    file_uploader = None
+    if target_uri is not None:
+        manifest_name = MANIFEST_FILE if shard_count == 1 else shard_manifest_name(shard_index)
+        file_uploader = FileUploader(target_uri, out_dir, manifest_name)
     pipeline = Pipeline(
         file_extractor=file_extractor,
         batch_transformer=batch_transformer,
+        file_downloader=file_downloader,
+        disk_budget=disk_budget,
+        file_uploader=file_uploader,
+        download_workers=download_workers,
         extract_workers=extract_workers,
         transform_workers=transform_workers,
+        upload_workers=upload_workers,
         cleanup_workers=cleanup_workers,
         extract_queue_size=extract_queue_size,
         transform_queue_size=transform_queue_size,
@@ -377,3 +773,102 @@ def process_files_parallel(
         log_level=log_level,
     )
     pipeline.start(batches)
+
+    # The manifest is only uploaded when every batch has been, as a merge would treat a shard's manifest as finished
+    if file_uploader is not None and not pipeline.stop_event.is_set():
+        if shard_count > 1:
+            source_prefix = file_downloader.prefix if file_downloader is not None else None
+            shard_info = {
+                "shard_index": shard_index,
+                "shard_count": shard_count,
+                "batch_size": batch_size,
+                "n_batches": len(all_batches),
+                "batches": [idx for idx, _ in batches],
+                "files": [
+                    (
+                        file.key.removeprefix(source_prefix)
+                        if source_prefix is not None
+                        else file.relative_to(in_dir).as_posix()
+                    )
+                    for _, batch in all_batches
+                    for file in batch
+                ],
+            }
+            file_uploader.upload_shard_info(shard_index, shard_info)
+        file_uploader.upload_manifest()
+
+
+def merge_shard_manifests(target_uri: str, shard_count: int, *, s3_client: Optional[boto3.client] = None) -> list[dict]:
+    """Combine the manifests uploaded by the shards of a transform into manifest.jsonl below target_uri.
+
+    Raises a RuntimeError when a shard's manifest is missing, as the shard hasn't finished, when the shards batched
+    the files differently, i.e. with a different batch_size, number of batches or list of source files, or when a
+    batch wasn't processed by any shard. Parquet files below target_uri that aren't in any shard's manifest, such as
+    those left by an earlier run, are deleted, so that the output is the same as a single run.
+
+    :param target_uri: the S3 URI the shards uploaded to.
+    :param shard_count: the number of shards.
+    :param s3_client: the S3 client.
+    :return: the entries of the merged manifest.
+    """
+
+    if s3_client is None:
+        s3_client = boto3.client("s3")
+
+    bucket, prefix = parse_s3_uri(target_uri)
+    object_sizes = list_s3_objects(target_uri, s3_client=s3_client)
+    shard_manifests = [shard_manifest_name(i) for i in range(shard_count)]
+    shard_infos = [shard_info_name(i) for i in range(shard_count)]
+    missing = [name for name in shard_manifests + shard_infos if name not in object_sizes]
+    if missing:
+        raise RuntimeError(f"Missing shard manifests below {target_uri}, have all shards finished?: {missing}")
+    check_shard_infos(
+        [
+            orjson.loads(s3_client.get_object(Bucket=bucket, Key=f"{prefix}{name}")["Body"].read())
+            for name in shard_infos
+        ],
+        shard_count,
+    )
+
+    entries = []
+    for name in shard_manifests:
+        body = s3_client.get_object(Bucket=bucket, Key=f"{prefix}{name}")["Body"].read()
+        entries.extend(orjson.loads(line) for line in body.splitlines() if line)
+    entries.sort(key=lambda entry: (entry["batch"], entry["file"]))
+    body = b"".join(orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE) for entry in entries)
+    s3_client.put_object(Bucket=bucket, Key=f"{prefix}{MANIFEST_FILE}", Body=body)
+    log.info(f"Merged {len(entries)} files from {shard_count} shards into {target_uri}{MANIFEST_FILE}")
+
+    # Delete the shard manifests and any Parquet files left by earlier runs
+    files = {entry["file"] for entry in entries}
+    orphans = [path for path in object_sizes if path.startswith("parquets/") and path not in files]
+    to_delete = [f"{prefix}{path}" for path in shard_manifests + shard_infos + orphans]
+    for batch in to_batches(to_delete, 1000):
+        s3_client.delete_objects(Bucket=bucket, Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True})
+    if orphans:
+        log.info(f"Deleted {len(orphans)} Parquet files that aren't in the merged manifest: {orphans}")
+
+    return entries
+
+
+def check_shard_infos(shard_infos: list[dict], shard_count: int):
+    """Raise a RuntimeError unless the shards of a transform batched the same files in the same way, and between them
+    processed every batch.
+
+    :param shard_infos: the info uploaded by each shard, in shard index order.
+    :param shard_count: the number of shards.
+    """
+
+    for key in ["shard_count", "batch_size", "n_batches", "files"]:
+        values = [info[key] for info in shard_infos]
+        if key == "shard_count":
+            values.append(shard_count)
+        if any(value != values[0] for value in values):
+            detail = "" if key == "files" else f": {values}"
+            raise RuntimeError(f"The shards disagree on {key}, rerun them with the same settings{detail}")
+
+    n_batches = shard_infos[0]["n_batches"]
+    processed = {idx for info in shard_infos for idx in info["batches"]}
+    missing = sorted(set(range(n_batches)) - processed)
+    if missing:
+        raise RuntimeError(f"Batches weren't processed by any shard: {missing}")
@@ -4,7 +4,7 @@ import shutil
 
 import polars
 import polars as pl
-from dmpworks.transform.transforms import normalise_identifier, normalise_isni
+from dmpworks.transform.transforms import normalise_fundref, normalise_isni, normalise_ror
 from dmpworks.utils import timed
 from polars._typing import SchemaDefinition
 
@@ -25,14 +25,14 @@ def load_ror(ror_v2_json_file: pathlib.Path):
 def create_ror_index(ror_df: pl.DataFrame) -> pl.DataFrame:
     # Get all unique ROR IDs
     ror_ids = (
-        ror_df.select(ror_id=normalise_identifier(pl.col("id")))
+        ror_df.select(ror_id=normalise_ror(pl.col("id")))
         .unique()
         .with_columns(type=pl.lit("ror"), identifier=pl.col("ror_id"))
     )
 
     # Build mappings to other IDs
     other_ids = (
-        ror_df.select(ror_id=normalise_identifier(pl.col("id")), external_ids=pl.col("external_ids"))
+        ror_df.select(ror_id=normalise_ror(pl.col("id")), external_ids=pl.col("external_ids"))
         .explode("external_ids")
         .unnest("external_ids")
         .select(pl.col("ror_id"), type=pl.col("type"), identifier=pl.col("all"))
@@ -44,7 +44,7 @@ def create_ror_index(ror_df: pl.DataFrame) -> pl.DataFrame:
             identifier=pl.when(pl.col("type") == "isni")  # Clean ISNIs
             .then(normalise_isni(pl.col("identifier")))
             .when(pl.col("type") == "fundref")  # Add 10.13039 prefix to Fundref IDs
-            .then(pl.concat_str([pl.lit("10.13039/"), pl.col("identifier").str.strip_chars().str.to_lowercase()]))
+            .then(normalise_fundref(pl.col("identifier")))
             .otherwise(pl.col("identifier").str.strip_chars().str.to_lowercase()),
         )
     )
@@ -0,0 +1,654 @@
+import gzip
+import itertools
+import logging
+import pathlib
+import random
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Literal, Optional
+
+import orjson
+
+from dmpworks.utils import timed
+
+log = logging.getLogger(__name__)
+
+SyntheticDataset = Literal["crossref-metadata", "datacite", "openalex-works", "openalex-funders", "dmps", "ror"]
+
+CROCKFORD_BASE32 = "0123456789abcdefghjkmnpqrstvwxyz"
+WORDS = (
+    "analysis climate data model cell protein gene network learning system health patient cancer water soil "
+    "species population study effect method quantum energy material surface temperature response risk social "
+    "policy education survey brain neural signal image dynamics flow structure synthesis catalyst reaction "
+    "membrane receptor infection vaccine immune ocean ice carbon nitrogen forest river urban mobility economic "
+    "market trade language archive historical cultural museum genome sequencing microbial metabolism plant "
+    "crop drought seismic volcanic galaxy stellar dark matter particle detector algorithm optimisation graph "
+    "robot sensor wireless security privacy cohort trial clinical outcome mortality adolescent aging memory"
+).split()
+FIRST_NAMES = (
+    "Alice Bob Carlos Dana Eun-ji Fatima Giulia Hiro Ines Jamal Kaito Lena Mateo Nadia Olu Priya Quentin Rosa "
+    "Sven Thandiwe Uma Viktor Wei Ximena Yusuf Zoe"
+).split()
+SURNAMES = [
+    "Anderson",
+    "Brown",
+    "Chen",
+    "da Silva",
+    "Evans",
+    "Fernández",
+    "García",
+    "Haddad",
+    "Ivanova",
+    "Jones",
+    "Kim",
+    "Li",
+    "Martin",
+    "Nguyen",
+    "O'Brien",
+    "Patel",
+    "Quispe",
+    "Rossi",
+    "Smith",
+    "Tanaka",
+    "van der Berg",
+    "Wang",
+    "Xu",
+    "Yamamoto",
+    "Zhang",
+]
+CROSSREF_TYPES = ["journal-article", "book-chapter", "proceedings-article", "posted-content", "dataset", "report"]
+DATACITE_TYPES = ["Dataset", "Software", "Text", "Collection", "Image", "Other"]
+OPENALEX_TYPES = ["article", "book-chapter", "dataset", "preprint", "review", "report"]
+RELATION_TYPES = ["references", "is-supplemented-by", "is-referenced-by", "is-based-on", "has-related-material"]
+DATACITE_RELATION_TYPES = ["IsCitedBy", "Cites", "IsSupplementTo", "IsSupplementedBy", "References", "IsPartOf"]
+NIH_ACTIVITY_CODES = ["R01", "R21", "U01", "K99", "P30", "T32", "F31", "R35"]
+NIH_INSTITUTE_CODES = ["AG", "AI", "CA", "DK", "GM", "HL", "MH", "NS", "ES", "DA"]
+NSF_ORG_IDS = ["DMR", "OCE", "EAR", "CHE", "IOS", "DEB", "BCS", "CNS", "ATM", "PHY"]
+
+
+def ror_checksum(value: int) -> str:
+    # ISO/IEC 7064 Mod 97-10
+    return f"{98 - ((value * 100) % 97):02d}"
+
+
+def make_ror_id(n: int) -> str:
+    encoded = "".join(CROCKFORD_BASE32[(n >> (5 * i)) & 31] for i in reversed(range(6)))
+    return f"0{encoded}{ror_checksum(n)}"
+
+
+def mod11_2_check_digit(digits: str) -> str:
+    # ISO/IEC 7064 Mod 11-2, used by ORCID and ISNI
+    total = 0
+    for digit in digits:
+        total = (total + int(digit)) * 2
+    result = (12 - total % 11) % 11
+    return "X" if result == 10 else str(result)
+
+
+def make_orcid(n: int) -> str:
+    digits = f"{15_000_000 + n:015d}"
+    digits = digits + mod11_2_check_digit(digits)
+    return "-".join(digits[i : i + 4] for i in range(0, 16, 4))
+
+
+def make_isni(n: int) -> str:
+    digits = f"{400_000_000 + n:015d}"
+    digits = digits + mod11_2_check_digit(digits)
+    return " ".join(digits[i : i + 4] for i in range(0, 16, 4))
+
+
+@dataclass
+class Institution:
+    ror_id: str
+    name: str
+    grid_id: str
+    isni: str
+    openalex_id: str
+
+
+@dataclass
+class Funder:
+    ror_id: str
+    name: str
+    fundref_id: str
+    openalex_id: str
+    award_style: Literal["nih", "nsf", "other"]
+
+
+@dataclass
+class SyntheticStats:
+    dataset: SyntheticDataset
+    n_records: int = 0
+    n_files: int = 0
+    uncompressed_bytes: int = 0
+    compressed_bytes: int = 0
+    files: list[pathlib.Path] = field(default_factory=list)
+
+
+class ZipfSampler:
+    """Samples items with a Zipf like popularity, skew=0 is uniform and larger values concentrate on the first
+    items."""
+
+    def __init__(self, rng: random.Random, items: list, skew: float):
+        self.rng = rng
+        self.items = items
+        self.cum_weights = list(itertools.accumulate(1 / (rank**skew) for rank in range(1, len(items) + 1)))
+
+    def sample(self, k: int = 1) -> list:
+        return self.rng.choices(self.items, cum_weights=self.cum_weights, k=k)
+
+    def one(self):
+        return self.sample(1)[0]
+
+
+class SyntheticContext:
+    """Shared identifier pools, so that DOIs, institutions and funders join up across datasets."""
+
+    def __init__(
+        self,
+        n_records: int,
+        skew: float = 1.1,
+        seed: int = 42,
+        n_institutions: int = 500,
+        n_funders: int = 100,
+        max_authors: int = 100,
+        polymorphic_rate: float = 0.1,
+        duplicate_doi_rate: float = 0.0,
+        null_doi_rate: float = 0.0,
+    ):
+        self.rng = random.Random(seed)
+        self.n_records = n_records
+        self.skew = skew
+        self.polymorphic_rate = polymorphic_rate
+        self.duplicate_doi_rate = duplicate_doi_rate
+        self.null_doi_rate = null_doi_rate
+        self.institutions = [
+            Institution(
+                ror_id=make_ror_id(1_000 + i * 7_919),
+                name=f"University of {WORDS[i % len(WORDS)].title()} {i}",
+                grid_id=f"grid.{10_000 + i}.{i % 10}",
+                isni=make_isni(i),
+                openalex_id=f"I{4_000_000_000 + i}",
+            )
+            for i in range(n_institutions)
+        ]
+        funders = [
+            Funder(
+                ror_id="01cwqze88",
+                name="National Institutes of Health",
+                fundref_id="100000002",
+                openalex_id="F4320332161",
+                award_style="nih",
+            ),
+            Funder(
+                ror_id="021nxhr62",
+                name="National Science Foundation",
+                fundref_id="100000001",
+                openalex_id="F4320306076",
+                award_style="nsf",
+            ),
+        ]
+        funders += [
+            Funder(
+                ror_id=make_ror_id(900_000 + i * 104_729),
+                name=f"{WORDS[i % len(WORDS)].title()} Research Foundation {i}",
+                fundref_id=f"{501_100_000_000 + i}",
+                openalex_id=f"F{4_320_400_000 + i}",
+                award_style="other",
+            )
+            for i in range(n_funders - len(funders))
+        ]
+        self.funders = funders
+        self.institution_sampler = ZipfSampler(self.rng, self.institutions, skew)
+        self.funder_sampler = ZipfSampler(self.rng, self.funders, skew)
+        self.word_sampler = ZipfSampler(self.rng, WORDS, skew)
+        self.n_authors_sampler = ZipfSampler(self.rng, list(range(1, max_authors + 1)), skew + 1)
+
+    def crossref_doi(self, i: int) -> str:
+        return f"10.{1000 + i % 50}/cr.{i}"
+
+    def datacite_doi(self, i: int) -> str:
+        return f"10.{5000 + i % 20}/dc.{i}"
+
+    def openalex_doi(self, i: int) -> Optional[str]:
+        # Some OpenAlex works have no DOI, and some share a DOI with another work, e.g. a preprint and the published
+        # article. The random draw is skipped when both rates are zero, so the other fields don't change
+        if self.duplicate_doi_rate or self.null_doi_rate:
+            draw = self.rng.random()
+            if draw < self.null_doi_rate:
+                return None
+            if i > 0 and draw < self.null_doi_rate + self.duplicate_doi_rate:
+                i = self.rng.randrange(i)
+
+        # Most OpenAlex works overlap with Crossref Metadata, the remainder with DataCite
+        return self.datacite_doi(i) if i % 4 == 3 else self.crossref_doi(i)
+
+    def words(self, lo: int, hi: int) -> str:
+        return " ".join(self.word_sampler.sample(self.rng.randint(lo, hi)))
+
+    def title(self) -> str:
+        return self.words(4, 16).capitalize()
+
+    def abstract(self) -> str:
+        return self.words(40, 300).capitalize() + "."
+
+    def person(self) -> tuple[str, str]:
+        return self.rng.choice(FIRST_NAMES), self.rng.choice(SURNAMES)
+
+    def orcid(self) -> Optional[str]:
+        return make_orcid(self.rng.randrange(10_000_000)) if self.rng.random() < 0.4 else None
+
+    def n_authors(self) -> int:
+        return self.n_authors_sampler.one()
+
+    def award_id(self, funder: Funder) -> str:
+        rng = self.rng
+        if funder.award_style == "nih":
+            core = f"{rng.choice(NIH_INSTITUTE_CODES)}{rng.randrange(1_000_000):06d}"
+            return rng.choice(
+                [
+                    core,
+                    f"{rng.choice(NIH_ACTIVITY_CODES)} {core}",
+                    f"{rng.randint(1, 5)}{rng.choice(NIH_ACTIVITY_CODES)}{core}-{rng.randint(1, 20):02d}",
+                    f"{rng.choice(NIH_ACTIVITY_CODES)}-{core[:2]}-{core[2:]}",
+                ]
+            )
+        elif funder.award_style == "nsf":
+            award = f"{rng.randrange(10_000_000):07d}"
+            return rng.choice([award, f"{rng.choice(NSF_ORG_IDS)}-{award}", f"NSF {award}"])
+        return f"{rng.choice(['GR', 'EP', 'ANR-', ''])}{rng.randrange(100_000, 9_999_999)}"
+
+    def date(self, start_year: int = 1990, end_year: int = 2025) -> tuple[int, int, int]:
+        return self.rng.randint(start_year, end_year), self.rng.randint(1, 12), self.rng.randint(1, 28)
+
+    def polymorphic(self, items: list[dict]):
+        """DataCite affiliation and nameIdentifiers should be lists, however some of them are single objects."""
+        if len(items) == 1 and self.rng.random() < self.polymorphic_rate:
+            return items[0]
+        return items
+
+
+def crossref_metadata_record(ctx: SyntheticContext, i: int) -> dict:
+    rng = ctx.rng
+    year, month, day = ctx.date()
+    authors = []
+    for _ in range(ctx.n_authors()):
+        given, family = ctx.person()
+        orcid = ctx.orcid()
+        affiliations = []
+        for inst in ctx.institution_sampler.sample(rng.choice([0, 1, 1, 2])):
+            affiliations.append(
+                {
+                    "name": inst.name,
+                    "id": (
+                        [{"id": f"https://ror.org/{inst.ror_id}", "id-type": "ROR", "asserted-by": "publisher"}]
+                        if rng.random() < 0.5
+                        else []
+                    ),
+                }
+            )
+        authors.append(
+            {
+                "given": given,
+                "family": family,
+                "ORCID": None if orcid is None else f"http://orcid.org/{orcid}",
+                "affiliation": affiliations,
+            }
+        )
+
+    funders = []
+    for funder in ctx.funder_sampler.sample(rng.choice([0, 0, 0, 1, 2])):
+        funders.append(
+            {
+                "DOI": f"10.13039/{funder.fundref_id}",
+                "name": funder.name,
+                "award": [ctx.award_id(funder) for _ in range(rng.randint(0, 3))],
+            }
+        )
+
+    relations = {}
+    if rng.random() < 0.2:
+        relation_type = rng.choice(RELATION_TYPES)
+        relations[relation_type] = [
+            {"id": ctx.datacite_doi(rng.randrange(ctx.n_records)), "id-type": "doi", "asserted-by": "subject"}
+        ]
+
+    abstract = None
+    if rng.random() < 0.6:
+        # Crossref abstracts are JATS XML, sometimes with escaped entities
+        abstract = (
+            "<jats:title>Abstract</jats:title>"
+            f"<jats:p>{ctx.abstract()} &amp; results in &lt;i&gt;vitro&lt;/i&gt;</jats:p>"
+        )
+
+    return {
+        "DOI": ctx.crossref_doi(i),
+        "type": rng.choice(CROSSREF_TYPES),
+        "title": [f"<i>{ctx.title()}</i>" if rng.random() < 0.1 else ctx.title()],
+        "abstract": abstract,
+        "author": authors,
+        "funder": funders,
+        "container-title": [f"Journal of {ctx.words(1, 3).title()}"],
+        "volume": str(rng.randint(1, 300)),
+        "issue": str(rng.randint(1, 12)),
+        "page": f"{rng.randint(1, 500)}-{rng.randint(501, 900)}",
+        "publisher": f"{rng.choice(SURNAMES)} Publishing",
+        "publisher-location": None,
+        "issued": {"date-parts": [[year, month, day]]},
+        "deposited": {"date-time": f"{year}-{month:02d}-{day:02d}T00:53:45Z"},
+        "relation": relations,
+    }
+
+
+def datacite_record(ctx: SyntheticContext, i: int) -> dict:
+    rng = ctx.rng
+    year, month, day = ctx.date(2010)
+    creators = []
+    for _ in range(ctx.n_authors()):
+        given, family = ctx.person()
+        orcid = ctx.orcid()
+        name_identifiers = []
+        if orcid is not None:
+            name_identifiers.append(
+                {
+                    "nameIdentifier": f"https://orcid.org/{orcid}",
+                    "nameIdentifierScheme": "ORCID",
+                    "schemeUri": "https://orcid.org",
+                }
+            )
+        affiliations = []
+        for inst in ctx.institution_sampler.sample(rng.choice([0, 1, 1, 2])):
+            if rng.random() < 0.5:
+                affiliations.append(
+                    {
+                        "name": inst.name,
+                        "affiliationIdentifier": f"https://ror.org/{inst.ror_id}",
+                        "affiliationIdentifierScheme": "ROR",
+                        "schemeUri": "https://ror.org",
+                    }
+                )
+            else:
+                affiliations.append({"name": inst.name})
+        creators.append(
+            {
+                "givenName": given,
+                "familyName": family,
+                "name": f"{family}, {given}",
+                "nameType": "Personal" if rng.random() < 0.95 else "Organizational",
+                "affiliation": ctx.polymorphic(affiliations),
+                "nameIdentifiers": ctx.polymorphic(name_identifiers),
+            }
+        )
+
+    funding_references = []
+    for funder in ctx.funder_sampler.sample(rng.choice([0, 0, 0, 1])):
+        funding_references.append(
+            {
+                "funderIdentifier": rng.choice(
+                    [f"https://doi.org/10.13039/{funder.fundref_id}", f"https://ror.org/{funder.ror_id}"]
+                ),
+                "funderIdentifierType": "Crossref Funder ID",
+                "funderName": funder.name,
+                "awardNumber": ctx.award_id(funder),
+                "awardUri": None,
+            }
+        )
+
+    related_identifiers = []
+    if rng.random() < 0.3:
+        related_identifiers.append(
+            {
+                "relationType": rng.choice(DATACITE_RELATION_TYPES),
+                "relatedIdentifier": ctx.crossref_doi(rng.randrange(ctx.n_records)),
+                "relatedIdentifierType": "DOI",
+            }
+        )
+
+    return {
+        "id": ctx.datacite_doi(i),
+        "type": "dois",
+        "attributes": {
+            "created": f"{year}-{month:02d}-{day:02d}T17:23:29Z",
+            "updated": f"2025-01-{day:02d}T00:00:01Z",
+            "titles": [{"title": ctx.title()}],
+            "descriptions": [{"description": ctx.abstract()}] if rng.random() < 0.7 else [],
+            "types": {"resourceTypeGeneral": rng.choice(DATACITE_TYPES)},
+            "container": {"title": None},
+            "creators": creators,
+            "fundingReferences": funding_references,
+            "publisher": {"name": f"{rng.choice(SURNAMES)} Data Repository"},
+            "relatedIdentifiers": related_identifiers,
+        },
+    }
+
+
+def inverted_index(text: str) -> dict[str, list[int]]:
+    index: dict[str, list[int]] = {}
+    for position, word in enumerate(text.split()):
+        index.setdefault(word, []).append(position)
+    return index
+
+
+def openalex_works_record(ctx: SyntheticContext, i: int) -> dict:
+    rng = ctx.rng
+    year, month, day = ctx.date()
+    doi = ctx.openalex_doi(i)
+    doi_url = None if doi is None else f"https://doi.org/{doi}"
+    authorships = []
+    for _ in range(ctx.n_authors()):
+        given, family = ctx.person()
+        orcid = ctx.orcid()
+        authorships.append(
+            {
+                "author": {
+                    "id": f"https://openalex.org/A{5_000_000_000 + rng.randrange(10_000_000)}",
+                    "display_name": f"{given} {family}",
+                    "orcid": None if orcid is None else f"https://orcid.org/{orcid}",
+                },
+                "institutions": [
+                    {
+                        "id": f"https://openalex.org/{inst.openalex_id}",
+                        "display_name": inst.name,
+                        "type": "education",
+                        "ror": f"https://ror.org/{inst.ror_id}",
+                    }
+                    for inst in ctx.institution_sampler.sample(rng.choice([0, 1, 1, 2]))
+                ],
+            }
+        )
+
+    grants = [
+        {
+            "funder": f"https://openalex.org/{funder.openalex_id}",
+            "funder_display_name": funder.name,
+            "award_id": ctx.award_id(funder) if rng.random() < 0.8 else None,
+        }
+        for funder in ctx.funder_sampler.sample(rng.choice([0, 0, 0, 1, 2]))
+    ]
+
+    return {
+        "id": f"https://openalex.org/W{1_000_000_000 + i}",
+        "doi": doi_url,
+        "ids": {
+            "doi": doi_url,
+            "mag": None,
+            "openalex": f"https://openalex.org/W{1_000_000_000 + i}",
+            "pmid": f"https://pubmed.ncbi.nlm.nih.gov/{30_000_000 + i}" if rng.random() < 0.2 else None,
+            "pmcid": None,
+        },
+        "title": ctx.title(),
+        "abstract_inverted_index": inverted_index(ctx.abstract()) if rng.random() < 0.6 else None,
+        "type": rng.choice(OPENALEX_TYPES),
+        "publication_date": f"{year}-{month:02d}-{day:02d}",
+        "updated_date": f"2025-02-{day:02d}T06:49:42.321119",
+        "authorships": authorships,
+        "grants": grants,
+        "primary_location": {
+            "source": {
+                "display_name": f"Journal of {ctx.words(1, 3).title()}",
+                "publisher": f"{rng.choice(SURNAMES)} Publishing",
+            }
+        },
+    }
+
+
+def openalex_funders_record(ctx: SyntheticContext, i: int) -> dict:
+    funder = ctx.funders[i % len(ctx.funders)]
+    return {
+        "id": f"https://openalex.org/{funder.openalex_id}",
+        "display_name": funder.name,
+        "ids": {
+            "crossref": funder.fundref_id,
+            "doi": f"https://doi.org/10.13039/{funder.fundref_id}",
+            "openalex": f"https://openalex.org/{funder.openalex_id}",
+            "ror": f"https://ror.org/{funder.ror_id}",
+            "wikidata": None,
+        },
+    }
+
+
+def dmps_record(ctx: SyntheticContext, i: int) -> dict:
+    rng = ctx.rng
+    year, month, day = ctx.date(2018)
+    authors = []
+    for _ in range(min(ctx.n_authors(), 5)):
+        given, family = ctx.person()
+        orcid = ctx.orcid()
+        authors.append({"name": f"{given} {family}", "orcid": None if orcid is None else f"https://orcid.org/{orcid}"})
+
+    funding = []
+    for funder in ctx.funder_sampler.sample(rng.choice([1, 1, 2])):
+        funding.append(
+            {
+                "funder": {"name": funder.name, "id": f"https://ror.org/{funder.ror_id}"},
+                "funding_opportunity_id": rng.choice([None, f"PA-{rng.randint(10, 25)}-{rng.randint(100, 999)}"]),
+                "status": rng.choice(["granted", "planned", "applied"]),
+                "grant_id": ctx.award_id(funder) if rng.random() < 0.7 else rng.choice(["n/a", "", None]),
+            }
+        )
+
+    return {
+        "dmp_id": f"https://doi.org/10.48321/D1{i:06X}",
+        "created": f"{year}-{month:02d}-{day:02d}",
+        "registered": f"{year}-{month:02d}-{day:02d}",
+        "modified": f"{year + 1}-{month:02d}-{day:02d}",
+        "title": f"<p>{ctx.title()}</p>",
+        "description": f"<p>{ctx.abstract()}</p>",
+        "project_start": f"{year}-{month:02d}-01",
+        "project_end": f"{year + rng.randint(1, 5)}-{month:02d}-01",
+        "institutions": [
+            {"name": inst.name, "ror": f"https://ror.org/{inst.ror_id}"}
+            for inst in ctx.institution_sampler.sample(rng.randint(1, 2))
+        ],
+        "authors": authors,
+        "funding": funding,
+    }
+
+
+def ror_records(ctx: SyntheticContext) -> Iterator[dict]:
+    for inst in ctx.institutions:
+        yield {
+            "id": f"https://ror.org/{inst.ror_id}",
+            "names": [{"value": inst.name, "types": ["ror_display", "label"], "lang": "en"}],
+            "external_ids": [
+                {"type": "grid", "all": [inst.grid_id], "preferred": inst.grid_id},
+                {"type": "isni", "all": [inst.isni], "preferred": None},
+            ],
+        }
+    for funder in ctx.funders:
+        yield {
+            "id": f"https://ror.org/{funder.ror_id}",
+            "names": [{"value": funder.name, "types": ["ror_display", "label"], "lang": "en"}],
+            "external_ids": [{"type": "fundref", "all": [funder.fundref_id], "preferred": funder.fundref_id}],
+        }
+
+
+RecordFunc = Callable[[SyntheticContext, int], dict]
+
+# Record builder and file path template for each dataset, paths match the file globs used by each transform
+RECORD_FUNCS: dict[str, tuple[RecordFunc, str]] = {
+    "crossref-metadata": (crossref_metadata_record, "part_{idx:05d}.jsonl.gz"),
+    "datacite": (datacite_record, "updated_2025-01/part_{idx:05d}.jsonl.gz"),
+    "openalex-works": (openalex_works_record, "updated_date=2025-01-01/part_{idx:03d}.gz"),
+    "openalex-funders": (openalex_funders_record, "updated_date=2025-01-01/part_{idx:03d}.gz"),
+    "dmps": (dmps_record, "part_{idx:05d}.jsonl.gz"),
+}
+
+
+@timed
+def generate_synthetic_dataset(
+    dataset: SyntheticDataset,
+    out_dir: pathlib.Path,
+    n_records: int = 10_000,
+    n_files: int = 4,
+    skew: float = 1.1,
+    polymorphic_rate: float = 0.1,
+    duplicate_doi_rate: float = 0.0,
+    null_doi_rate: float = 0.0,
+    seed: int = 42,
+) -> SyntheticStats:
+    """Generate synthetic source data that conforms to a dataset's SCHEMA, for benchmarking transforms.
+
+    :param dataset: the dataset to generate.
+    :param out_dir: the output directory.
+    :param n_records: the total number of records, ignored for ROR which has one record per institution and funder.
+    :param n_files: the number of files to split the records between, ignored for ROR.
+    :param skew: the Zipf exponent used when sampling institutions, funders, words and the number of authors per
+    work, zero is uniform.
+    :param polymorphic_rate: the fraction of single item DataCite affiliation and nameIdentifiers lists that are
+    written as objects.
+    :param duplicate_doi_rate: the fraction of OpenAlex works that have the DOI of an earlier work.
+    :param null_doi_rate: the fraction of OpenAlex works without a DOI.
+    :param seed: the random seed.
+    :return: statistics about the generated files.
+    """
+
+    ctx = SyntheticContext(
+        n_records,
+        skew=skew,
+        seed=seed,
+        polymorphic_rate=polymorphic_rate,
+        duplicate_doi_rate=duplicate_doi_rate,
+        null_doi_rate=null_doi_rate,
+    )
+    stats = SyntheticStats(dataset=dataset)
+
+    if dataset == "ror":
+        file_path = out_dir / "v2-synthetic-ror-data_schema_v2.json"
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        data = orjson.dumps(list(ror_records(ctx)))
+        file_path.write_bytes(data)
+        stats.n_records = len(ctx.institutions) + len(ctx.funders)
+        stats.n_files = 1
+        stats.uncompressed_bytes = stats.compressed_bytes = len(data)
+        stats.files.append(file_path)
+        return stats
+
+    if dataset not in RECORD_FUNCS:
+        raise ValueError(f"generate_synthetic_dataset: unknown dataset {dataset}")
+
+    record_func, path_template = RECORD_FUNCS[dataset]
+    records_per_file = -(-n_records // n_files)
+    for idx in range(n_files):
+        start = idx * records_per_file
+        end = min(start + records_per_file, n_records)
+        if start >= end:
+            break
+
+        file_path = out_dir / path_template.format(idx=idx)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(file_path, mode="wb", compresslevel=1) as f:
+            for i in range(start, end):
+                line = orjson.dumps(record_func(ctx, i), option=orjson.OPT_APPEND_NEWLINE)
+                f.write(line)
+                stats.uncompressed_bytes += len(line)
+
+        stats.n_records += end - start
+        stats.n_files += 1
+        stats.compressed_bytes += file_path.stat().st_size
+        stats.files.append(file_path)
+
+    log.info(
+        f"Generated {stats.n_records:,} {dataset} records in {stats.n_files} files, "
+        f"{stats.uncompressed_bytes / 1e6:.1f} MB uncompressed: {out_dir}"
+    )
+    return stats
@@ -1,39 +1,54 @@
+import dmpworks.polars_expr_plugin as pe
 import polars as pl
 from polars import Date
 
 
-def remove_markup(expr: pl.Expr) -> pl.Expr:
+def normalise_identifier(expr: pl.Expr) -> pl.Expr:
     return (
         pl.when(expr.is_not_null())
-        .then(
-            expr.cast(pl.String)
-            .str.replace_all("&lt;", "<")
-            .str.replace_all("&gt", ">")
-            .str.replace_all(r"<[^>]*>", "")
-            .str.replace_all(r"[\'\"]", "")
-        )
+        .then(expr.cast(pl.String).str.to_lowercase().str.strip_chars().str.replace_all(r"^https?://[^/]+/", ""))
         .otherwise(None)
     )
 
 
-def normalise_identifier(expr: pl.Expr) -> pl.Expr:
+def extract_orcid(expr: pl.Expr) -> pl.Expr:
+    # https://support.orcid.org/hc/en-us/articles/360006897674-Structure-of-the-ORCID-Identifier
     return (
         pl.when(expr.is_not_null())
-        .then(expr.cast(pl.String).str.to_lowercase().str.strip_chars().str.replace_all(r"^https?://[^/]+/", ""))
+        .then(expr.str.to_lowercase().str.extract(r"\d{4}-\d{4}-\d{4}-\d{3}[\dx]", group_index=0))
         .otherwise(None)
     )
 
 
+# The normalise_* functions canonicalise identifiers with the Rust plugin, and fall back to the string cleaning used
+# before it for identifiers it can't canonicalise, so that join key columns aren't nulled when an identifier is
+# malformed, e.g. a DOI with whitespace in its suffix or an ORCID with a bad check digit.
+
+
+def normalise_doi(expr: pl.Expr) -> pl.Expr:
+    return pl.coalesce(pe.canonical_doi(expr), normalise_identifier(expr))
+
+
+def normalise_orcid(expr: pl.Expr) -> pl.Expr:
+    # ORCIDs that extract_orcid accepted are still accepted without a valid check digit, or when they are surrounded
+    # by other text, and the plugin also accepts ORCIDs written without hyphens
+    return pl.coalesce(pe.canonical_orcid(expr), extract_orcid(expr))
+
+
+def normalise_ror(expr: pl.Expr) -> pl.Expr:
+    return pl.coalesce(pe.canonical_ror(expr), normalise_identifier(expr))
+
+
 def normalise_isni(expr: pl.Expr) -> pl.Expr:
-    return expr.str.replace_all(" ", "").str.strip_chars().str.to_lowercase()
+    return pl.coalesce(pe.canonical_isni(expr), expr.str.replace_all(" ", "").str.strip_chars().str.to_lowercase())
 
 
-def extract_orcid(expr: pl.Expr) -> pl.Expr:
-    # https://support.orcid.org/hc/en-us/articles/360006897674-Structure-of-the-ORCID-Identifier
-    return (
-        pl.when(expr.is_not_null())
-        .then(expr.str.to_lowercase().str.extract(r"\d{4}-\d{4}-\d{4}-\d{3}[\dx]", group_index=0))
-        .otherwise(None)
+def normalise_fundref(expr: pl.Expr) -> pl.Expr:
+    # Fundref IDs are given as DOIs by Crossref and as bare IDs by ROR, which are prefixed with 10.13039/
+    cleaned = normalise_identifier(expr)
+    return pl.coalesce(
+        pe.canonical_fundref(expr),
+        pl.when(cleaned.str.starts_with("10.")).then(cleaned).otherwise(pl.concat_str([pl.lit("10.13039/"), cleaned])),
     )
 
 
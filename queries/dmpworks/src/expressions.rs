@@ -3,11 +3,14 @@ use std::collections::HashMap;
 use polars::prelude::*;
 use polars_core::series::Series;
 use pyo3_polars::derive::polars_expr;
+use serde::Deserialize;
 use serde_json;
-use voca_rs::*;
 use human_name::Name;
 use log::{warn};
 
+use crate::identifiers::{canonicalise, IdentifierType};
+use crate::markup;
+
 #[polars_expr(output_type=String)]
 fn revert_inverted_index(inputs: &[Series]) -> PolarsResult<Series> {
     let ca: &StringChunked = inputs[0].str()?;
@@ -243,11 +246,72 @@ fn parse_datacite_name_identifiers(inputs: &[Series]) -> PolarsResult<Series> {
 fn strip_markup(inputs: &[Series]) -> PolarsResult<Series> {
     let ca: &StringChunked = inputs[0].str()?;
     let out: StringChunked = ca.apply_into_string_amortized(|value: &str, output: &mut String| {
-        output.push_str(&strip::strip_tags(value));
+        markup::strip_markup(value, output);
     });
     Ok(out.into_series())
 }
 
+#[derive(Deserialize)]
+struct CanonicaliseIdentifierKwargs {
+    identifier_type: IdentifierType,
+    with_validity: bool,
+}
+
+fn canonicalise_identifier_output(
+    input_fields: &[Field],
+    kwargs: CanonicaliseIdentifierKwargs,
+) -> PolarsResult<Field> {
+    let dtype = if kwargs.with_validity {
+        DataType::Struct(vec![
+            Field::new("id".into(), DataType::String),
+            Field::new("valid".into(), DataType::Boolean),
+        ])
+    } else {
+        DataType::String
+    };
+    Ok(Field::new(input_fields[0].name.clone(), dtype))
+}
+
+#[polars_expr(output_type_func_with_kwargs=canonicalise_identifier_output)]
+fn canonicalise_identifier(inputs: &[Series], kwargs: CanonicaliseIdentifierKwargs) -> PolarsResult<Series> {
+    let ca: &StringChunked = inputs[0].str()?;
+    let identifier_type = kwargs.identifier_type;
+
+    // Without validity, invalid identifiers become null
+    if !kwargs.with_validity {
+        let out: StringChunked = ca
+            .into_iter()
+            .map(|opt_str| match opt_str.and_then(|s| canonicalise(identifier_type, s)) {
+                Some((id, true)) => Some(id),
+                _ => None,
+            })
+            .collect();
+        return Ok(out.with_name(ca.name().clone()).into_series());
+    }
+
+    // With validity, cleaned identifiers are returned with a flag saying
+    // whether they are valid
+    let mut ids: Vec<Option<String>> = Vec::with_capacity(ca.len());
+    let mut valid: Vec<bool> = Vec::with_capacity(ca.len());
+    for opt_str in ca {
+        match opt_str.and_then(|s| canonicalise(identifier_type, s)) {
+            Some((id, is_valid)) => {
+                ids.push(Some(id));
+                valid.push(is_valid);
+            },
+            None => {
+                ids.push(None);
+                valid.push(false);
+            },
+        }
+    }
+
+    let id_series = Series::new("id".into(), ids);
+    let valid_series = Series::new("valid".into(), valid);
+    let fields: Vec<&Series> = vec![&id_series, &valid_series];
+    StructChunked::from_series(ca.name().clone(), ca.len(), fields.into_iter()).map(|ca| ca.into_series())
+}
+
 fn parse_name_output(input_fields: &[Field]) -> PolarsResult<Field> {
     Ok(Field::new(
         input_fields[0].name.clone(),
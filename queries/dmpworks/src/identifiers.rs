@@ -0,0 +1,308 @@
+// Parsing, validation and canonicalisation of scholarly identifiers.
+//
+// Each identifier is trimmed, has URL and scheme prefixes removed and is
+// lowercased. It is then checked against the identifier's syntax and, for
+// ORCID, ISNI and ROR, its checksum. Functions return the cleaned identifier
+// and whether it is valid, so that callers can either drop invalid identifiers
+// or keep them with a flag.
+
+use serde::Deserialize;
+
+#[derive(Clone, Copy, Debug, Deserialize, PartialEq)]
+#[serde(rename_all = "lowercase")]
+pub enum IdentifierType {
+    Doi,
+    Orcid,
+    Ror,
+    Isni,
+    Fundref,
+}
+
+const FUNDREF_PREFIX: &str = "10.13039/";
+
+// Crockford base32 alphabet used by ROR IDs
+const CROCKFORD_ALPHABET: &[u8] = b"0123456789abcdefghjkmnpqrstvwxyz";
+
+/// Canonicalise an identifier, returning the cleaned identifier and whether it
+/// is valid, or None when the value is empty.
+pub fn canonicalise(identifier_type: IdentifierType, value: &str) -> Option<(String, bool)> {
+    let cleaned = clean(identifier_type, value);
+    if cleaned.is_empty() {
+        return None;
+    }
+
+    let result = match identifier_type {
+        IdentifierType::Doi => {
+            let valid = is_valid_doi(&cleaned);
+            (cleaned, valid)
+        },
+        IdentifierType::Orcid => match compact_checksummed(&cleaned) {
+            Some(orcid) => (
+                format!(
+                    "{}-{}-{}-{}",
+                    &orcid[0..4],
+                    &orcid[4..8],
+                    &orcid[8..12],
+                    &orcid[12..16]
+                ),
+                true,
+            ),
+            None => (cleaned, false),
+        },
+        IdentifierType::Isni => match compact_checksummed(&cleaned) {
+            Some(isni) => (isni, true),
+            None => (cleaned, false),
+        },
+        IdentifierType::Ror => {
+            let valid = is_valid_ror(&cleaned);
+            (cleaned, valid)
+        },
+        IdentifierType::Fundref => {
+            let suffix = cleaned.strip_prefix(FUNDREF_PREFIX).unwrap_or(&cleaned);
+            if !suffix.is_empty() && suffix.bytes().all(|b| b.is_ascii_digit()) {
+                (format!("{}{}", FUNDREF_PREFIX, suffix), true)
+            } else {
+                (cleaned, false)
+            }
+        },
+    };
+    Some(result)
+}
+
+fn clean(identifier_type: IdentifierType, value: &str) -> String {
+    let mut value = value.trim();
+
+    // Remove the scheme and host from URLs, e.g. https://orcid.org/
+    for scheme in ["https://", "http://"] {
+        if let Some(rest) = strip_prefix_ignore_case(value, scheme) {
+            value = rest.split_once('/').map_or("", |(_, path)| path);
+            break;
+        }
+    }
+
+    // Remove other prefixes that identifiers are commonly written with
+    let prefixes: &[&str] = match identifier_type {
+        IdentifierType::Doi => &["doi.org/", "dx.doi.org/", "doi:"],
+        IdentifierType::Orcid => &["orcid.org/"],
+        IdentifierType::Ror => &["ror.org/"],
+        IdentifierType::Isni => &["isni.org/isni/", "isni/", "isni:"],
+        IdentifierType::Fundref => &["doi.org/", "dx.doi.org/", "doi:"],
+    };
+    for prefix in prefixes {
+        if let Some(rest) = strip_prefix_ignore_case(value, prefix) {
+            value = rest;
+            break;
+        }
+    }
+
+    value.trim().to_lowercase()
+}
+
+fn strip_prefix_ignore_case<'a>(value: &'a str, prefix: &str) -> Option<&'a str> {
+    let head = value.get(..prefix.len())?;
+    if head.eq_ignore_ascii_case(prefix) {
+        Some(&value[prefix.len()..])
+    } else {
+        None
+    }
+}
+
+fn is_valid_doi(doi: &str) -> bool {
+    // 10.<registrant code>/<suffix>, where the registrant code is dot
+    // separated digits, e.g. 10.1000/xyz or 10.1000.10/xyz
+    let Some((prefix, suffix)) = doi.split_once('/') else {
+        return false;
+    };
+    let Some(registrant) = prefix.strip_prefix("10.") else {
+        return false;
+    };
+    !suffix.is_empty()
+        && !suffix.contains(char::is_whitespace)
+        && registrant
+            .split('.')
+            .all(|part| !part.is_empty() && part.bytes().all(|b| b.is_ascii_digit()))
+}
+
+/// Returns the 16 character form of an ORCID or ISNI, without spaces or
+/// hyphens, if it has a valid ISO 7064 MOD 11-2 check character.
+fn compact_checksummed(value: &str) -> Option<String> {
+    let compact: String = value
+        .chars()
+        .filter(|c| !c.is_whitespace() && *c != '-')
+        .collect();
+    let bytes = compact.as_bytes();
+    if bytes.len() != 16 || !bytes[..15].iter().all(|b| b.is_ascii_digit()) {
+        return None;
+    }
+    let expected = mod_11_2_check_character(&bytes[..15]);
+    if bytes[15] == expected {
+        Some(compact)
+    } else {
+        None
+    }
+}
+
+fn mod_11_2_check_character(digits: &[u8]) -> u8 {
+    // https://support.orcid.org/hc/en-us/articles/360006897674-Structure-of-the-ORCID-Identifier
+    let total = digits
+        .iter()
+        .fold(0u32, |total, digit| (total + (digit - b'0') as u32) * 2);
+    match (12 - total % 11) % 11 {
+        10 => b'x',
+        check => b'0' + check as u8,
+    }
+}
+
+fn is_valid_ror(ror: &str) -> bool {
+    // https://ror.readme.io/docs/identifier: a leading 0, six Crockford
+    // base32 characters and a two digit checksum
+    let bytes = ror.as_bytes();
+    if bytes.len() != 9 || bytes[0] != b'0' {
+        return false;
+    }
+
+    let mut number: u64 = 0;
+    for b in &bytes[1..7] {
+        match CROCKFORD_ALPHABET.iter().position(|c| c == b) {
+            Some(value) => number = number * 32 + value as u64,
+            None => return false,
+        }
+    }
+    let checksum = match std::str::from_utf8(&bytes[7..9])
+        .ok()
+        .and_then(|s| s.parse::<u64>().ok())
+    {
+        Some(checksum) => checksum,
+        None => return false,
+    };
+    checksum == 98 - (number * 100) % 97
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn valid(identifier_type: IdentifierType, value: &str) -> Option<String> {
+        match canonicalise(identifier_type, value) {
+            Some((id, true)) => Some(id),
+            _ => None,
+        }
+    }
+
+    #[test]
+    fn test_doi() {
+        let expected = Some("10.1234/abc.def".to_string());
+        assert_eq!(valid(IdentifierType::Doi, "10.1234/ABC.def"), expected);
+        assert_eq!(
+            valid(IdentifierType::Doi, " https://doi.org/10.1234/abc.def "),
+            expected
+        );
+        assert_eq!(
+            valid(IdentifierType::Doi, "http://dx.doi.org/10.1234/abc.def"),
+            expected
+        );
+        assert_eq!(valid(IdentifierType::Doi, "doi:10.1234/abc.def"), expected);
+        assert_eq!(
+            valid(IdentifierType::Doi, "doi.org/10.1234/abc.def"),
+            expected
+        );
+        assert_eq!(
+            valid(IdentifierType::Doi, "10.1000.10/xyz"),
+            Some("10.1000.10/xyz".to_string())
+        );
+
+        assert_eq!(valid(IdentifierType::Doi, "11.1234/abc"), None);
+        assert_eq!(valid(IdentifierType::Doi, "10.abc/abc"), None);
+        assert_eq!(valid(IdentifierType::Doi, "10.1234/"), None);
+        assert_eq!(valid(IdentifierType::Doi, "10.1234/a b"), None);
+        assert_eq!(canonicalise(IdentifierType::Doi, "  "), None);
+
+        // Invalid identifiers are still cleaned
+        assert_eq!(
+            canonicalise(IdentifierType::Doi, "https://example.org/ABC"),
+            Some(("abc".to_string(), false))
+        );
+    }
+
+    #[test]
+    fn test_orcid() {
+        let expected = Some("0000-0002-1825-0097".to_string());
+        assert_eq!(
+            valid(IdentifierType::Orcid, "0000-0002-1825-0097"),
+            expected
+        );
+        assert_eq!(
+            valid(
+                IdentifierType::Orcid,
+                "https://orcid.org/0000-0002-1825-0097"
+            ),
+            expected
+        );
+        assert_eq!(
+            valid(IdentifierType::Orcid, "orcid.org/0000000218250097"),
+            expected
+        );
+        assert_eq!(
+            valid(IdentifierType::Orcid, "0000-0002-9079-593X"),
+            Some("0000-0002-9079-593x".to_string())
+        );
+
+        // Bad checksum and wrong length
+        assert_eq!(valid(IdentifierType::Orcid, "0000-0002-1825-0098"), None);
+        assert_eq!(valid(IdentifierType::Orcid, "0000-0002-1825"), None);
+    }
+
+    #[test]
+    fn test_isni() {
+        let expected = Some("0000000121032683".to_string());
+        assert_eq!(valid(IdentifierType::Isni, "0000 0001 2103 2683"), expected);
+        assert_eq!(
+            valid(
+                IdentifierType::Isni,
+                "https://isni.org/isni/0000000121032683"
+            ),
+            expected
+        );
+        assert_eq!(valid(IdentifierType::Isni, "0000 0001 2103 2684"), None);
+    }
+
+    #[test]
+    fn test_ror() {
+        assert_eq!(
+            valid(IdentifierType::Ror, "https://ror.org/01an7q238"),
+            Some("01an7q238".to_string())
+        );
+        assert_eq!(
+            valid(IdentifierType::Ror, "021NXHR62"),
+            Some("021nxhr62".to_string())
+        );
+        assert_eq!(
+            valid(IdentifierType::Ror, "ror.org/01cwqze88"),
+            Some("01cwqze88".to_string())
+        );
+
+        assert_eq!(valid(IdentifierType::Ror, "01an7q239"), None); // Bad checksum
+        assert_eq!(valid(IdentifierType::Ror, "11an7q238"), None); // Doesn't start with 0
+        assert_eq!(valid(IdentifierType::Ror, "01an7q2"), None); // Too short
+        assert_eq!(valid(IdentifierType::Ror, "01ul7q238"), None); // Not Crockford base32
+    }
+
+    #[test]
+    fn test_fundref() {
+        let expected = Some("10.13039/100000001".to_string());
+        assert_eq!(valid(IdentifierType::Fundref, "100000001"), expected);
+        assert_eq!(
+            valid(IdentifierType::Fundref, "10.13039/100000001"),
+            expected
+        );
+        assert_eq!(
+            valid(
+                IdentifierType::Fundref,
+                "https://doi.org/10.13039/100000001"
+            ),
+            expected
+        );
+        assert_eq!(valid(IdentifierType::Fundref, "10.1234/100000001"), None);
+        assert_eq!(valid(IdentifierType::Fundref, "abc"), None);
+    }
+}
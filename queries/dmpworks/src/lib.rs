@@ -1,4 +1,6 @@
 mod expressions;
+mod identifiers;
+mod markup;
 use pyo3::prelude::*;
 use pyo3_polars::PolarsAllocator;
 
@@ -0,0 +1,478 @@
+// Single pass removal of JATS / HTML markup.
+//
+// Strips tags, including tags that have been escaped as entities
+// (e.g. &lt;i&gt;vitro&lt;/i&gt;), decodes named and numeric HTML entities,
+// collapses runs of whitespace into a single space and trims the result.
+
+// Tags that separate blocks of text, replaced with a space so that words
+// either side of them are not joined together. Other tags, e.g. <i> or <sub>,
+// are removed without adding a space.
+const BLOCK_TAGS: &[&str] = &[
+    "abstract",
+    "br",
+    "caption",
+    "dd",
+    "div",
+    "dl",
+    "dt",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+    "hr",
+    "label",
+    "li",
+    "list",
+    "list-item",
+    "ol",
+    "p",
+    "para",
+    "sec",
+    "table",
+    "td",
+    "th",
+    "title",
+    "tr",
+    "ul",
+];
+
+// Longest entity that will be looked for, e.g. &thetasym;
+const MAX_ENTITY_LEN: usize = 12;
+
+// Longest tag that will be looked for, including its attributes, e.g. a JATS
+// <ext-link xlink:href="..."> with a URL. A '<' that isn't closed within this
+// many bytes is kept as text, so that an unmatched '<' doesn't remove the text
+// up to a '>' further on, and so that each '<' is only scanned so far.
+const MAX_TAG_LEN: usize = 256;
+
+struct Writer<'a> {
+    output: &'a mut String,
+    pending_space: bool,
+}
+
+impl<'a> Writer<'a> {
+    fn push_char(&mut self, c: char) {
+        if c.is_whitespace() {
+            self.push_space();
+            return;
+        }
+        if self.pending_space {
+            self.output.push(' ');
+            self.pending_space = false;
+        }
+        self.output.push(c);
+    }
+
+    // Pushes text that is known not to contain whitespace
+    fn push_word(&mut self, word: &str) {
+        if self.pending_space {
+            self.output.push(' ');
+            self.pending_space = false;
+        }
+        self.output.push_str(word);
+    }
+
+    fn push_space(&mut self) {
+        // Leading whitespace is dropped and trailing whitespace is never written
+        if !self.output.is_empty() {
+            self.pending_space = true;
+        }
+    }
+}
+
+pub fn strip_markup(input: &str, output: &mut String) {
+    let bytes = input.as_bytes();
+    let mut writer = Writer {
+        output,
+        pending_space: false,
+    };
+    let mut i = 0;
+
+    while i < bytes.len() {
+        match bytes[i] {
+            b'<' if is_tag_start(bytes, i + 1) => match find_tag_end(input, i + 1, b">") {
+                Some(end) => {
+                    if is_block_tag(&input[i + 1..end]) {
+                        writer.push_space();
+                    }
+                    i = end + 1;
+                },
+                None => {
+                    writer.push_char('<');
+                    i += 1;
+                },
+            },
+            b'&' => match decode_entity(&bytes[i..]) {
+                Some((c, len)) => {
+                    // Escaped tag, e.g. &lt;jats:p&gt;
+                    if c == '<' && is_tag_start(bytes, i + len) {
+                        if let Some(end) = find_tag_end(input, i + len, b"&gt;") {
+                            if is_block_tag(&input[i + len..end]) {
+                                writer.push_space();
+                            }
+                            i = end + 4;
+                            continue;
+                        }
+                    }
+                    writer.push_char(c);
+                    i += len;
+                },
+                None => {
+                    writer.push_char('&');
+                    i += 1;
+                },
+            },
+            b if b.is_ascii_whitespace() => {
+                writer.push_space();
+                i += 1;
+            },
+            b if b.is_ascii() => {
+                // Copy runs of plain ASCII text in one go, the first byte may be a '<' that
+                // isn't the start of a tag
+                let end = bytes[i + 1..]
+                    .iter()
+                    .position(|&b| {
+                        !b.is_ascii() || b.is_ascii_whitespace() || b == b'<' || b == b'&'
+                    })
+                    .map_or(bytes.len(), |pos| i + 1 + pos);
+                writer.push_word(&input[i..end]);
+                i = end;
+            },
+            _ => {
+                // Multi-byte UTF-8 character, i is always on a char boundary
+                let c = input[i..].chars().next().unwrap();
+                writer.push_char(c);
+                i += c.len_utf8();
+            },
+        }
+    }
+}
+
+fn is_tag_start(bytes: &[u8], i: usize) -> bool {
+    matches!(bytes.get(i), Some(b) if b.is_ascii_alphabetic() || matches!(b, b'/' | b'!' | b'?'))
+}
+
+// Finds the end of the tag whose contents start at start, i.e. the position of
+// close, which is '>' or "&gt;" for escaped tags. The scan stops at the next
+// '<' (or "&lt;" for escaped tags), newline or after MAX_TAG_LEN bytes, and the
+// contents must look like a tag, so that text such as "a <b and c> d" isn't
+// taken for one.
+fn find_tag_end(input: &str, start: usize, close: &[u8]) -> Option<usize> {
+    let bytes = input.as_bytes();
+    let limit = bytes.len().min(start + MAX_TAG_LEN);
+    let mut i = start;
+    while i < limit {
+        match bytes[i] {
+            b'<' | b'\n' => return None,
+            // An escaped tag ends at the next escaped '<' in the same way
+            b'&' if close == b"&gt;" && bytes[i..].starts_with(b"&lt;") => return None,
+            _ if bytes[i..].starts_with(close) => {
+                return if is_tag(&input[start..i]) {
+                    Some(i)
+                } else {
+                    None
+                };
+            },
+            _ => i += 1,
+        }
+    }
+    None
+}
+
+// Checks that tag contents, without the angle brackets, are a comment,
+// declaration, processing instruction or an element name followed by
+// name=value attributes, e.g. "!-- comment --", "/jats:p", "br/" or
+// "a href=\"https://example.org\"". Attributes without a value aren't
+// accepted, as they are more likely to be words in text such as "x <y and z>".
+fn is_tag(tag: &str) -> bool {
+    if let Some(comment) = tag.strip_prefix("!--") {
+        return comment.ends_with("--");
+    }
+    if tag.starts_with('!') || tag.starts_with('?') {
+        return true;
+    }
+
+    let rest = tag.strip_prefix('/').unwrap_or(tag);
+    let name_len = rest
+        .find(|c: char| !(c.is_ascii_alphanumeric() || matches!(c, ':' | '-' | '_' | '.')))
+        .unwrap_or(rest.len());
+    if name_len == 0 || !rest.as_bytes()[0].is_ascii_alphabetic() {
+        return false;
+    }
+
+    let mut rest = &rest[name_len..];
+    loop {
+        let trimmed = rest.trim_start();
+        if trimmed.is_empty() || trimmed == "/" {
+            return true;
+        }
+        if trimmed.len() == rest.len() {
+            // Attributes must be separated from the name and each other by whitespace
+            return false;
+        }
+
+        let attr_len = trimmed
+            .find(|c: char| c.is_whitespace() || matches!(c, '=' | '/' | '"' | '\''))
+            .unwrap_or(trimmed.len());
+        if attr_len == 0 {
+            return false;
+        }
+        let Some(value) = trimmed[attr_len..].trim_start().strip_prefix('=') else {
+            return false;
+        };
+        let value = value.trim_start();
+        rest = match value.chars().next() {
+            Some(quote @ ('"' | '\'')) => match value[1..].find(quote) {
+                Some(end) => &value[end + 2..],
+                None => return false,
+            },
+            Some(_) => {
+                let end = value.find(char::is_whitespace).unwrap_or(value.len());
+                &value[end..]
+            },
+            None => return false,
+        };
+    }
+}
+
+fn is_block_tag(tag: &str) -> bool {
+    // Tag contents without the angle brackets, e.g. "/jats:p" or "br/"
+    let name = tag.trim_start_matches('/');
+    let name = name
+        .split(|c: char| c.is_whitespace() || c == '/')
+        .next()
+        .unwrap_or("");
+    let local_name = name.rsplit(':').next().unwrap_or(name);
+    BLOCK_TAGS
+        .iter()
+        .any(|block| block.eq_ignore_ascii_case(local_name))
+}
+
+// Decodes the entity at the start of bytes, which begins with '&', returning
+// the decoded character and the length of the entity including the '&' and ';'.
+fn decode_entity(bytes: &[u8]) -> Option<(char, usize)> {
+    let limit = bytes.len().min(MAX_ENTITY_LEN + 2);
+    let end = bytes[1..limit].iter().position(|&b| b == b';')? + 1;
+    let body = std::str::from_utf8(&bytes[1..end]).ok()?;
+
+    let c = if let Some(hex) = body.strip_prefix("#x").or_else(|| body.strip_prefix("#X")) {
+        char::from_u32(u32::from_str_radix(hex, 16).ok()?)?
+    } else if let Some(dec) = body.strip_prefix('#') {
+        char::from_u32(dec.parse::<u32>().ok()?)?
+    } else {
+        named_entity(body)?
+    };
+    Some((c, end + 1))
+}
+
+fn named_entity(name: &str) -> Option<char> {
+    let c = match name {
+        "amp" => '&',
+        "lt" => '<',
+        "gt" => '>',
+        "quot" => '"',
+        "apos" => '\'',
+        "nbsp" => ' ',
+        "ensp" => ' ',
+        "emsp" => ' ',
+        "thinsp" => ' ',
+        "ndash" => '–',
+        "mdash" => '—',
+        "minus" => '−',
+        "hellip" => '…',
+        "lsquo" => '‘',
+        "rsquo" => '’',
+        "sbquo" => '‚',
+        "ldquo" => '“',
+        "rdquo" => '”',
+        "bdquo" => '„',
+        "laquo" => '«',
+        "raquo" => '»',
+        "bull" => '•',
+        "middot" => '·',
+        "deg" => '°',
+        "plusmn" => '±',
+        "times" => '×',
+        "divide" => '÷',
+        "micro" => 'µ',
+        "copy" => '©',
+        "reg" => '®',
+        "trade" => '™',
+        "sect" => '§',
+        "para" => '¶',
+        "prime" => '′',
+        "Prime" => '″',
+        "le" => '≤',
+        "ge" => '≥',
+        "ne" => '≠',
+        "asymp" => '≈',
+        "infin" => '∞',
+        "sum" => '∑',
+        "prod" => '∏',
+        "radic" => '√',
+        "larr" => '←',
+        "rarr" => '→',
+        "uarr" => '↑',
+        "darr" => '↓',
+        "harr" => '↔',
+        "alpha" => 'α',
+        "beta" => 'β',
+        "gamma" => 'γ',
+        "delta" => 'δ',
+        "epsilon" => 'ε',
+        "zeta" => 'ζ',
+        "eta" => 'η',
+        "theta" => 'θ',
+        "thetasym" => 'ϑ',
+        "iota" => 'ι',
+        "kappa" => 'κ',
+        "lambda" => 'λ',
+        "mu" => 'μ',
+        "nu" => 'ν',
+        "xi" => 'ξ',
+        "omicron" => 'ο',
+        "pi" => 'π',
+        "rho" => 'ρ',
+        "sigma" => 'σ',
+        "tau" => 'τ',
+        "upsilon" => 'υ',
+        "phi" => 'φ',
+        "chi" => 'χ',
+        "psi" => 'ψ',
+        "omega" => 'ω',
+        "Gamma" => 'Γ',
+        "Delta" => 'Δ',
+        "Theta" => 'Θ',
+        "Lambda" => 'Λ',
+        "Xi" => 'Ξ',
+        "Pi" => 'Π',
+        "Sigma" => 'Σ',
+        "Phi" => 'Φ',
+        "Psi" => 'Ψ',
+        "Omega" => 'Ω',
+        "aacute" => 'á',
+        "eacute" => 'é',
+        "iacute" => 'í',
+        "oacute" => 'ó',
+        "uacute" => 'ú',
+        "Aacute" => 'Á',
+        "Eacute" => 'É',
+        "Iacute" => 'Í',
+        "Oacute" => 'Ó',
+        "Uacute" => 'Ú',
+        "agrave" => 'à',
+        "egrave" => 'è',
+        "igrave" => 'ì',
+        "ograve" => 'ò',
+        "ugrave" => 'ù',
+        "acirc" => 'â',
+        "ecirc" => 'ê',
+        "icirc" => 'î',
+        "ocirc" => 'ô',
+        "ucirc" => 'û',
+        "auml" => 'ä',
+        "euml" => 'ë',
+        "iuml" => 'ï',
+        "ouml" => 'ö',
+        "uuml" => 'ü',
+        "Auml" => 'Ä',
+        "Ouml" => 'Ö',
+        "Uuml" => 'Ü',
+        "atilde" => 'ã',
+        "otilde" => 'õ',
+        "ntilde" => 'ñ',
+        "Ntilde" => 'Ñ',
+        "ccedil" => 'ç',
+        "Ccedil" => 'Ç',
+        "aring" => 'å',
+        "Aring" => 'Å',
+        "oslash" => 'ø',
+        "Oslash" => 'Ø',
+        "aelig" => 'æ',
+        "AElig" => 'Æ',
+        "szlig" => 'ß',
+        _ => return None,
+    };
+    Some(c)
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn strip(input: &str) -> String {
+        let mut output = String::new();
+        strip_markup(input, &mut output);
+        output
+    }
+
+    #[test]
+    fn test_strips_tags() {
+        assert_eq!(
+            strip("<jats:title>Abstract</jats:title><jats:p>The <i>in vitro</i> study.</jats:p>"),
+            "Abstract The in vitro study."
+        );
+        assert_eq!(strip("H<sub>2</sub>O"), "H2O");
+        assert_eq!(strip("Line one<br/>Line two"), "Line one Line two");
+        assert_eq!(strip("<!-- comment -->Text"), "Text");
+        assert_eq!(
+            strip("See <ext-link ext-link-type=\"uri\" xlink:href='https://example.org/a?b=1'>the data</ext-link>."),
+            "See the data."
+        );
+        assert_eq!(strip("<jats:p xml:lang=en>Text</jats:p>"), "Text");
+    }
+
+    #[test]
+    fn test_keeps_text_that_is_not_a_tag() {
+        assert_eq!(strip("p < 0.05 and x > 1"), "p < 0.05 and x > 1");
+        assert_eq!(strip("a <b"), "a <b");
+        assert_eq!(strip("a <b and c> d"), "a <b and c> d");
+        assert_eq!(strip("x <y ... z > w"), "x <y ... z > w");
+        assert_eq!(strip("a <b\nc> d"), "a <b c> d");
+        assert_eq!(strip("x &lt;y and z&gt; w"), "x <y and z> w");
+        assert_eq!(strip("a &lt;b c &lt;i&gt;d&lt;/i&gt;"), "a <b c d");
+        // Only the text up to the next '<' is searched for the end of a tag
+        assert_eq!(strip("a <b c <i>d</i>"), "a <b c d");
+        let long = format!("a <b{} > c", " x=1".repeat(MAX_TAG_LEN));
+        assert_eq!(strip(&long), long);
+        assert_eq!(strip("\"Quoted\" and 'single'"), "\"Quoted\" and 'single'");
+    }
+
+    #[test]
+    fn test_decodes_entities() {
+        assert_eq!(strip("Smith &amp; Jones"), "Smith & Jones");
+        assert_eq!(strip("p &lt; 0.05 &gt; 0.01"), "p < 0.05 > 0.01");
+        assert_eq!(strip("&alpha;-helix &#946; &#x3B3;"), "α-helix β γ");
+        assert_eq!(strip("caf&eacute;&nbsp;au&nbsp;lait"), "café au lait");
+        // Unknown or unterminated entities are kept
+        assert_eq!(strip("&unknown; &amp"), "&unknown; &amp");
+        assert_eq!(strip("&#xZZ; AT&T"), "&#xZZ; AT&T");
+    }
+
+    #[test]
+    fn test_strips_escaped_tags() {
+        assert_eq!(
+            strip("results in &lt;i&gt;vitro&lt;/i&gt;"),
+            "results in vitro"
+        );
+        assert_eq!(strip("&lt;jats:p&gt;Text&lt;/jats:p&gt;"), "Text");
+        assert_eq!(
+            strip("&lt;p&gt;One&lt;/p&gt;&lt;p&gt;Two&lt;/p&gt;"),
+            "One Two"
+        );
+    }
+
+    #[test]
+    fn test_normalises_whitespace() {
+        assert_eq!(strip("  Title \n\t with   spaces  "), "Title with spaces");
+        assert_eq!(strip("<p> </p>"), "");
+        assert_eq!(strip(""), "");
+    }
+
+    #[test]
+    fn test_multibyte_characters() {
+        assert_eq!(strip("<b>Über</b> Straße — 東京"), "Über Straße — 東京");
+    }
+}
@@ -0,0 +1,92 @@
+import pathlib
+
+import pytest
+
+from dmpworks.transform.synthetic import generate_synthetic_dataset, SyntheticStats
+from tests.benchmarks.utils import BenchmarkResult, find_regressions, load_baselines, save_baselines
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--run-benchmarks"):
+        return
+
+    skip = pytest.mark.skip(reason="benchmarks only run with --run-benchmarks")
+    for item in items:
+        if "perf_benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+class BenchmarkRecorder:
+    def __init__(self, tolerance: float, save: bool):
+        self.tolerance = tolerance
+        self.save = save
+        self.baselines = load_baselines()
+        self.results: list[BenchmarkResult] = []
+
+    def record(self, result: BenchmarkResult):
+        """Record a result and fail if it has regressed relative to the stored baseline."""
+
+        self.record_all([result])
+
+    def record_all(self, results: list[BenchmarkResult]):
+        """Record several results and fail with every one that has regressed relative to its stored baseline."""
+
+        self.results.extend(results)
+        if self.save:
+            return
+
+        regressions = [
+            regression
+            for result in results
+            for regression in find_regressions(result, self.baselines.get(result.name), self.tolerance)
+        ]
+        if regressions:
+            pytest.fail("\n".join(regressions))
+
+
+recorder_key = pytest.StashKey[BenchmarkRecorder]()
+
+
+@pytest.fixture(scope="session")
+def benchmark_recorder(request):
+    recorder = BenchmarkRecorder(
+        request.config.getoption("--benchmark-tolerance"),
+        request.config.getoption("--save-benchmark-baselines"),
+    )
+    request.config.stash[recorder_key] = recorder
+    yield recorder
+    if recorder.save and recorder.results:
+        save_baselines(recorder.results)
+
+
+@pytest.fixture(scope="session")
+def synthetic_data(request, tmp_path_factory):
+    """Generate each synthetic dataset once per session."""
+
+    scale = request.config.getoption("--benchmark-scale")
+    cache: dict[str, tuple[pathlib.Path, SyntheticStats]] = {}
+
+    def get(dataset: str) -> tuple[pathlib.Path, SyntheticStats]:
+        if dataset not in cache:
+            in_dir = tmp_path_factory.mktemp(f"synthetic_{dataset}")
+            stats = generate_synthetic_dataset(dataset, in_dir, n_records=scale, n_files=8)
+            cache[dataset] = in_dir, stats
+        return cache[dataset]
+
+    return get
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    recorder = config.stash.get(recorder_key, None)
+    if recorder is None or not recorder.results:
+        return
+
+    terminalreporter.section("benchmarks")
+    terminalreporter.write_line(f"{'name':<40} {'rows':>10} {'rows/s':>12} {'MB/s':>8} {'peak RSS MB':>12}")
+    for result in recorder.results:
+        terminalreporter.write_line(
+            f"{result.name:<40} {result.rows:>10,} {result.rows_per_sec:>12,.0f} "
+            f"{result.mb_per_sec:>8.2f} {result.peak_rss_mb:>12,.0f}"
+        )
+    if recorder.save:
+        terminalreporter.write_line("Saved results as the new baselines")
@@ -0,0 +1,77 @@
+import gzip
+import pathlib
+
+import orjson
+import polars as pl
+import pytest
+
+from dmpworks.funders.award_id_expr import AWARD_DTYPE, parse_award_text
+from dmpworks.funders.parser import parse_award_text as py_parse_award_text
+from tests.benchmarks.utils import BenchmarkResult, measure
+
+OPENALEX_TO_ROR = {"f4320332161": "01cwqze88", "f4320306076": "021nxhr62"}
+
+
+def python_parse_award_text(row: dict) -> list[dict]:
+    # The per-row Python parser that parse_award_text replaced, kept as a reference for the benchmark
+    return [
+        {
+            "class": f"{award_id.__class__.__module__}.{award_id.__class__.__name__}",
+            "identifier": award_id.identifier_string(),
+            "key": award_id.award_key(),
+            "parts": [part.to_dict() for part in award_id.parts()],
+            "variants": award_id.generate_variants(),
+        }
+        for award_id in py_parse_award_text(OPENALEX_TO_ROR.get(row["funder_id"]), row["award_id"])
+    ]
+
+
+def parse_awards(in_file: pathlib.Path, out_file: pathlib.Path, method: str):
+    lz = pl.scan_parquet(in_file)
+    if method == "python":
+        awards = pl.struct("funder_id", "award_id").map_elements(
+            python_parse_award_text, return_dtype=pl.List(AWARD_DTYPE)
+        )
+    else:
+        awards = parse_award_text(pl.col("funder_id"), pl.col("award_id"))
+    lz.select(awards=awards).sink_parquet(out_file)
+
+
+@pytest.fixture(scope="session")
+def openalex_grants(synthetic_data, tmp_path_factory) -> pathlib.Path:
+    _, stats = synthetic_data("openalex-works")
+    funder_ids, award_ids = [], []
+    for file in stats.files:
+        with gzip.open(file, "rb") as f:
+            for record in map(orjson.loads, f):
+                for grant in record["grants"]:
+                    funder_ids.append(grant["funder"].rsplit("/", 1)[-1].lower())
+                    award_ids.append(grant["award_id"])
+
+    # Repeat the grants so that the benchmark isn't dominated by reading the file
+    out_file = tmp_path_factory.mktemp("openalex_grants") / "grants.parquet"
+    pl.DataFrame(
+        {"funder_id": funder_ids * 20, "award_id": award_ids * 20},
+        schema={"funder_id": pl.String, "award_id": pl.String},
+    ).write_parquet(out_file)
+    return out_file
+
+
+@pytest.mark.perf_benchmark
+@pytest.mark.parametrize("method", ["python", "expr"])
+def test_parse_award_text_benchmark(
+    method: str, openalex_grants: pathlib.Path, benchmark_recorder, tmp_path: pathlib.Path
+):
+    award_ids = pl.read_parquet(openalex_grants)["award_id"]
+
+    seconds, peak_rss_mb = measure(parse_awards, openalex_grants, tmp_path / "out.parquet", method)
+
+    benchmark_recorder.record(
+        BenchmarkResult(
+            name=f"parse_award_text_{method}",
+            rows=len(award_ids),
+            bytes=award_ids.str.len_bytes().sum(),
+            seconds=seconds,
+            peak_rss_mb=peak_rss_mb,
+        )
+    )
@@ -0,0 +1,71 @@
+import gzip
+import pathlib
+
+import dmpworks.polars_expr_plugin as pe
+import orjson
+import polars as pl
+import pytest
+
+from tests.benchmarks.utils import BenchmarkResult, measure
+
+
+def regex_normalise_doi(expr: pl.Expr) -> pl.Expr:
+    # The chain of string operations that pe.canonical_doi replaced, kept as a reference for the benchmark
+    return expr.str.to_lowercase().str.strip_chars().str.replace_all(r"^https?://[^/]+/", "")
+
+
+def regex_extract_orcid(expr: pl.Expr) -> pl.Expr:
+    return expr.str.to_lowercase().str.extract(r"\d{4}-\d{4}-\d{4}-\d{3}[\dx]", group_index=0)
+
+
+IDENTIFIER_FUNCS = {
+    "doi_regex": ("doi", regex_normalise_doi),
+    "doi_plugin": ("doi", pe.canonical_doi),
+    "orcid_regex": ("orcid", regex_extract_orcid),
+    "orcid_plugin": ("orcid", pe.canonical_orcid),
+}
+
+
+def canonicalise_identifiers(in_file: pathlib.Path, out_file: pathlib.Path, method: str):
+    column, func = IDENTIFIER_FUNCS[method]
+    pl.scan_parquet(in_file).select(func(pl.col(column))).sink_parquet(out_file)
+
+
+@pytest.fixture(scope="session")
+def openalex_identifiers(synthetic_data, tmp_path_factory) -> pathlib.Path:
+    _, stats = synthetic_data("openalex-works")
+    dois, orcids = [], []
+    for file in stats.files:
+        with gzip.open(file, "rb") as f:
+            for record in map(orjson.loads, f):
+                dois.append(record["doi"])
+                orcids.extend(authorship["author"]["orcid"] for authorship in record["authorships"])
+
+    # Repeat the identifiers so that the benchmark isn't dominated by reading the file
+    n = min(len(dois), len(orcids))
+    out_file = tmp_path_factory.mktemp("openalex_identifiers") / "identifiers.parquet"
+    pl.DataFrame(
+        {"doi": dois[:n] * 50, "orcid": orcids[:n] * 50}, schema={"doi": pl.String, "orcid": pl.String}
+    ).write_parquet(out_file)
+    return out_file
+
+
+@pytest.mark.perf_benchmark
+@pytest.mark.parametrize("method", list(IDENTIFIER_FUNCS.keys()))
+def test_canonicalise_identifier_benchmark(
+    method: str, openalex_identifiers: pathlib.Path, benchmark_recorder, tmp_path: pathlib.Path
+):
+    column, _ = IDENTIFIER_FUNCS[method]
+    identifiers = pl.read_parquet(openalex_identifiers)[column]
+
+    seconds, peak_rss_mb = measure(canonicalise_identifiers, openalex_identifiers, tmp_path / "out.parquet", method)
+
+    benchmark_recorder.record(
+        BenchmarkResult(
+            name=f"canonicalise_{method}",
+            rows=len(identifiers),
+            bytes=identifiers.str.len_bytes().sum(),
+            seconds=seconds,
+            peak_rss_mb=peak_rss_mb,
+        )
+    )
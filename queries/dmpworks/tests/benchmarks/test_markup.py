@@ -0,0 +1,61 @@
+import gzip
+import pathlib
+
+import dmpworks.polars_expr_plugin as pe
+import orjson
+import polars as pl
+import pytest
+
+from tests.benchmarks.utils import BenchmarkResult, measure
+
+
+def regex_remove_markup(expr: pl.Expr) -> pl.Expr:
+    # The regex chain that pe.strip_markup replaced, kept as a reference for the benchmark
+    return (
+        expr.str.replace_all("&lt;", "<")
+        .str.replace_all("&gt;", ">")
+        .str.replace_all(r"<[^>]*>", "")
+        .str.replace_all(r"[\'\"]", "")
+    )
+
+
+MARKUP_FUNCS = {
+    "regex": regex_remove_markup,
+    "plugin": pe.strip_markup,
+}
+
+
+def strip_abstracts(in_file: pathlib.Path, out_file: pathlib.Path, method: str):
+    pl.scan_parquet(in_file).select(abstract=MARKUP_FUNCS[method](pl.col("abstract"))).sink_parquet(out_file)
+
+
+@pytest.fixture(scope="session")
+def crossref_abstracts(synthetic_data, tmp_path_factory) -> pathlib.Path:
+    _, stats = synthetic_data("crossref-metadata")
+    abstracts = []
+    for file in stats.files:
+        with gzip.open(file, "rb") as f:
+            abstracts.extend(record["abstract"] for record in map(orjson.loads, f) if record["abstract"] is not None)
+
+    # Repeat the abstracts so that the benchmark isn't dominated by reading the file
+    out_file = tmp_path_factory.mktemp("crossref_abstracts") / "abstracts.parquet"
+    pl.DataFrame({"abstract": abstracts * 20}, schema={"abstract": pl.String}).write_parquet(out_file)
+    return out_file
+
+
+@pytest.mark.perf_benchmark
+@pytest.mark.parametrize("method", list(MARKUP_FUNCS.keys()))
+def test_strip_markup_benchmark(method: str, crossref_abstracts: pathlib.Path, benchmark_recorder, tmp_path):
+    abstracts = pl.read_parquet(crossref_abstracts)["abstract"]
+
+    seconds, peak_rss_mb = measure(strip_abstracts, crossref_abstracts, tmp_path / "out.parquet", method)
+
+    benchmark_recorder.record(
+        BenchmarkResult(
+            name=f"strip_markup_{method}",
+            rows=len(abstracts),
+            bytes=abstracts.str.len_bytes().sum(),
+            seconds=seconds,
+            peak_rss_mb=peak_rss_mb,
+        )
+    )
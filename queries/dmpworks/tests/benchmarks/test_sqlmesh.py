@@ -0,0 +1,306 @@
+import os
+import pathlib
+import shutil
+from typing import Optional
+
+import boto3
+import pytest
+
+from dmpworks.sql.commands import run_plan
+from dmpworks.sql.resources import history_path, load_history
+from dmpworks.transform.crossref_metadata import transform_crossref_metadata
+from dmpworks.transform.datacite import transform_datacite
+from dmpworks.transform.openalex_funders import transform_openalex_funders
+from dmpworks.transform.openalex_works import transform_openalex_works
+from dmpworks.transform.ror import transform_ror
+from dmpworks.transform.synthetic import generate_synthetic_dataset
+from tests.benchmarks.utils import BenchmarkResult, find_superlinear, measure
+
+# Synthetic dataset name, SQLMesh path variable and transform
+DATASETS = [
+    ("openalex-works", "openalex_works", transform_openalex_works),
+    ("openalex-funders", "openalex_funders", transform_openalex_funders),
+    ("crossref-metadata", "crossref_metadata", transform_crossref_metadata),
+    ("datacite", "datacite", transform_datacite),
+]
+WORKS_DATASETS = ["openalex-works", "crossref-metadata", "datacite"]
+S3_BUCKET = "dmpworks-benchmarks"
+
+# Roughly the share of OpenAlex works without a DOI, and with the DOI of another work, in a full snapshot
+OPENALEX_DOI_RATES = {"null_doi_rate": 0.3, "duplicate_doi_rate": 0.02}
+# Models that take less time than this are dominated by fixed overheads, so aren't compared with their baselines
+MIN_MODEL_SECONDS = 1.0
+
+
+def run_sqlmesh_plan(
+    env: dict[str, str],
+    materialise_sources: bool,
+    source_paths: Optional[dict[str, str]] = None,
+    download_dir: Optional[pathlib.Path] = None,
+    concurrent_tasks: int = 1,
+    autotune: bool = False,
+):
+    os.environ.update(env)
+
+    # Download the Parquet files from S3 first, as the Batch job does when it doesn't read them in place
+    if source_paths is not None and download_dir is not None:
+        s3 = boto3.client("s3")
+        for variable, uri in source_paths.items():
+            prefix = uri.removeprefix(f"s3://{S3_BUCKET}/")
+            for obj in s3.list_objects_v2(Bucket=S3_BUCKET, Prefix=prefix)["Contents"]:
+                file_path = download_dir / obj["Key"]
+                file_path.parent.mkdir(parents=True, exist_ok=True)
+                s3.download_file(S3_BUCKET, obj["Key"], str(file_path))
+            os.environ[f"SQLMESH__VARIABLES__{variable.upper()}_PATH"] = str(download_dir / prefix)
+        source_paths = None
+
+    run_plan(
+        materialise_sources=materialise_sources,
+        source_paths=source_paths,
+        concurrent_tasks=concurrent_tasks,
+        autotune=autotune,
+    )
+
+
+def generate_scaled_sources(n_works: int, tmp_dir: pathlib.Path) -> tuple[dict[str, str], int]:
+    """Generate and transform n_works synthetic works for each works dataset.
+
+    :return: the SQLMesh variables that point at the Parquet files and the uncompressed size of the works datasets.
+    """
+
+    env = {}
+    uncompressed_bytes = 0
+    for dataset, variable, transform in DATASETS:
+        in_dir = tmp_dir / f"synthetic_{variable}"
+        if dataset == "openalex-funders":
+            # Funder records cycle through a fixed pool of funders
+            generate_synthetic_dataset(dataset, in_dir, n_records=1_000, n_files=1)
+        else:
+            stats = generate_synthetic_dataset(
+                dataset,
+                in_dir,
+                n_records=n_works,
+                n_files=8,
+                **(OPENALEX_DOI_RATES if dataset == "openalex-works" else {}),
+            )
+            uncompressed_bytes += stats.uncompressed_bytes
+        out_dir = tmp_dir / f"transform_{variable}"
+        transform(in_dir, out_dir)
+        shutil.rmtree(in_dir)
+        env[f"SQLMESH__VARIABLES__{variable.upper()}_PATH"] = str(out_dir / "parquets")
+
+    stats = generate_synthetic_dataset("ror", tmp_dir / "synthetic_ror")
+    transform_ror(stats.files[0], tmp_dir / "transform_ror")
+    env["SQLMESH__VARIABLES__ROR_PATH"] = str(tmp_dir / "transform_ror" / "parquets")
+
+    for variable in ["openalex_works", "crossref_metadata_works", "datacite_works"]:
+        env[f"SQLMESH__VARIABLES__AUDIT_{variable.upper()}_THRESHOLD"] = "1"
+    env["SQLMESH__VARIABLES__EXPORT_PARTITIONS"] = "16"
+    env["SQLMESH__GATEWAYS__DUCKDB__CONNECTION__DATABASE"] = str(tmp_dir / "db.db")
+    env["SQLMESH__VARIABLES__EXPORT_PATH"] = str(tmp_dir / "export")
+    (tmp_dir / "export").mkdir()
+    return env, uncompressed_bytes
+
+
+@pytest.fixture(scope="session")
+def sqlmesh_env(synthetic_data, tmp_path_factory) -> dict[str, str]:
+    """Transform each synthetic dataset and return the SQLMesh variables that point at the Parquet files."""
+
+    env = {}
+    for dataset, variable, transform in DATASETS:
+        in_dir, _ = synthetic_data(dataset)
+        out_dir = tmp_path_factory.mktemp(f"transform_{variable}")
+        transform(in_dir, out_dir)
+        env[f"SQLMESH__VARIABLES__{variable.upper()}_PATH"] = str(out_dir / "parquets")
+
+    _, stats = synthetic_data("ror")
+    out_dir = tmp_path_factory.mktemp("transform_ror")
+    transform_ror(stats.files[0], out_dir)
+    env["SQLMESH__VARIABLES__ROR_PATH"] = str(out_dir / "parquets")
+
+    # The row count audits are sized for the full datasets
+    for variable in ["openalex_works", "crossref_metadata_works", "datacite_works"]:
+        env[f"SQLMESH__VARIABLES__AUDIT_{variable.upper()}_THRESHOLD"] = "1"
+    env["SQLMESH__VARIABLES__EXPORT_PARTITIONS"] = "16"
+    return env
+
+
+@pytest.fixture(scope="session")
+def s3_sources(sqlmesh_env) -> tuple[dict[str, str], dict[str, str]]:
+    """Upload the transformed Parquet files to a local S3 compatible server and return the environment variables to
+    access it and the S3 URI of each dataset's Parquet files."""
+
+    moto_server = pytest.importorskip("moto.server", reason="moto[server] is required for the S3 benchmarks")
+    server = moto_server.ThreadedMotoServer(ip_address="127.0.0.1", port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    env = {
+        "AWS_ACCESS_KEY_ID": "benchmark",
+        "AWS_SECRET_ACCESS_KEY": "benchmark",
+        "AWS_DEFAULT_REGION": "us-east-1",
+        "AWS_ENDPOINT_URL": f"http://{host}:{port}",
+    }
+
+    s3 = boto3.client("s3", endpoint_url=env["AWS_ENDPOINT_URL"], region_name="us-east-1")
+    s3.create_bucket(Bucket=S3_BUCKET)
+    source_paths = {}
+    for dataset, variable, _ in [*DATASETS, ("ror", "ror", None)]:
+        parquets_dir = pathlib.Path(sqlmesh_env[f"SQLMESH__VARIABLES__{variable.upper()}_PATH"])
+        prefix = f"{variable}/transform/parquets"
+        for file_path in parquets_dir.glob("*.parquet"):
+            s3.upload_file(str(file_path), S3_BUCKET, f"{prefix}/{file_path.name}")
+        source_paths[variable] = f"s3://{S3_BUCKET}/{prefix}"
+
+    yield env, source_paths
+    server.stop()
+
+
+@pytest.mark.perf_benchmark
+@pytest.mark.parametrize("materialise_sources", [False, True], ids=["views", "tables"])
+def test_sqlmesh_plan_benchmark(
+    materialise_sources: bool, sqlmesh_env: dict[str, str], synthetic_data, benchmark_recorder, tmp_path: pathlib.Path
+):
+    # Per model runtimes are logged by run_plan
+    export_dir = tmp_path / "export"
+    export_dir.mkdir()
+    env = {
+        **sqlmesh_env,
+        "SQLMESH__GATEWAYS__DUCKDB__CONNECTION__DATABASE": str(tmp_path / "db.db"),
+        "SQLMESH__VARIABLES__EXPORT_PATH": str(export_dir),
+    }
+
+    seconds, peak_rss_mb = measure(run_sqlmesh_plan, env, materialise_sources)
+
+    assert len(list(export_dir.glob("export_*.parquet"))) == 16
+    assert (export_dir / "_manifest.jsonl").exists()
+    stats = [synthetic_data(dataset)[1] for dataset in WORKS_DATASETS]
+    benchmark_recorder.record(
+        BenchmarkResult(
+            name=f"sqlmesh_plan_{'tables' if materialise_sources else 'views'}",
+            rows=sum(stat.n_records for stat in stats),
+            bytes=sum(stat.uncompressed_bytes for stat in stats),
+            seconds=seconds,
+            peak_rss_mb=peak_rss_mb,
+        )
+    )
+
+
+@pytest.mark.perf_benchmark
+@pytest.mark.parametrize("read_in_place", [False, True], ids=["download", "in_place"])
+def test_sqlmesh_plan_s3_benchmark(
+    read_in_place: bool,
+    sqlmesh_env: dict[str, str],
+    s3_sources: tuple[dict[str, str], dict[str, str]],
+    synthetic_data,
+    benchmark_recorder,
+    tmp_path: pathlib.Path,
+):
+    """Compare downloading the Parquet files from S3 before running the plan with reading them in place on S3."""
+
+    s3_env, source_paths = s3_sources
+    export_dir = tmp_path / "export"
+    export_dir.mkdir()
+    env = {
+        **sqlmesh_env,
+        **s3_env,
+        "SQLMESH__GATEWAYS__DUCKDB__CONNECTION__DATABASE": str(tmp_path / "db.db"),
+        "SQLMESH__VARIABLES__EXPORT_PATH": str(export_dir),
+    }
+    download_dir = None if read_in_place else tmp_path / "download"
+
+    seconds, peak_rss_mb = measure(run_sqlmesh_plan, env, False, source_paths, download_dir)
+
+    assert len(list(export_dir.glob("export_*.parquet"))) == 16
+    assert (export_dir / "_manifest.jsonl").exists()
+    stats = [synthetic_data(dataset)[1] for dataset in WORKS_DATASETS]
+    benchmark_recorder.record(
+        BenchmarkResult(
+            name=f"sqlmesh_plan_s3_{'in_place' if read_in_place else 'download'}",
+            rows=sum(stat.n_records for stat in stats),
+            bytes=sum(stat.uncompressed_bytes for stat in stats),
+            seconds=seconds,
+            peak_rss_mb=peak_rss_mb,
+        )
+    )
+
+
+@pytest.mark.perf_benchmark
+@pytest.mark.parametrize("concurrent_tasks", [1, 4], ids=["serial", "concurrent"])
+def test_sqlmesh_plan_concurrency_benchmark(
+    concurrent_tasks: int, sqlmesh_env: dict[str, str], synthetic_data, benchmark_recorder, tmp_path: pathlib.Path
+):
+    """Compare evaluating the models one at a time with evaluating independent models concurrently. The critical path
+    and how much the models overlapped are logged by run_plan."""
+
+    export_dir = tmp_path / "export"
+    export_dir.mkdir()
+    env = {
+        **sqlmesh_env,
+        "SQLMESH__GATEWAYS__DUCKDB__CONNECTION__DATABASE": str(tmp_path / "db.db"),
+        "SQLMESH__VARIABLES__EXPORT_PATH": str(export_dir),
+    }
+
+    seconds, peak_rss_mb = measure(run_sqlmesh_plan, env, False, None, None, concurrent_tasks)
+
+    assert len(list(export_dir.glob("export_*.parquet"))) == 16
+    assert (export_dir / "_manifest.jsonl").exists()
+    stats = [synthetic_data(dataset)[1] for dataset in WORKS_DATASETS]
+    benchmark_recorder.record(
+        BenchmarkResult(
+            name=f"sqlmesh_plan_concurrent_tasks_{concurrent_tasks}",
+            rows=sum(stat.n_records for stat in stats),
+            bytes=sum(stat.uncompressed_bytes for stat in stats),
+            seconds=seconds,
+            peak_rss_mb=peak_rss_mb,
+        )
+    )
+
+
+@pytest.mark.perf_benchmark
+def test_sqlmesh_plan_scaling_benchmark(request, benchmark_recorder, tmp_path_factory):
+    """Run the plan on synthetic works at each of --sqlmesh-scales and record the runtime and peak DuckDB memory of each
+    model, which are compared with their baselines. Fails when a model's runtime grows faster than the number of works
+    to the power of --max-scaling-exponent, e.g. when a change turns a hash join into a nested loop join."""
+
+    scales = sorted(request.config.getoption("--sqlmesh-scales"))
+    max_exponent = request.config.getoption("--max-scaling-exponent")
+
+    results = []
+    model_seconds: dict[str, dict[int, float]] = {}
+    for n_works in scales:
+        tmp_dir = tmp_path_factory.mktemp(f"sqlmesh_{n_works}")
+        env, uncompressed_bytes = generate_scaled_sources(n_works, tmp_dir)
+
+        # autotune records the resources used by each model in the resource history next to the database
+        seconds, peak_rss_mb = measure(run_sqlmesh_plan, env, False, None, None, 1, True)
+
+        assert len(list((tmp_dir / "export").glob("export_*.parquet"))) == 16
+        results.append(
+            BenchmarkResult(
+                name=f"sqlmesh_plan_scaled_{n_works}",
+                rows=n_works,
+                bytes=uncompressed_bytes,
+                seconds=seconds,
+                peak_rss_mb=peak_rss_mb,
+            )
+        )
+        run = load_history(history_path(env["SQLMESH__GATEWAYS__DUCKDB__CONNECTION__DATABASE"]))[-1]
+        for name, model_run in run.items():
+            # Model names include the catalog, which is named after the database file
+            model = ".".join(part.strip('"') for part in name.split(".")[1:])
+            model_seconds.setdefault(model, {})[n_works] = model_run.seconds
+            if model_run.seconds >= MIN_MODEL_SECONDS:
+                results.append(
+                    BenchmarkResult(
+                        name=f"sqlmesh_model_{model.replace('.', '_')}_{n_works}",
+                        rows=n_works,
+                        bytes=uncompressed_bytes,
+                        seconds=model_run.seconds,
+                        peak_rss_mb=model_run.peak_memory_bytes / 1024**2,
+                    )
+                )
+
+    superlinear = find_superlinear(model_seconds, max_exponent, min_seconds=MIN_MODEL_SECONDS)
+    benchmark_recorder.record_all(results)
+    if superlinear:
+        pytest.fail("\n".join(superlinear))
@@ -0,0 +1,58 @@
+import pathlib
+
+import pytest
+
+from dmpworks.transform.crossref_metadata import transform_crossref_metadata
+from dmpworks.transform.datacite import transform_datacite
+from dmpworks.transform.dmps import transform_dmps
+from dmpworks.transform.openalex_funders import transform_openalex_funders
+from dmpworks.transform.openalex_works import transform_openalex_works
+from dmpworks.transform.ror import transform_ror
+from tests.benchmarks.utils import BenchmarkResult, measure
+
+TRANSFORMS = {
+    "crossref-metadata": transform_crossref_metadata,
+    "datacite": transform_datacite,
+    "openalex-works": transform_openalex_works,
+    "openalex-funders": transform_openalex_funders,
+    "dmps": transform_dmps,
+}
+
+
+@pytest.mark.perf_benchmark
+@pytest.mark.parametrize("dataset", list(TRANSFORMS.keys()))
+def test_transform_benchmark(dataset: str, synthetic_data, benchmark_recorder, tmp_path: pathlib.Path):
+    in_dir, stats = synthetic_data(dataset)
+    out_dir = tmp_path / "output"
+
+    seconds, peak_rss_mb = measure(TRANSFORMS[dataset], in_dir, out_dir)
+
+    assert list((out_dir / "parquets").glob("*.parquet"))
+    benchmark_recorder.record(
+        BenchmarkResult(
+            name=f"transform_{dataset.replace('-', '_')}",
+            rows=stats.n_records,
+            bytes=stats.uncompressed_bytes,
+            seconds=seconds,
+            peak_rss_mb=peak_rss_mb,
+        )
+    )
+
+
+@pytest.mark.perf_benchmark
+def test_transform_ror_benchmark(synthetic_data, benchmark_recorder, tmp_path: pathlib.Path):
+    _, stats = synthetic_data("ror")
+    out_dir = tmp_path / "output"
+
+    seconds, peak_rss_mb = measure(transform_ror, stats.files[0], out_dir)
+
+    assert (out_dir / "parquets" / "ror.parquet").exists()
+    benchmark_recorder.record(
+        BenchmarkResult(
+            name="transform_ror",
+            rows=stats.n_records,
+            bytes=stats.uncompressed_bytes,
+            seconds=seconds,
+            peak_rss_mb=peak_rss_mb,
+        )
+    )
@@ -0,0 +1,153 @@
+import json
+import math
+import multiprocessing as mp
+import pathlib
+import resource
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Optional
+
+BASELINES_FILE = pathlib.Path(__file__).parent / "baselines.json"
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    rows: int
+    bytes: int
+    seconds: float
+    peak_rss_mb: float
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds
+
+    @property
+    def mb_per_sec(self) -> float:
+        return self.bytes / 1e6 / self.seconds
+
+    def to_dict(self) -> dict:
+        return {
+            **asdict(self),
+            "rows_per_sec": round(self.rows_per_sec, 1),
+            "mb_per_sec": round(self.mb_per_sec, 3),
+        }
+
+
+def peak_rss_mb() -> float:
+    # Peak RSS of this process and its largest child process, e.g. the file extraction process pool
+    rss = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return rss / 1024**2 if sys.platform == "darwin" else rss / 1024
+
+
+def measure_child(conn, func: Callable, args: tuple, kwargs: dict):
+    try:
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        conn.send((time.perf_counter() - start, peak_rss_mb()))
+    except BaseException as e:
+        conn.send(e)
+    finally:
+        conn.close()
+
+
+def measure(func: Callable, *args, **kwargs) -> tuple[float, float]:
+    """Run func in a fresh process, so that peak RSS isn't polluted by earlier benchmarks.
+
+    :return: the elapsed seconds and peak RSS in MB.
+    """
+
+    ctx = mp.get_context("spawn")
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=measure_child, args=(child_conn, func, args, kwargs))
+    process.start()
+    child_conn.close()
+    try:
+        result = parent_conn.recv()
+    except EOFError:
+        result = None
+    process.join()
+
+    if result is None:
+        raise RuntimeError(f"Benchmark process exited without a result, exitcode={process.exitcode}")
+
+    if isinstance(result, BaseException):
+        raise result
+    return result
+
+
+def load_baselines(path: pathlib.Path = BASELINES_FILE) -> dict[str, dict]:
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baselines(results: list[BenchmarkResult], path: pathlib.Path = BASELINES_FILE):
+    baselines = load_baselines(path)
+    baselines.update({result.name: result.to_dict() for result in results})
+    with open(path, "w") as f:
+        json.dump(dict(sorted(baselines.items())), f, indent=2)
+        f.write("\n")
+
+
+def find_regressions(result: BenchmarkResult, baseline: Optional[dict], tolerance: float) -> list[str]:
+    if baseline is None:
+        return []
+
+    regressions = []
+    min_rows_per_sec = baseline["rows_per_sec"] * (1 - tolerance)
+    if result.rows_per_sec < min_rows_per_sec:
+        regressions.append(
+            f"{result.name}: {result.rows_per_sec:,.0f} rows/s is below the baseline of "
+            f"{baseline['rows_per_sec']:,.0f} rows/s"
+        )
+    max_peak_rss_mb = baseline["peak_rss_mb"] * (1 + tolerance)
+    if result.peak_rss_mb > max_peak_rss_mb:
+        regressions.append(
+            f"{result.name}: peak RSS of {result.peak_rss_mb:,.0f} MB is above the baseline of "
+            f"{baseline['peak_rss_mb']:,.0f} MB"
+        )
+    return regressions
+
+
+def scaling_exponent(rows: list[int], seconds: list[float]) -> float:
+    """Fit seconds = c * rows^k by least squares on a log-log scale and return k, 1 is linear."""
+
+    xs = [math.log(n) for n in rows]
+    ys = [math.log(max(t, 1e-3)) for t in seconds]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    variance = sum((x - mean_x) ** 2 for x in xs)
+    if variance == 0:
+        raise ValueError("scaling_exponent: at least two different numbers of rows are required")
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / variance
+
+
+def find_superlinear(runs: dict[str, dict[int, float]], max_exponent: float, min_seconds: float = 1.0) -> list[str]:
+    """Find the models whose runtime grows faster than the number of rows to the power max_exponent.
+
+    :param runs: the seconds each model took at each number of rows.
+    :param max_exponent: the largest scaling exponent allowed.
+    :param min_seconds: models that take less time than this at the largest scale are skipped, as their runtimes are
+    dominated by fixed overheads.
+    :return: a description of each model that scaled super-linearly.
+    """
+
+    failures = []
+    for name, seconds in sorted(runs.items()):
+        rows = sorted(seconds)
+        if len(rows) < 2 or seconds[rows[-1]] < min_seconds:
+            continue
+
+        exponent = scaling_exponent(rows, [seconds[n] for n in rows])
+        if exponent > max_exponent:
+            timings = ", ".join(f"{seconds[n]:.1f}s at {n:,}" for n in rows)
+            failures.append(
+                f"{name}: runtime grows with rows^{exponent:.2f}, more than rows^{max_exponent:.2f} ({timings})"
+            )
+    return failures
@@ -0,0 +1,40 @@
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmark", "transform benchmarks")
+    group.addoption(
+        "--run-benchmarks", action="store_true", default=False, help="Run the benchmarks in tests/benchmarks."
+    )
+    group.addoption(
+        "--benchmark-scale",
+        type=int,
+        default=20_000,
+        help="Number of synthetic records to generate for each dataset.",
+    )
+    group.addoption(
+        "--benchmark-tolerance",
+        type=float,
+        default=0.2,
+        help="Fraction that throughput can drop, or peak RSS grow, relative to the baseline before failing.",
+    )
+    group.addoption(
+        "--sqlmesh-scales",
+        type=lambda value: [int(scale) for scale in value.split(",")],
+        default=[20_000, 100_000],
+        help="Comma separated numbers of works to generate for the scaled SQLMesh benchmark, e.g. 1000000,10000000.",
+    )
+    group.addoption(
+        "--max-scaling-exponent",
+        type=float,
+        default=1.2,
+        help="Fail the scaled SQLMesh benchmark when a model's runtime grows faster than the number of works to this "
+        "power.",
+    )
+    group.addoption(
+        "--save-benchmark-baselines",
+        action="store_true",
+        default=False,
+        help="Save the benchmark results as the new baselines.",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "perf_benchmark: slow performance benchmark, only run with --run-benchmarks")
@@ -0,0 +1,203 @@
+import json
+import pathlib
+import shlex
+
+import boto3
+import pytest
+
+from dmpworks.batch.cache import S3Cache
+from dmpworks.batch.utils import cache_s3_prefix, CHECKSUMS_FILE, download_from_s3, parse_s3_uri, upload_to_s3
+
+moto = pytest.importorskip("moto", reason="moto is required for the S3 transfer tests")
+
+BUCKET = "dmpworks-test"
+PREFIX = f"s3://{BUCKET}/openalex_works/2025-01-01/transform/parquets/"
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    for name in ["AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"]:
+        monkeypatch.setenv(name, "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with moto.mock_aws():
+        s3_client = boto3.client("s3")
+        s3_client.create_bucket(Bucket=BUCKET)
+        yield s3_client
+
+
+@pytest.fixture
+def s5cmd(s3, mocker) -> list[list[str]]:
+    """Run the commands given to s5cmd run with boto3, and record them."""
+
+    commands = []
+
+    def run_process(args):
+        assert args[:2] == ["s5cmd", "run"]
+        for line in pathlib.Path(args[2]).read_text().splitlines():
+            command = shlex.split(line)
+            commands.append(command)
+            if command[0] == "cp" and command[1].startswith("s3://"):
+                pathlib.Path(command[2]).parent.mkdir(parents=True, exist_ok=True)
+                s3.download_file(*parse_s3_uri(command[1]), command[2])
+            elif command[0] == "cp":
+                s3.upload_file(command[1], *parse_s3_uri(command[2]))
+            elif command[0] == "rm":
+                s3.delete_object(**dict(zip(["Bucket", "Key"], parse_s3_uri(command[1]))))
+
+    mocker.patch("dmpworks.batch.utils.run_process", side_effect=run_process)
+    return commands
+
+
+def write_files(local_dir: pathlib.Path, files: dict[str, bytes]):
+    for name, data in files.items():
+        file_path = local_dir / name
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_bytes(data)
+
+
+def test_upload_to_s3_skips_unchanged_files(s3, s5cmd, tmp_path: pathlib.Path):
+    local_dir = tmp_path / "parquets"
+    write_files(local_dir, {"works_00000.parquet": b"a", "works_00001.parquet": b"b", "works_00002.parquet": b"c"})
+
+    upload_to_s3(local_dir, PREFIX, "*.parquet", s3_client=s3)
+    assert [command[0] for command in s5cmd] == ["cp", "cp", "cp"]
+
+    # Uploading identical files again transfers nothing
+    s5cmd.clear()
+    upload_to_s3(local_dir, PREFIX, "*.parquet", s3_client=s3)
+    assert s5cmd == []
+
+    # Only the changed file is uploaded and the file that no longer exists is deleted
+    (local_dir / "works_00001.parquet").write_bytes(b"B")
+    (local_dir / "works_00002.parquet").unlink()
+    upload_to_s3(local_dir, PREFIX, "*.parquet", s3_client=s3)
+    assert s5cmd == [
+        ["cp", str(local_dir / "works_00001.parquet"), f"{PREFIX}works_00001.parquet"],
+        ["rm", f"{PREFIX}works_00002.parquet"],
+    ]
+
+    bucket, prefix = parse_s3_uri(PREFIX)
+    keys = sorted(obj["Key"].removeprefix(prefix) for obj in s3.list_objects_v2(Bucket=bucket)["Contents"])
+    assert keys == [CHECKSUMS_FILE, "works_00000.parquet", "works_00001.parquet"]
+    checksums = json.loads(s3.get_object(Bucket=bucket, Key=f"{prefix}{CHECKSUMS_FILE}")["Body"].read())
+    assert {name: checksum["size"] for name, checksum in checksums.items()} == {
+        "works_00000.parquet": 1,
+        "works_00001.parquet": 1,
+    }
+
+
+def test_download_from_s3_skips_unchanged_files(s3, s5cmd, tmp_path: pathlib.Path):
+    local_dir = tmp_path / "upload"
+    write_files(local_dir, {"parquets/works_00000.parquet": b"a", "parquets/works_00001.parquet": b"b"})
+    upload_to_s3(local_dir / "parquets", PREFIX, "*.parquet", s3_client=s3)
+
+    # Download the parent prefix, the checksums are found below it
+    source_uri = PREFIX.removesuffix("parquets/")
+    target_dir = tmp_path / "download"
+    s5cmd.clear()
+    download_from_s3(f"{source_uri}*", target_dir, s3_client=s3)
+    assert [command[0] for command in s5cmd] == ["cp", "cp"]
+    assert (target_dir / "parquets" / "works_00001.parquet").read_bytes() == b"b"
+    assert not (target_dir / "parquets" / CHECKSUMS_FILE).exists()
+
+    # Unchanged files are kept, changed and orphaned files are replaced and deleted
+    s5cmd.clear()
+    (target_dir / "parquets" / "works_00001.parquet").write_bytes(b"X")
+    (target_dir / "parquets" / "works_00002.parquet").write_bytes(b"c")
+    download_from_s3(f"{source_uri}*", target_dir, s3_client=s3)
+    assert s5cmd == [
+        ["cp", f"{source_uri}parquets/works_00001.parquet", str(target_dir / "parquets" / "works_00001.parquet")]
+    ]
+    assert (target_dir / "parquets" / "works_00001.parquet").read_bytes() == b"b"
+    assert not (target_dir / "parquets" / "works_00002.parquet").exists()
+
+
+def test_download_from_s3_skips_unchanged_files_below_upload_prefix(s3, s5cmd, tmp_path: pathlib.Path):
+    # As with the SQLMesh task, which uploads its whole data directory and downloads the duckdb and export directories
+    local_dir = tmp_path / "upload"
+    write_files(
+        local_dir, {"duckdb/db.db": b"a", "export/works/works_00000.parquet": b"b", "export/dmps.parquet": b"c"}
+    )
+    upload_to_s3(local_dir, PREFIX, s3_client=s3)
+
+    bucket, prefix = parse_s3_uri(PREFIX)
+    keys = sorted(obj["Key"].removeprefix(prefix) for obj in s3.list_objects_v2(Bucket=bucket)["Contents"])
+    assert keys == [
+        f"duckdb/{CHECKSUMS_FILE}",
+        "duckdb/db.db",
+        f"export/{CHECKSUMS_FILE}",
+        "export/dmps.parquet",
+        f"export/works/{CHECKSUMS_FILE}",
+        "export/works/works_00000.parquet",
+    ]
+
+    for directory in ["duckdb", "export"]:
+        target_dir = tmp_path / "download" / directory
+        s5cmd.clear()
+        download_from_s3(f"{PREFIX}{directory}/*", target_dir, s3_client=s3)
+        assert s5cmd
+        s5cmd.clear()
+        download_from_s3(f"{PREFIX}{directory}/*", target_dir, s3_client=s3)
+        assert s5cmd == []
+    assert (tmp_path / "download" / "export" / "works" / "works_00000.parquet").read_bytes() == b"b"
+
+    # The checksums of directories that are no longer uploaded are deleted
+    (local_dir / "duckdb" / "db.db").unlink()
+    upload_to_s3(local_dir, PREFIX, s3_client=s3)
+    keys = sorted(obj["Key"].removeprefix(prefix) for obj in s3.list_objects_v2(Bucket=bucket)["Contents"])
+    assert not any(key.startswith("duckdb/") for key in keys)
+
+
+def test_download_from_s3_uses_cache(s3, s5cmd, tmp_path: pathlib.Path):
+    write_files(tmp_path / "upload", {"works_00000.parquet": b"a", "works_00001.parquet": b"b"})
+    upload_to_s3(tmp_path / "upload", PREFIX, "*.parquet", s3_client=s3)
+    cache = S3Cache(tmp_path / "cache", max_bytes=1_000)
+
+    # The first download is cached, and later ones are copied from the cache while the objects are unchanged
+    s5cmd.clear()
+    download_from_s3(f"{PREFIX}*", tmp_path / "first", s3_client=s3, cache=cache)
+    assert len(s5cmd) == 2
+    s5cmd.clear()
+    download_from_s3(f"{PREFIX}*", tmp_path / "second", s3_client=s3, cache=cache)
+    assert s5cmd == []
+    assert (tmp_path / "second" / "works_00001.parquet").read_bytes() == b"b"
+
+    # Deleting the downloaded files doesn't delete the cached copies
+    for file_path in (tmp_path / "first").iterdir():
+        file_path.unlink()
+    download_from_s3(f"{PREFIX}*", tmp_path / "first", s3_client=s3, cache=cache)
+    assert s5cmd == []
+    assert (tmp_path / "first" / "works_00000.parquet").read_bytes() == b"a"
+
+    # A changed object invalidates the cached copy
+    (tmp_path / "upload" / "works_00001.parquet").write_bytes(b"B")
+    upload_to_s3(tmp_path / "upload", PREFIX, "*.parquet", s3_client=s3)
+    s5cmd.clear()
+    download_from_s3(f"{PREFIX}*", tmp_path / "second", s3_client=s3, cache=cache)
+    assert s5cmd == [["cp", f"{PREFIX}works_00001.parquet", str(tmp_path / "second" / "works_00001.parquet")]]
+    assert (tmp_path / "second" / "works_00001.parquet").read_bytes() == b"B"
+    # Overwriting the downloaded file didn't change the copy in the cache
+    assert (tmp_path / "first" / "works_00001.parquet").read_bytes() == b"b"
+
+
+def test_cache_evicts_least_recently_used(s3, tmp_path: pathlib.Path):
+    cache = S3Cache(tmp_path / "cache", max_bytes=10)
+    bucket, prefix = parse_s3_uri(PREFIX)
+    for name in ["a", "b", "c"]:
+        write_files(tmp_path / name, {"data": name.encode() * 4})
+        s3.put_object(Bucket=bucket, Key=f"{prefix}{name}/data", Body=name.encode() * 4)
+
+    cache_s3_prefix(cache, f"{PREFIX}a/", tmp_path / "a", s3_client=s3)
+    cache_s3_prefix(cache, f"{PREFIX}b/", tmp_path / "b", s3_client=s3)
+    # Using a makes b the least recently used, so b is evicted to make room for c
+    assert cache.restore(
+        f"{PREFIX}a/", {"data": s3.head_object(Bucket=bucket, Key=f"{prefix}a/data")["ETag"]}, tmp_path / "restored"
+    )
+    cache_s3_prefix(cache, f"{PREFIX}c/", tmp_path / "c", s3_client=s3)
+    assert sorted(metadata["s3_uri"] for metadata in cache.list_metadata()) == [f"{PREFIX}a/", f"{PREFIX}c/"]
+
+    # Nothing is cached when the files are larger than the cache
+    write_files(tmp_path / "d", {"data": b"d" * 11})
+    s3.put_object(Bucket=bucket, Key=f"{prefix}d/data", Body=b"d" * 11)
+    cache_s3_prefix(cache, f"{PREFIX}d/", tmp_path / "d", s3_client=s3)
+    assert cache.read_metadata(f"{PREFIX}d/") is None
@@ -0,0 +1,102 @@
+import csv
+import os
+from typing import Optional
+
+import polars as pl
+
+from dmpworks.funders.award_id import AwardID
+from dmpworks.funders.award_id_expr import parse_award_text, parse_nih_award_id, parse_nsf_award_id
+from dmpworks.funders.nih_award_id import NIHAwardID
+from dmpworks.funders.nsf_award_id import NSFAwardID
+from dmpworks.funders.parser import parse_award_text as py_parse_award_text
+from queries.dmpworks.tests.utils import get_fixtures_path
+
+FIXTURES_FOLDER = get_fixtures_path()
+
+EXTRA_TEXTS = [
+    None,
+    "",
+    "  ",
+    "n/a",
+    "1 RO1 AG080054-01R1",
+    "NIH AG080054-01A1S1",
+    "DMR 1507101",
+    "NSF-1507101",
+    "123NSF4567",
+    "AWD_ID=12",
+]
+
+
+def sort_variants(award: Optional[dict]) -> Optional[dict]:
+    # Variants are generated in a different order to the Python parsers
+    if award is None:
+        return None
+    return {**award, "variants": sorted(award["variants"])}
+
+
+def to_struct(award_id: Optional[AwardID]) -> Optional[dict]:
+    if award_id is None:
+        return None
+
+    return {
+        "class": f"{award_id.__class__.__module__}.{award_id.__class__.__name__}",
+        "identifier": award_id.identifier_string(),
+        "key": award_id.award_key(),
+        "parts": [part.to_dict() for part in award_id.parts()],
+        "variants": sorted(award_id.generate_variants()),
+    }
+
+
+def load_texts(file_name: str) -> list[Optional[str]]:
+    with open(os.path.join(FIXTURES_FOLDER, file_name), mode="r") as f:
+        return [row["text"] for row in csv.DictReader(f)] + EXTRA_TEXTS
+
+
+def parse_column(parser, texts: list[Optional[str]]) -> list[Optional[dict]]:
+    df = pl.DataFrame({"text": texts}, schema={"text": pl.String})
+    return [sort_variants(award) for award in df.select(award=parser(pl.col("text")))["award"].to_list()]
+
+
+def test_parse_nih_award_id():
+    texts = load_texts("nih_award_ids.csv")
+    assert parse_column(parse_nih_award_id, texts) == [to_struct(NIHAwardID.parse(text)) for text in texts]
+
+
+def test_parse_nsf_award_id():
+    texts = load_texts("nsf_award_ids.csv")
+    assert parse_column(parse_nsf_award_id, texts) == [to_struct(NSFAwardID.parse(text)) for text in texts]
+
+
+def test_parse_award_text():
+    funder_ids = ["01cwqze88", "01cwqze88", "021nxhr62", "021nxhr62", "00x0xx000", None]
+    texts = [
+        "U19 AI111143; U19 AI111143;U19 AI111143, n/a",
+        None,
+        "Lead 2126792, 2126793, 2126793",
+        "https://www.nsf.gov/awardsearch/showAward?AWD_ID=0932263&HistoricalAwards=false",
+        "R01HL126896",
+        "R01HL126896",
+    ]
+    df = pl.DataFrame({"funder_id": funder_ids, "text": texts})
+    awards = df.select(awards=parse_award_text(pl.col("funder_id"), pl.col("text")))["awards"].to_list()
+
+    for funder_id, text, result in zip(funder_ids, texts, awards):
+        expected = [to_struct(award_id) for award_id in py_parse_award_text(funder_id, text)]
+        assert sorted(map(sort_variants, result), key=str) == sorted(expected, key=str)
+
+    # Fundref and OpenAlex funder IDs use the same parsers as ROR IDs
+    df = pl.DataFrame({"funder_id": ["10.13039/100000002", "f4320332161"], "text": ["R01HL126896", "R01HL126896"]})
+    awards = df.select(awards=parse_award_text(pl.col("funder_id"), pl.col("text")))["awards"].to_list()
+    assert [[award["identifier"] for award in row] for row in awards] == [["R01HL126896"], ["R01HL126896"]]
+
+    # Every award ID in the fixtures is found when parsed as award text
+    for funder_id, file_name, parser in [
+        ("01cwqze88", "nih_award_ids.csv", NIHAwardID.parse),
+        ("021nxhr62", "nsf_award_ids.csv", NSFAwardID.parse),
+    ]:
+        texts = [text.replace(",", "") if text else text for text in load_texts(file_name)]
+        df = pl.DataFrame({"funder_id": funder_id, "text": texts}, schema={"funder_id": pl.String, "text": pl.String})
+        awards = df.select(awards=parse_award_text(pl.col("funder_id"), pl.col("text")))["awards"].to_list()
+        assert [[sort_variants(award) for award in row] for row in awards] == [
+            [to_struct(parser(text))] if parser(text) is not None else [] for text in texts
+        ]
@@ -0,0 +1,64 @@
+from dmpworks.funders.nih_award_id import parse_nih_award_id
+from dmpworks.funders.nsf_award_id import parse_nsf_award_id
+from dmpworks.model.dmp_model import Award
+from dmpworks.opensearch.dmp_works import build_awards_query
+
+
+def make_award(award_id) -> Award:
+    return Award(funder=None, award_id=award_id, funded_dois=[])
+
+
+def award_queries(query: dict) -> list[list[dict]]:
+    assert query["nested"]["path"] == "awards"
+    return [award["dis_max"]["queries"] for award in query["nested"]["query"]["bool"]["should"]]
+
+
+def test_build_awards_query_award_keys():
+    nih = parse_nih_award_id("5R01HL123456-02")
+    nsf = parse_nsf_award_id("DMS-1234567")
+    query = build_awards_query("awards", [make_award(nih), make_award(nsf)])
+
+    # Each award matches on its award keys, or on any of its variants for works whose funder ID isn't the parent
+    # funder, e.g. an NIH institute, which have no award keys. The dis_max caps each award's score at 10.
+    queries = award_queries(query)
+    assert len(queries) == 2
+    keys, variants = queries[0]
+    assert keys == {
+        "constant_score": {
+            "_name": "awards.award_keys",
+            "filter": {"terms": {"awards.award_keys": ["nih:hl123456"]}},
+            "boost": 10,
+        }
+    }
+    assert variants["constant_score"]["_name"] == "awards.award_id"
+    assert variants["constant_score"]["boost"] == 10
+    assert sorted(variants["constant_score"]["filter"]["terms"]["awards.award_id"]) == sorted(nih.all_variants)
+    assert "HL123456" in variants["constant_score"]["filter"]["terms"]["awards.award_id"]
+    assert queries[1] == [
+        {
+            "constant_score": {
+                "_name": "awards.award_keys",
+                "filter": {"terms": {"awards.award_keys": ["nsf:1234567"]}},
+                "boost": 10,
+            }
+        },
+        {
+            "constant_score": {
+                "_name": "awards.award_id",
+                "filter": {"terms": {"awards.award_id": ["1234567"]}},
+                "boost": 10,
+            }
+        },
+    ]
+
+
+def test_build_awards_query_variants():
+    nih = parse_nih_award_id("5R01HL123456-02")
+    query = build_awards_query("awards", [make_award(nih)], award_keys=False)
+
+    (queries,) = award_queries(query)
+    assert sorted(q["constant_score"]["filter"]["term"]["awards.award_id"] for q in queries) == sorted(nih.all_variants)
+
+
+def test_build_awards_query_no_awards():
+    assert build_awards_query("awards", []) is None
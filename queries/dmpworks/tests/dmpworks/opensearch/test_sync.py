@@ -0,0 +1,85 @@
+import multiprocessing as mp
+
+import pytest
+
+from dmpworks.opensearch import sync
+from dmpworks.opensearch.sync import index_actions, info_to_error_map, is_missing_delete
+
+NOT_FOUND = {"delete": {"_index": "works", "_id": "10.1/a", "status": 404, "result": "not_found"}}
+CONFLICT = {
+    "update": {
+        "_index": "works",
+        "_id": "10.1/b",
+        "status": 409,
+        "error": {"type": "version_conflict_engine_exception", "reason": "version conflict"},
+    }
+}
+DELETE_ERROR = {
+    "delete": {
+        "_index": "works",
+        "_id": "10.1/c",
+        "status": 500,
+        "error": {"type": "illegal_state_exception", "reason": "shard failure"},
+    }
+}
+
+
+@pytest.fixture
+def counters(mocker) -> tuple:
+    """Set the per-process counters that index_actions updates."""
+
+    success, failure = mp.Value("i", 0), mp.Value("i", 0)
+    mocker.patch.object(sync, "success_counter", success)
+    mocker.patch.object(sync, "failure_counter", failure)
+    mocker.patch.object(sync, "counter_lock", mp.Lock())
+    mocker.patch.object(sync, "open_search", None)
+    return success, failure
+
+
+def test_is_missing_delete():
+    assert is_missing_delete(NOT_FOUND)
+    assert not is_missing_delete(DELETE_ERROR)
+    # A 404 on an update is an error, as the update upserts the document
+    assert not is_missing_delete({"update": {**NOT_FOUND["delete"]}})
+
+
+def test_info_to_error_map():
+    assert info_to_error_map(CONFLICT) == {
+        409: {
+            "count": 1,
+            "samples": [
+                {
+                    "doc_id": "10.1/b",
+                    "error": {"type": "version_conflict_engine_exception", "reason": "version conflict"},
+                }
+            ],
+        }
+    }
+    assert info_to_error_map(DELETE_ERROR) == {
+        500: {
+            "count": 1,
+            "samples": [{"doc_id": "10.1/c", "error": {"type": "illegal_state_exception", "reason": "shard failure"}}],
+        }
+    }
+
+
+def test_index_actions_counts_missing_deletes_as_success(counters, mocker):
+    ok = {"delete": {"_index": "works", "_id": "10.1/d", "status": 200, "result": "deleted"}}
+    mocker.patch.object(
+        sync,
+        "streaming_bulk",
+        return_value=iter([(True, ok), (False, NOT_FOUND), (False, CONFLICT), (False, DELETE_ERROR)]),
+    )
+
+    errors = index_actions(
+        iter([]), chunk_size=10, max_chunk_bytes=1000, max_retries=0, initial_backoff=0, max_backoff=0
+    )
+
+    # The 404 on delete is a success, the other errors are counted and returned
+    success, failure = counters
+    assert success.value == 2
+    assert failure.value == 2
+    assert sorted(errors) == [409, 500]
+    assert errors[500]["count"] == 1
+    assert errors[500]["samples"][0]["doc_id"] == "10.1/c"
+    assert 404 not in errors
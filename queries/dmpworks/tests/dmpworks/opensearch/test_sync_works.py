@@ -0,0 +1,55 @@
+import logging
+import pathlib
+
+import pyarrow as pa
+
+from dmpworks.opensearch.sync_works import (
+    batch_to_delete_actions,
+    batch_to_work_actions,
+    COLUMNS,
+    sync_work_changes,
+)
+from dmpworks.opensearch.utils import OpenSearchClientConfig, OpenSearchSyncConfig
+
+
+def test_batch_to_delete_actions():
+    batch = pa.RecordBatch.from_pydict({"doi": ["10.1/a", "10.1/b"]})
+    assert list(batch_to_delete_actions("works", batch)) == [
+        {"_op_type": "delete", "_index": "works", "_id": "10.1/a"},
+        {"_op_type": "delete", "_index": "works", "_id": "10.1/b"},
+    ]
+
+
+def test_batch_to_delete_actions_empty():
+    batch = pa.RecordBatch.from_pydict({"doi": pa.array([], type=pa.string())})
+    assert list(batch_to_delete_actions("works", batch)) == []
+
+
+def test_sync_work_changes(mocker, tmp_path: pathlib.Path):
+    sync_docs = mocker.patch("dmpworks.opensearch.sync_works.sync_docs")
+    client_config = OpenSearchClientConfig()
+    sync_config = OpenSearchSyncConfig()
+
+    sync_work_changes("works", tmp_path, client_config, sync_config)
+
+    # Upserts are synced with the full documents, then deletes with only the DOIs
+    assert [call.kwargs for call in sync_docs.call_args_list] == [
+        {
+            "index_name": "works",
+            "in_dir": tmp_path / "upserts",
+            "batch_to_actions_func": batch_to_work_actions,
+            "include_columns": COLUMNS,
+            "client_config": client_config,
+            "sync_config": sync_config,
+            "log_level": logging.INFO,
+        },
+        {
+            "index_name": "works",
+            "in_dir": tmp_path / "deletes",
+            "batch_to_actions_func": batch_to_delete_actions,
+            "include_columns": ["doi"],
+            "client_config": client_config,
+            "sync_config": sync_config,
+            "log_level": logging.INFO,
+        },
+    ]
@@ -0,0 +1,88 @@
+import json
+import pathlib
+import shutil
+
+import polars as pl
+import pytest
+from sqlmesh.core.context import Context
+
+import dmpworks.sql.macros.source_path
+from dmpworks.sql.commands import critical_path, refresh_source_views, run_plan
+from dmpworks.sql.macros.source_path import SOURCE_PATHS_ENV
+
+GRAPH = {
+    "openalex.works": set(),
+    "datacite.works": set(),
+    "openalex_index.works_metadata": {"openalex.works", "datacite.works"},
+    "openalex_index.titles": {"openalex_index.works_metadata"},
+    "openalex_index.abstracts": {"openalex_index.works_metadata"},
+    "datacite_index.works": {"datacite.works"},
+    "works_index.exports": {"openalex_index.titles", "openalex_index.abstracts", "datacite_index.works"},
+}
+
+
+def test_critical_path():
+    seconds = {
+        "openalex.works": 1,
+        "datacite.works": 5,
+        "openalex_index.works_metadata": 10,
+        "openalex_index.titles": 20,
+        "openalex_index.abstracts": 30,
+        "datacite_index.works": 40,
+        "works_index.exports": 2,
+    }
+    assert critical_path(GRAPH, seconds) == (
+        47,
+        ["datacite.works", "openalex_index.works_metadata", "openalex_index.abstracts", "works_index.exports"],
+    )
+
+    # A long independent branch becomes the critical path
+    seconds["datacite_index.works"] = 50
+    assert critical_path(GRAPH, seconds) == (57, ["datacite.works", "datacite_index.works", "works_index.exports"])
+
+
+def test_critical_path_models_not_evaluated():
+    seconds, path = critical_path(GRAPH, {"openalex_index.titles": 3})
+    assert seconds == 3
+    assert "openalex_index.titles" in path
+    assert critical_path({}, {}) == (0, [])
+
+
+def test_run_plan_concurrent_tasks_autotune():
+    with pytest.raises(ValueError):
+        run_plan(autotune=True, concurrent_tasks=4)
+
+
+def test_refresh_source_views(tmp_path: pathlib.Path, monkeypatch):
+    project_dir = tmp_path / "project"
+    (project_dir / "models").mkdir(parents=True)
+    (project_dir / "macros").mkdir()
+    shutil.copy(dmpworks.sql.macros.source_path.__file__, project_dir / "macros")
+    (project_dir / "config.yaml").write_text(
+        json.dumps(
+            {
+                "gateways": {"duckdb": {"connection": {"type": "duckdb", "database": str(tmp_path / "db.db")}}},
+                "default_gateway": "duckdb",
+                "model_defaults": {"dialect": "duckdb", "start": "2025-06-02"},
+                "variables": {"ror_path": str(tmp_path / "ror")},
+            }
+        )
+    )
+    (project_dir / "models" / "index.sql").write_text(
+        "MODEL (name ror.index, kind VIEW);\n"
+        "SELECT id FROM read_parquet(@source_path('ror', @VAR('ror_path'), 'ror.parquet'))"
+    )
+    for release, ids in [("2025-06-01", [1]), ("2025-07-01", [1, 2, 3])]:
+        (tmp_path / release).mkdir()
+        pl.DataFrame({"id": ids}).write_parquet(tmp_path / release / "ror.parquet")
+
+    def run(release: str) -> int:
+        # The database is reused, as with previous_task_id, and the source location changes with the release
+        monkeypatch.setenv(SOURCE_PATHS_ENV, json.dumps({"ror": str(tmp_path / release)}))
+        ctx = Context(paths=[project_dir], load=True)
+        ctx.plan(environment="prod", no_prompts=True, auto_apply=True)
+        assert refresh_source_views(ctx) == ['"db"."ror"."index"']
+        return ctx.engine_adapter.fetchone("SELECT COUNT(*) FROM ror.index")[0]
+
+    assert run("2025-06-01") == 1
+    assert run("2025-07-01") == 3
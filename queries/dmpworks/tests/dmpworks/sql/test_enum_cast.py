@@ -0,0 +1,23 @@
+import duckdb
+from sqlglot import exp
+
+from dmpworks.sql.macros.enum_cast import enum_cast
+
+
+def cast_values(values: list, enum: str) -> list:
+    # The macro decorator returns the function unchanged, the evaluator isn't used
+    sql = enum_cast(None, exp.column("value"), exp.column(enum)).sql(dialect="duckdb")
+    return [row[0] for row in duckdb.sql(f"SELECT {sql} FROM unnest(?) AS t(value)", params=[values]).fetchall()]
+
+
+def test_enum_cast_work_type():
+    assert cast_values(["ARTICLE", "PEER_REVIEW", "NEW_TYPE", None], "work_type") == [
+        "ARTICLE",
+        "PEER_REVIEW",
+        "OTHER",
+        "OTHER",
+    ]
+
+
+def test_enum_cast_source_name():
+    assert cast_values(["DataCite", "OpenAlex", "Crossref"], "source_name") == ["DataCite", "OpenAlex", None]
@@ -0,0 +1,88 @@
+import hashlib
+import json
+import pathlib
+from types import SimpleNamespace
+
+import duckdb
+import polars as pl
+from sqlglot import exp
+
+from dmpworks.sql.macros.export_partitions import export_partitions, MANIFEST_FILE
+
+PARTITIONS = 3
+
+
+def render(export_dir: pathlib.Path, runtime_stage: str = "evaluating") -> list[str]:
+    # The macro decorator returns the function unchanged, only the evaluator's runtime stage is used
+    return export_partitions(
+        SimpleNamespace(runtime_stage=runtime_stage),
+        exp.to_table("export_works"),
+        exp.Literal.string(str(export_dir)),
+        exp.Literal.number(PARTITIONS),
+    )
+
+
+def test_export_partitions_only_runs_when_evaluating(tmp_path: pathlib.Path):
+    assert render(tmp_path, runtime_stage="loading") == []
+
+
+def test_export_partitions(tmp_path: pathlib.Path):
+    # Files from an earlier export with more partitions are deleted, files that are rewritten are overwritten
+    (tmp_path / "export_0001.parquet").write_bytes(b"old")
+    (tmp_path / "export_0005.parquet").write_bytes(b"stale")
+
+    works = [
+        # doi, export_partition, row_hash
+        ("10.0000/c", 0, "hash_c"),
+        ("10.0000/a", 0, "hash_a"),
+        ("10.0000/b", 1, "hash_b"),
+    ]
+    con = duckdb.connect()
+    con.execute("CREATE TEMP TABLE export_works (doi VARCHAR, title VARCHAR, export_partition INT64, row_hash VARCHAR)")
+    con.executemany(
+        "INSERT INTO export_works VALUES (?, ?, ?, ?)", [(doi, f"Title {doi}", p, h) for doi, p, h in works]
+    )
+    for statement in render(tmp_path):
+        con.execute(statement)
+
+    assert sorted(file_path.name for file_path in tmp_path.iterdir()) == [
+        MANIFEST_FILE,
+        "export_0000.parquet",
+        "export_0001.parquet",
+        "export_0002.parquet",
+    ]
+
+    # Each partition is sorted by DOI, without the export_partition and row_hash columns
+    df = pl.read_parquet(tmp_path / "export_0000.parquet")
+    assert df.columns == ["doi", "title"]
+    assert df["doi"].to_list() == ["10.0000/a", "10.0000/c"]
+    assert pl.read_parquet(tmp_path / "export_0002.parquet").height == 0
+
+    manifest = [json.loads(line) for line in (tmp_path / MANIFEST_FILE).read_text().splitlines()]
+    md5 = lambda text: hashlib.md5(text.encode()).hexdigest()
+    assert manifest == [
+        {
+            "file_name": "export_0000.parquet",
+            "export_partition": 0,
+            "row_count": 2,
+            "min_doi": "10.0000/a",
+            "max_doi": "10.0000/c",
+            "checksum": md5("hash_ahash_c"),
+        },
+        {
+            "file_name": "export_0001.parquet",
+            "export_partition": 1,
+            "row_count": 1,
+            "min_doi": "10.0000/b",
+            "max_doi": "10.0000/b",
+            "checksum": md5("hash_b"),
+        },
+        {
+            "file_name": "export_0002.parquet",
+            "export_partition": 2,
+            "row_count": 0,
+            "min_doi": None,
+            "max_doi": None,
+            "checksum": md5(""),
+        },
+    ]
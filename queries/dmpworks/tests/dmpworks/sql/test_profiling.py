@@ -0,0 +1,77 @@
+from sqlglot import parse_one
+
+from dmpworks.sql.profiling import ModelProfile, parse_profile, profile_summary, sample_tables
+
+PROFILE = {
+    "latency": 2.0,
+    "cpu_time": 6.0,
+    "system_peak_buffer_memory": 1024**2,
+    "system_peak_temp_dir_size": 0,
+    "children": [
+        {
+            "operator_type": "EXPLAIN_ANALYZE",
+            "operator_name": "EXPLAIN_ANALYZE",
+            "operator_timing": 0,
+            "operator_cardinality": 0,
+            "children": [
+                {
+                    "operator_type": "HASH_GROUP_BY",
+                    "operator_name": "HASH_GROUP_BY",
+                    "operator_timing": 0.5,
+                    "operator_cardinality": 10,
+                    "children": [
+                        {
+                            "operator_type": "TABLE_SCAN",
+                            "operator_name": "SEQ_SCAN",
+                            "operator_timing": 1.5,
+                            "operator_cardinality": 100,
+                            "operator_rows_scanned": 1000,
+                            "extra_info": {"Table": "works"},
+                            "children": [],
+                        }
+                    ],
+                }
+            ],
+        }
+    ],
+}
+
+
+def test_parse_profile():
+    profile = parse_profile("openalex_index.titles", PROFILE)
+
+    assert profile.seconds == 2.0
+    assert profile.cpu_seconds == 6.0
+    assert profile.rows == 10
+    assert profile.peak_buffer_memory_bytes == 1024**2
+    assert [(operator.depth, operator.operator_name) for operator in profile.operators] == [
+        (0, "HASH_GROUP_BY"),
+        (1, "SEQ_SCAN"),
+    ]
+    assert profile.operators[1].rows_scanned == 1000
+    assert profile.operators[1].extra_info == {"Table": "works"}
+
+
+def test_sample_tables():
+    query = parse_one(
+        "WITH recent AS (SELECT * FROM db.openalex.works) SELECT * FROM recent JOIN db.openalex.funders USING (id)",
+        dialect="duckdb",
+    )
+    sql = sample_tables(query, 10).sql(dialect="duckdb")
+
+    assert "db.openalex.works TABLESAMPLE (10 PERCENT)" in sql
+    assert "db.openalex.funders TABLESAMPLE (10 PERCENT)" in sql
+    assert "recent TABLESAMPLE" not in sql
+
+
+def test_profile_summary():
+    profile = parse_profile("openalex_index.titles", PROFILE)
+    baseline = {"openalex_index.titles": ModelProfile(name="openalex_index.titles", seconds=1.0)}
+    failed = ModelProfile(name="openalex_index.abstracts", error="Binder Error")
+
+    summary = profile_summary([profile, failed], baseline).splitlines()
+
+    assert summary[1].startswith("openalex_index.titles")
+    assert "+100%" in summary[1]
+    assert "SEQ_SCAN (1.50s, 75%, 100 rows)" in summary[1]
+    assert "failed: Binder Error" in summary[2]
@@ -0,0 +1,127 @@
+from types import SimpleNamespace
+
+import duckdb
+import pytest
+from sqlglot import exp
+
+from dmpworks.sql.macros.resource_settings import resource_settings, SETTINGS_FILE_ENV
+from dmpworks.sql.resources import (
+    choose_model_settings,
+    choose_settings,
+    GB,
+    load_history,
+    ModelRun,
+    parse_size,
+    ResourceBudget,
+    save_history,
+    temp_directory_statements,
+    write_settings,
+)
+
+BUDGET = ResourceBudget(threads=32, memory_limit_gb=200)
+
+
+def model_run(seconds=600, threads=8, memory_limit_gb=200, peak_memory_gb=10, spill_gb=0) -> ModelRun:
+    return ModelRun(
+        seconds=seconds,
+        threads=threads,
+        memory_limit_bytes=int(memory_limit_gb * GB),
+        peak_memory_bytes=int(peak_memory_gb * GB),
+        spill_bytes=int(spill_gb * GB),
+    )
+
+
+@pytest.mark.parametrize(
+    "size,expected",
+    [("4.6 GiB", int(4.6 * 1024**3)), ("200GB", 200 * 1000**3), ("512.0 MiB", 512 * 1024**2), ("0 bytes", 0)],
+)
+def test_parse_size(size, expected):
+    assert parse_size(size) == expected
+
+
+def test_parse_size_invalid():
+    with pytest.raises(ValueError):
+        parse_size("lots")
+
+
+def test_no_spill_lowers_memory_limit_and_doubles_threads():
+    settings = choose_model_settings([model_run()], BUDGET)
+    assert settings.memory_limit_gb == 15
+    assert settings.threads == 16
+
+
+def test_fast_model_keeps_threads():
+    settings = choose_model_settings([model_run(seconds=5)], BUDGET)
+    assert settings.threads == 8
+
+
+def test_more_threads_not_faster_goes_back():
+    settings = choose_model_settings([model_run(seconds=600, threads=8), model_run(seconds=580, threads=16)], BUDGET)
+    assert settings.threads == 8
+    assert "not faster" in settings.reason
+
+    # And stays there
+    settings = choose_model_settings(
+        [model_run(seconds=600, threads=8), model_run(seconds=580, threads=16), model_run(seconds=600, threads=8)],
+        BUDGET,
+    )
+    assert settings.threads == 8
+
+
+def test_more_threads_faster_doubles_again():
+    settings = choose_model_settings([model_run(seconds=600, threads=8), model_run(seconds=320, threads=16)], BUDGET)
+    assert settings.threads == 32
+
+
+def test_spill_below_budget_raises_memory_limit():
+    settings = choose_model_settings([model_run(memory_limit_gb=15, peak_memory_gb=14, spill_gb=20)], BUDGET)
+    assert settings.memory_limit_gb == 51
+    assert settings.threads == 8
+
+
+def test_spill_at_budget_halves_threads():
+    settings = choose_model_settings([model_run(memory_limit_gb=200, peak_memory_gb=190, spill_gb=50)], BUDGET)
+    assert settings.memory_limit_gb == 200
+    assert settings.threads == 4
+
+
+def test_history_round_trip(tmp_path):
+    path = tmp_path / "resource_history.json"
+    assert load_history(path) == []
+
+    history = []
+    for i in range(12):
+        save_history(path, history, {"model": model_run(seconds=i)})
+        history = load_history(path)
+
+    assert len(history) == 10
+    assert history[-1]["model"].seconds == 11
+    assert choose_settings(history, BUDGET)["model"].threads == 8
+
+
+def test_resource_settings_after_spilling(tmp_path, monkeypatch):
+    budget = ResourceBudget(
+        threads=2, memory_limit_gb=1, temp_directory=str(tmp_path / "tmp"), max_temp_directory_size_gb=10
+    )
+    settings_file = tmp_path / "resource_settings.json"
+    write_settings(
+        settings_file, choose_settings([{"first": model_run(threads=1, memory_limit_gb=0.05)}], budget), budget
+    )
+    monkeypatch.setenv(SETTINGS_FILE_ENV, str(settings_file))
+
+    def render(name: str) -> list[str]:
+        # The macro decorator returns the function unchanged, only the evaluator's runtime stage and snapshot are used
+        evaluator = SimpleNamespace(runtime_stage="evaluating", locals={"snapshot": SimpleNamespace(name=name)})
+        return resource_settings(evaluator, exp.Literal.number(1))
+
+    # DuckDB can't switch the temp directory once a query has spilled to it, so it is only set once for the run
+    con = duckdb.connect(str(tmp_path / "db.duckdb"))
+    con.execute(";".join(temp_directory_statements(budget)))
+    con.execute(";".join(render("first")))
+    con.execute("SET memory_limit = '50MiB'")
+    con.execute("CREATE TABLE spilled AS SELECT range, md5(range::VARCHAR) AS hash FROM range(1000000) ORDER BY hash")
+    assert (tmp_path / "tmp").exists()
+
+    statements = render("second")
+    assert statements == ["SET threads = 1", "SET memory_limit = '1GiB'"]
+    con.execute(";".join(statements))
@@ -0,0 +1,63 @@
+import json
+
+from sqlglot import exp
+
+from dmpworks.sql.commands import duckdb_s3_secret
+from dmpworks.sql.macros.source_path import source_path, SOURCE_PATHS_ENV
+
+AWS_ENV = [
+    "AWS_ACCESS_KEY_ID",
+    "AWS_SECRET_ACCESS_KEY",
+    "AWS_SESSION_TOKEN",
+    "AWS_REGION",
+    "AWS_DEFAULT_REGION",
+    "AWS_ENDPOINT_URL",
+    "AWS_ENDPOINT_URL_S3",
+]
+
+
+def render_source_path(dataset: str, path: str, pattern: str) -> str:
+    # The macro decorator returns the function unchanged, the evaluator isn't used
+    return source_path(None, exp.Literal.string(dataset), exp.Literal.string(path), exp.Literal.string(pattern)).name
+
+
+def test_source_path_uses_path_variable(monkeypatch):
+    monkeypatch.delenv(SOURCE_PATHS_ENV, raising=False)
+    assert render_source_path("ror", "/data/ror", "ror.parquet") == "/data/ror/ror.parquet"
+
+
+def test_source_path_uses_source_paths(monkeypatch):
+    monkeypatch.setenv(SOURCE_PATHS_ENV, json.dumps({"ror": "s3://bucket/ror/2025-06-01/transform/parquets"}))
+    assert (
+        render_source_path("ror", "/data/ror", "ror.parquet")
+        == "s3://bucket/ror/2025-06-01/transform/parquets/ror.parquet"
+    )
+    assert render_source_path("datacite", "/data/datacite", "datacite_works_[0-9]*.parquet") == (
+        "/data/datacite/datacite_works_[0-9]*.parquet"
+    )
+
+
+def test_duckdb_s3_secret_credential_chain(monkeypatch):
+    for name in AWS_ENV:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("AWS_REGION", "us-west-2")
+
+    assert duckdb_s3_secret() == {"type": "s3", "provider": "credential_chain", "region": "us-west-2"}
+
+
+def test_duckdb_s3_secret_from_environment(monkeypatch):
+    for name in AWS_ENV:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "key")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "secret")
+    monkeypatch.setenv("AWS_ENDPOINT_URL", "http://127.0.0.1:9000")
+
+    assert duckdb_s3_secret() == {
+        "type": "s3",
+        "provider": "config",
+        "key_id": "key",
+        "secret": "secret",
+        "endpoint": "127.0.0.1:9000",
+        "url_style": "path",
+        "use_ssl": "false",
+    }
@@ -53,6 +53,26 @@ def test_opensearch_sync_works(mock_sync_works, tmp_path: pathlib.Path):
     )
 
 
+@pytest.fixture
+def mock_sync_work_changes(mocker):
+    return mocker.patch("dmpworks.opensearch.cli.sync_work_changes")
+
+
+def test_opensearch_sync_work_changes(mock_sync_work_changes, tmp_path: pathlib.Path):
+    in_dir = tmp_path / "changes"
+    in_dir.mkdir()
+
+    cli(["opensearch", "sync-works", "works-index", str(in_dir), "--changes"])
+
+    mock_sync_work_changes.assert_called_once_with(
+        "works-index",
+        in_dir,
+        OpenSearchClientConfig(),
+        OpenSearchSyncConfig(),
+        log_level=logging.INFO,
+    )
+
+
 ###########
 # SQLMesh
 ###########
@@ -113,6 +133,11 @@ def test_transform_crossref_metadata(mock_transform_crossref_metadata, tmp_path:
         max_file_processes=os.cpu_count(),
         n_batches=None,
         low_memory=False,
+        download_workers=2,
+        disk_budget_gb=50.0,
+        upload_workers=1,
+        shard_index=None,
+        shard_count=1,
     )
 
 
@@ -142,6 +167,11 @@ def test_transform_datacite(mock_transform_datacite, tmp_path: pathlib.Path):
         max_file_processes=os.cpu_count(),
         n_batches=None,
         low_memory=False,
+        download_workers=2,
+        disk_budget_gb=50.0,
+        upload_workers=1,
+        shard_index=None,
+        shard_count=1,
     )
 
 
@@ -171,6 +201,11 @@ def test_transform_openalex_funders(mock_transform_openalex_funders, tmp_path: p
         max_file_processes=os.cpu_count(),
         n_batches=None,
         low_memory=False,
+        download_workers=2,
+        disk_budget_gb=50.0,
+        upload_workers=1,
+        shard_index=None,
+        shard_count=1,
     )
 
 
@@ -200,6 +235,11 @@ def test_transform_openalex_works(mock_transform_openalex_works, tmp_path: pathl
         max_file_processes=os.cpu_count(),
         n_batches=None,
         low_memory=False,
+        download_workers=2,
+        disk_budget_gb=50.0,
+        upload_workers=1,
+        shard_index=None,
+        shard_count=1,
     )
 
 
@@ -253,3 +293,59 @@ def test_demo_dataset(mock_create_demo_dataset, tmp_path: pathlib.Path):
         out_dir,
         logging.INFO,
     )
+
+
+@pytest.fixture
+def mock_create_demo_subset(mocker):
+    return mocker.patch("dmpworks.transform.cli.create_demo_subset")
+
+
+def test_demo_subset(mock_create_demo_subset, tmp_path: pathlib.Path):
+    in_dir = tmp_path / "input"
+    out_dir = tmp_path / "output"
+    in_dir.mkdir()
+    out_dir.mkdir()
+
+    cli(
+        [
+            "transform",
+            "demo-subset",
+            str(in_dir),
+            str(out_dir),
+            "--ror-id",
+            "01an7q238",
+            "--sample-fraction",
+            "0.01",
+        ]
+    )
+    mock_create_demo_subset.assert_called_once_with(
+        in_dir,
+        out_dir,
+        ror_id="01an7q238",
+        funder_ror_id=None,
+        sample_fraction=0.01,
+        seed=42,
+    )
+
+
+@pytest.fixture
+def mock_generate_synthetic_dataset(mocker):
+    return mocker.patch("dmpworks.transform.cli.generate_synthetic_dataset")
+
+
+def test_synthetic(mock_generate_synthetic_dataset, tmp_path: pathlib.Path):
+    out_dir = tmp_path / "output"
+    out_dir.mkdir()
+
+    cli(["transform", "synthetic", "datacite", str(out_dir), "--n-records", "1000"])
+    mock_generate_synthetic_dataset.assert_called_once_with(
+        "datacite",
+        out_dir,
+        n_records=1000,
+        n_files=4,
+        skew=1.1,
+        polymorphic_rate=0.1,
+        duplicate_doi_rate=0.0,
+        null_doi_rate=0.0,
+        seed=42,
+    )
@@ -0,0 +1,129 @@
+import pathlib
+
+import polars as pl
+
+from dmpworks.transform.demo_subset import create_demo_subset, select_seed_dois
+
+
+def write_table(in_dir: pathlib.Path, dataset: str, file_name: str, df: pl.DataFrame):
+    parquets_dir = in_dir / dataset / "parquets"
+    parquets_dir.mkdir(parents=True, exist_ok=True)
+    df.write_parquet(parquets_dir / file_name)
+
+
+def make_transform_dir(in_dir: pathlib.Path):
+    write_table(
+        in_dir,
+        "ror",
+        "ror.parquet",
+        pl.DataFrame(
+            {
+                "ror_id": ["01an7q238", "01an7q238", "021nxhr62", "021nxhr62"],
+                "type": ["ror", "grid", "ror", "fundref"],
+                "identifier": ["01an7q238", "grid.47840.3f", "021nxhr62", "10.13039/100000001"],
+            }
+        ),
+    )
+    write_table(
+        in_dir,
+        "openalex_funders",
+        "openalex_funders_00001.parquet",
+        pl.DataFrame({"id": ["f4320306076"], "ids": [{"ror": "021nxhr62"}]}),
+    )
+    write_table(
+        in_dir,
+        "openalex_works",
+        "openalex_works_00001.parquet",
+        pl.DataFrame(
+            {
+                "doi": ["10.0000/a", "10.0000/b", "10.0000/c"],
+                "institutions": [[{"name": "UC Berkeley", "ror": "01an7q238"}], [], []],
+                "grants": [[], [{"funder_id": "f4320306076", "award_id": "1234567"}], []],
+            },
+        ),
+    )
+    write_table(
+        in_dir,
+        "datacite",
+        "datacite_works_00001.parquet",
+        pl.DataFrame(
+            {
+                "doi": ["10.0001/d", "10.0001/e"],
+                "institutions": [[{"affiliation_identifier": "grid.47840.3f"}], []],
+                "funders": [[], []],
+            },
+            schema_overrides={"funders": pl.List(pl.Struct({"funder_identifier": pl.String}))},
+        ),
+    )
+    write_table(
+        in_dir,
+        "datacite",
+        "datacite_works_relations_00001.parquet",
+        pl.DataFrame({"work_doi": ["10.0001/d", "10.0001/e"], "related_identifier": ["10.0000/b", "10.0000/c"]}),
+    )
+    write_table(
+        in_dir,
+        "crossref_metadata",
+        "crossref_works_00001.parquet",
+        pl.DataFrame({"doi": ["10.0000/a", "10.0000/b", "10.0002/f"], "title": ["A", "B", "F"]}),
+    )
+    write_table(
+        in_dir,
+        "crossref_metadata",
+        "crossref_works_affiliations_00001.parquet",
+        pl.DataFrame({"work_doi": ["10.0002/f"], "affiliation_id": ["01an7q238"]}),
+    )
+    write_table(
+        in_dir,
+        "crossref_metadata",
+        "crossref_works_funders_00001.parquet",
+        pl.DataFrame({"work_doi": ["10.0000/a"], "funder_doi": ["10.13039/100000001"]}),
+    )
+
+
+def test_select_seed_dois(tmp_path: pathlib.Path):
+    make_transform_dir(tmp_path)
+
+    # Institution: ROR ID in OpenAlex and Crossref Metadata, GRID ID in DataCite
+    dois = select_seed_dois(tmp_path, ror_id="01an7q238")
+    assert dois == ["10.0000/a", "10.0001/d", "10.0002/f"]
+
+    # Funder: OpenAlex funder ID in OpenAlex, Crossref Funder ID in Crossref Metadata
+    dois = select_seed_dois(tmp_path, funder_ror_id="021nxhr62")
+    assert dois == ["10.0000/a", "10.0000/b"]
+
+    # Sampling all works returns every DOI once
+    dois = select_seed_dois(tmp_path, sample_fraction=1.0)
+    assert dois == ["10.0000/a", "10.0000/b", "10.0000/c", "10.0001/d", "10.0001/e", "10.0002/f"]
+
+    # Sampling is deterministic
+    assert select_seed_dois(tmp_path, sample_fraction=0.5, seed=1) == select_seed_dois(
+        tmp_path, sample_fraction=0.5, seed=1
+    )
+
+
+def test_create_demo_subset(tmp_path: pathlib.Path):
+    in_dir = tmp_path / "transform"
+    out_dir = tmp_path / "demo"
+    out_dir.mkdir()
+    make_transform_dir(in_dir)
+
+    create_demo_subset(in_dir, out_dir, ror_id="01an7q238")
+
+    openalex_works = pl.read_parquet(out_dir / "openalex_works" / "parquets" / "openalex_works_00000.parquet")
+    assert openalex_works["doi"].to_list() == ["10.0000/a"]
+
+    crossref_works = pl.read_parquet(out_dir / "crossref_metadata" / "parquets" / "crossref_works_00000.parquet")
+    assert crossref_works["doi"].to_list() == ["10.0000/a", "10.0002/f"]
+
+    crossref_funders = pl.read_parquet(
+        out_dir / "crossref_metadata" / "parquets" / "crossref_works_funders_00000.parquet"
+    )
+    assert crossref_funders["work_doi"].to_list() == ["10.0000/a"]
+
+    datacite_relations = pl.read_parquet(out_dir / "datacite" / "parquets" / "datacite_works_relations_00000.parquet")
+    assert datacite_relations["work_doi"].to_list() == ["10.0001/d"]
+
+    # Lookup datasets are copied in full
+    assert (out_dir / "ror" / "parquets" / "ror.parquet").exists()
+    assert (out_dir / "openalex_funders" / "parquets" / "openalex_funders_00001.parquet").exists()
@@ -0,0 +1,25 @@
+import polars as pl
+
+from dmpworks.transform.openalex_works import explode_with_pos
+
+
+def test_explode_with_pos():
+    works = pl.LazyFrame(
+        {
+            "id": ["w1", "w2", "w3"],
+            "doi": ["10.0000/a", "10.0000/b", None],
+            "grants": [
+                [{"funder_id": "f1", "award_id": "A"}, {"funder_id": "f2", "award_id": None}],
+                [],
+                [{"funder_id": "f1", "award_id": "C"}],
+            ],
+        }
+    )
+
+    df = explode_with_pos(works, "grants").collect()
+
+    assert df.to_dicts() == [
+        {"work_id": "w1", "work_doi": "10.0000/a", "pos": 0, "funder_id": "f1", "award_id": "A"},
+        {"work_id": "w1", "work_doi": "10.0000/a", "pos": 1, "funder_id": "f2", "award_id": None},
+        {"work_id": "w3", "work_doi": None, "pos": 0, "funder_id": "f1", "award_id": "C"},
+    ]
@@ -0,0 +1,345 @@
+import gzip
+import pathlib
+import threading
+
+import boto3
+from boto3.exceptions import S3UploadFailedError
+import orjson
+import polars as pl
+import pytest
+
+from dmpworks.transform.pipeline import (
+    DiskBudget,
+    FileDownloader,
+    FileUploader,
+    GB,
+    check_shard_infos,
+    match_glob,
+    merge_shard_manifests,
+    process_files_parallel,
+)
+
+moto = pytest.importorskip("moto", reason="moto is required for the S3 pipeline tests")
+
+BUCKET = "dmpworks-test"
+SCHEMA = {"id": pl.Int64}
+
+
+def transform_items(lz: pl.LazyFrame) -> list[tuple[str, pl.LazyFrame]]:
+    return [("items", lz)]
+
+
+def test_match_glob():
+    assert match_glob("part_00001.jsonl.gz", "*.jsonl.gz")
+    assert not match_glob("updated_2025-01/part_00001.jsonl.gz", "*.jsonl.gz")
+    assert match_glob("part_000.gz", "**/*.gz")
+    assert match_glob("updated_date=2025-01-01/part_000.gz", "**/*.gz")
+    assert not match_glob("updated_date=2025-01-01/manifest", "**/*.gz")
+
+
+def test_disk_budget_blocks_until_released():
+    budget = DiskBudget(max_bytes=100)
+    budget.acquire(60)
+    acquired = threading.Event()
+
+    def acquire():
+        budget.acquire(60)
+        acquired.set()
+
+    thread = threading.Thread(target=acquire)
+    thread.start()
+    assert not acquired.wait(0.2)
+
+    budget.release(60)
+    assert acquired.wait(5)
+    thread.join()
+
+    # A request larger than the budget is granted once nothing else is on disk
+    budget.release(60)
+    budget.acquire(1_000)
+    assert budget.used_bytes == 1_000
+
+
+def test_disk_budget_cancel_fails_waiting_acquires():
+    budget = DiskBudget(max_bytes=100)
+    budget.acquire(100)
+    errors = []
+
+    def acquire():
+        try:
+            budget.acquire(1)
+        except RuntimeError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=acquire)
+    thread.start()
+    budget.cancel()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert len(errors) == 1
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    for name in ["AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"]:
+        monkeypatch.setenv(name, "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with moto.mock_aws():
+        s3_client = boto3.client("s3")
+        s3_client.create_bucket(Bucket=BUCKET)
+        yield s3_client
+
+
+def test_process_files_parallel_downloads_from_s3(s3, tmp_path: pathlib.Path):
+    prefix = "openalex_works/2025-01-01/download/"
+    for i in range(5):
+        lines = b"".join(orjson.dumps({"id": i * 10 + j}, option=orjson.OPT_APPEND_NEWLINE) for j in range(10))
+        s3.put_object(
+            Bucket=BUCKET, Key=f"{prefix}updated_date=2025-01-0{i + 1}/part_000.gz", Body=gzip.compress(lines)
+        )
+    s3.put_object(Bucket=BUCKET, Key=f"{prefix}manifest", Body=b"{}")
+
+    in_dir = tmp_path / "download"
+    out_dir = tmp_path / "transform"
+    process_files_parallel(
+        in_dir=in_dir,
+        out_dir=out_dir,
+        schema=SCHEMA,
+        transform_func=transform_items,
+        file_glob="**/*.gz",
+        batch_size=2,
+        max_file_processes=1,
+        source_uri=f"s3://{BUCKET}/{prefix}",
+        # Smaller than one batch, so each batch is downloaded once the previous one has been extracted
+        disk_budget_gb=1e-9,
+    )
+
+    df = pl.read_parquet(out_dir / "parquets" / "items_*.parquet")
+    assert sorted(df["id"].to_list()) == list(range(50))
+    assert len(list((out_dir / "parquets").glob("*.parquet"))) == 3
+    # The downloaded files are deleted once they have been extracted, and the manifest isn't downloaded
+    assert not [file for file in in_dir.rglob("*") if file.is_file()]
+
+
+def test_process_files_parallel_fails_when_a_download_fails(s3, mocker, tmp_path: pathlib.Path):
+    prefix = "openalex_works/2025-01-01/download/"
+    for i in range(6):
+        lines = b"".join(orjson.dumps({"id": i * 10 + j}, option=orjson.OPT_APPEND_NEWLINE) for j in range(10))
+        s3.put_object(Bucket=BUCKET, Key=f"{prefix}part_{i:03d}.gz", Body=gzip.compress(lines))
+
+    download = FileDownloader.__call__
+
+    def failing_download(self, obj):
+        if obj.key.endswith("part_002.gz"):
+            raise OSError("Connection reset")
+        return download(self, obj)
+
+    mocker.patch.object(FileDownloader, "__call__", failing_download)
+    with pytest.raises(RuntimeError, match="Batch 1 failed in Download-Thread") as exc_info:
+        process_files_parallel(
+            in_dir=tmp_path / "download",
+            out_dir=tmp_path / "transform",
+            schema=SCHEMA,
+            transform_func=transform_items,
+            file_glob="*.gz",
+            batch_size=2,
+            max_file_processes=1,
+            source_uri=f"s3://{BUCKET}/{prefix}",
+            # Only one batch fits on disk, so the other download worker waits for the failed batch's bytes
+            disk_budget_gb=50 / GB,
+        )
+    assert isinstance(exc_info.value.__cause__, OSError)
+
+
+def test_process_files_parallel_uploads_to_s3(s3, tmp_path: pathlib.Path):
+    in_dir = tmp_path / "download"
+    in_dir.mkdir()
+    for i in range(5):
+        lines = b"".join(orjson.dumps({"id": i * 10 + j}, option=orjson.OPT_APPEND_NEWLINE) for j in range(10))
+        (in_dir / f"part_{i:03d}.gz").write_bytes(gzip.compress(lines))
+
+    out_dir = tmp_path / "transform"
+    target_prefix = "openalex_works/2025-01-01/transform/"
+    process_files_parallel(
+        in_dir=in_dir,
+        out_dir=out_dir,
+        schema=SCHEMA,
+        transform_func=transform_items,
+        file_glob="*.gz",
+        batch_size=2,
+        max_file_processes=1,
+        target_uri=f"s3://{BUCKET}/{target_prefix}",
+    )
+
+    keys = sorted(obj["Key"] for obj in s3.list_objects_v2(Bucket=BUCKET, Prefix=target_prefix)["Contents"])
+    assert keys == [
+        f"{target_prefix}manifest.jsonl",
+        f"{target_prefix}parquets/items_00000.parquet",
+        f"{target_prefix}parquets/items_00001.parquet",
+        f"{target_prefix}parquets/items_00002.parquet",
+    ]
+    manifest = s3.get_object(Bucket=BUCKET, Key=f"{target_prefix}manifest.jsonl")["Body"].read()
+    entries = sorted((orjson.loads(line) for line in manifest.splitlines()), key=lambda entry: entry["batch"])
+    assert [(entry["file"], entry["batch"]) for entry in entries] == [
+        ("parquets/items_00000.parquet", 0),
+        ("parquets/items_00001.parquet", 1),
+        ("parquets/items_00002.parquet", 2),
+    ]
+    # The local copies are deleted once uploaded
+    assert not list((out_dir / "parquets").glob("*.parquet"))
+
+
+def test_process_files_parallel_fails_when_an_upload_fails(s3, mocker, tmp_path: pathlib.Path):
+    in_dir = tmp_path / "download"
+    in_dir.mkdir()
+    for i in range(5):
+        lines = b"".join(orjson.dumps({"id": i * 10 + j}, option=orjson.OPT_APPEND_NEWLINE) for j in range(10))
+        (in_dir / f"part_{i:03d}.gz").write_bytes(gzip.compress(lines))
+
+    init = FileUploader.__init__
+
+    def init_with_failing_upload(self, *args, **kwargs):
+        init(self, *args, **kwargs)
+        upload_file = self.s3_client.upload_file
+
+        def failing_upload_file(file_name, bucket, key):
+            if key.endswith("items_00001.parquet"):
+                raise S3UploadFailedError("Failed to upload: Connection reset")
+            return upload_file(file_name, bucket, key)
+
+        self.s3_client.upload_file = failing_upload_file
+
+    mocker.patch.object(FileUploader, "__init__", init_with_failing_upload)
+    target_prefix = "openalex_works/2025-01-01/transform/"
+    with pytest.raises(RuntimeError, match="Batch 1 failed in Upload-Thread") as exc_info:
+        process_files_parallel(
+            in_dir=in_dir,
+            out_dir=tmp_path / "transform",
+            schema=SCHEMA,
+            transform_func=transform_items,
+            file_glob="*.gz",
+            batch_size=2,
+            max_file_processes=1,
+            target_uri=f"s3://{BUCKET}/{target_prefix}",
+        )
+    assert isinstance(exc_info.value.__cause__, S3UploadFailedError)
+
+    # The manifest isn't uploaded, so the partial output isn't mistaken for a finished transform
+    keys = [obj["Key"] for obj in s3.list_objects_v2(Bucket=BUCKET, Prefix=target_prefix).get("Contents", [])]
+    assert f"{target_prefix}manifest.jsonl" not in keys
+
+
+def test_sharded_transform_matches_single_run(s3, tmp_path: pathlib.Path):
+    source_prefix = "openalex_works/2025-01-01/download/"
+    for i in range(7):
+        lines = b"".join(orjson.dumps({"id": i * 10 + j}, option=orjson.OPT_APPEND_NEWLINE) for j in range(10))
+        s3.put_object(Bucket=BUCKET, Key=f"{source_prefix}part_{i:03d}.gz", Body=gzip.compress(lines))
+
+    def transform(target_prefix: str, shard_index: int = None, shard_count: int = 1):
+        process_files_parallel(
+            in_dir=tmp_path / target_prefix / str(shard_index) / "download",
+            out_dir=tmp_path / target_prefix / str(shard_index) / "transform",
+            schema=SCHEMA,
+            transform_func=transform_items,
+            file_glob="*.gz",
+            batch_size=2,
+            max_file_processes=1,
+            source_uri=f"s3://{BUCKET}/{source_prefix}",
+            target_uri=f"s3://{BUCKET}/{target_prefix}",
+            shard_index=shard_index,
+            shard_count=shard_count,
+        )
+
+    def read_output(target_prefix: str) -> dict[str, bytes]:
+        objects = s3.list_objects_v2(Bucket=BUCKET, Prefix=target_prefix)["Contents"]
+        return {
+            obj["Key"].removeprefix(target_prefix): s3.get_object(Bucket=BUCKET, Key=obj["Key"])["Body"].read()
+            for obj in objects
+        }
+
+    transform("single/")
+
+    # A Parquet file left by an earlier run is deleted by the merge
+    s3.put_object(Bucket=BUCKET, Key="sharded/parquets/items_00009.parquet", Body=b"stale")
+    transform("sharded/", shard_index=0, shard_count=3)
+    with pytest.raises(RuntimeError, match="manifest_shard_00001.jsonl"):
+        merge_shard_manifests(f"s3://{BUCKET}/sharded/", 3, s3_client=s3)
+
+    transform("sharded/", shard_index=2, shard_count=3)
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        # The shard index defaults to the AWS Batch array index
+        monkeypatch.setenv("AWS_BATCH_JOB_ARRAY_INDEX", "1")
+        transform("sharded/", shard_count=3)
+    entries = merge_shard_manifests(f"s3://{BUCKET}/sharded/", 3, s3_client=s3)
+    assert [entry["batch"] for entry in entries] == [0, 1, 2, 3]
+
+    single = read_output("single/")
+    sharded = read_output("sharded/")
+    assert sorted(sharded) == sorted(single)
+    for name in single:
+        if name.endswith(".parquet"):
+            assert pl.read_parquet(sharded[name]).equals(pl.read_parquet(single[name]))
+    single_manifest = [orjson.loads(line) for line in single["manifest.jsonl"].splitlines()]
+    assert [(entry["file"], entry["batch"]) for entry in entries] == sorted(
+        (entry["file"], entry["batch"]) for entry in single_manifest
+    )
+
+
+def test_merge_shard_manifests_fails_when_shards_batch_differently(s3, tmp_path: pathlib.Path):
+    source_prefix = "openalex_works/2025-01-01/download/"
+    for i in range(6):
+        lines = b"".join(orjson.dumps({"id": i * 10 + j}, option=orjson.OPT_APPEND_NEWLINE) for j in range(10))
+        s3.put_object(Bucket=BUCKET, Key=f"{source_prefix}part_{i:03d}.gz", Body=gzip.compress(lines))
+
+    # The shards ran on instance types with different CPU counts, and so different default batch sizes
+    for shard_index, batch_size in [(0, 2), (1, 3)]:
+        process_files_parallel(
+            in_dir=tmp_path / str(shard_index) / "download",
+            out_dir=tmp_path / str(shard_index) / "transform",
+            schema=SCHEMA,
+            transform_func=transform_items,
+            file_glob="*.gz",
+            batch_size=batch_size,
+            max_file_processes=1,
+            source_uri=f"s3://{BUCKET}/{source_prefix}",
+            target_uri=f"s3://{BUCKET}/sharded/",
+            shard_index=shard_index,
+            shard_count=2,
+        )
+    with pytest.raises(RuntimeError, match=r"disagree on batch_size.*\[2, 3\]"):
+        merge_shard_manifests(f"s3://{BUCKET}/sharded/", 2, s3_client=s3)
+
+    # Nothing is merged or deleted
+    keys = {obj["Key"] for obj in s3.list_objects_v2(Bucket=BUCKET, Prefix="sharded/")["Contents"]}
+    assert "sharded/manifest.jsonl" not in keys
+    assert "sharded/manifest_shard_00000.json" in keys
+
+
+def test_check_shard_infos():
+    files = ["part_000.gz", "part_001.gz", "part_002.gz"]
+    infos = [
+        {"shard_index": 0, "shard_count": 2, "batch_size": 1, "n_batches": 3, "batches": [0, 2], "files": files},
+        {"shard_index": 1, "shard_count": 2, "batch_size": 1, "n_batches": 3, "batches": [1], "files": files},
+    ]
+    check_shard_infos(infos, 2)
+
+    with pytest.raises(RuntimeError, match=r"Batches weren't processed by any shard: \[1\]"):
+        check_shard_infos([infos[0], {**infos[1], "batches": []}], 2)
+    with pytest.raises(RuntimeError, match="disagree on files"):
+        check_shard_infos([infos[0], {**infos[1], "files": files[:2]}], 2)
+    with pytest.raises(RuntimeError, match="disagree on n_batches"):
+        check_shard_infos([infos[0], {**infos[1], "n_batches": 2}], 2)
+    with pytest.raises(RuntimeError, match="disagree on shard_count"):
+        check_shard_infos(infos, 3)
+
+
+def test_process_files_parallel_invalid_shard(tmp_path: pathlib.Path):
+    with pytest.raises(ValueError, match="shard_index"):
+        process_files_parallel(
+            in_dir=tmp_path,
+            out_dir=tmp_path / "transform",
+            schema=SCHEMA,
+            transform_func=transform_items,
+            shard_index=2,
+            shard_count=2,
+        )
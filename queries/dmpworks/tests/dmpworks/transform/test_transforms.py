@@ -0,0 +1,79 @@
+import polars as pl
+import pytest
+
+pytest.importorskip("dmpworks.polars_expr_plugin._internal", reason="the Rust Polars plugin hasn't been built")
+
+from dmpworks.transform.transforms import (
+    normalise_doi,
+    normalise_fundref,
+    normalise_isni,
+    normalise_orcid,
+    normalise_ror,
+)
+
+
+def normalise(func, values: list) -> list:
+    return pl.DataFrame({"value": values}, schema={"value": pl.String}).select(func(pl.col("value")))["value"].to_list()
+
+
+def test_normalise_doi():
+    assert normalise(
+        normalise_doi,
+        [
+            "https://doi.org/10.1234/ABC",
+            "doi:10.1234/abc",
+            # DOIs that can't be canonicalised keep the cleaning used before the plugin, rather than becoming null
+            " https://doi.org/10.1234/A B ",
+            "HTTPS://example.org/XYZ",
+            None,
+        ],
+    ) == ["10.1234/abc", "10.1234/abc", "10.1234/a b", "xyz", None]
+
+
+def test_normalise_orcid():
+    assert normalise(
+        normalise_orcid,
+        [
+            "https://orcid.org/0000-0002-1825-0097",
+            "0000-0002-9079-593X",
+            # Accepted by the plugin but not by the regex it replaced
+            "0000000218250097",
+            # Accepted by the regex the plugin replaced, but not by the plugin: a bad check digit, and surrounding text
+            "0000-0002-1825-0098",
+            "ORCID: 0000-0002-1825-0097.",
+            "0000-0002-1825",
+            None,
+        ],
+    ) == [
+        "0000-0002-1825-0097",
+        "0000-0002-9079-593x",
+        "0000-0002-1825-0097",
+        "0000-0002-1825-0098",
+        "0000-0002-1825-0097",
+        None,
+        None,
+    ]
+
+
+def test_normalise_ror():
+    assert normalise(normalise_ror, ["https://ror.org/01AN7Q238", "021nxhr62", "https://ror.org/01an7q239", None]) == [
+        "01an7q238",
+        "021nxhr62",
+        "01an7q239",
+        None,
+    ]
+
+
+def test_normalise_isni():
+    assert normalise(normalise_isni, ["0000 0001 2103 2683", "0000 0001 2103 2684", None]) == [
+        "0000000121032683",
+        "0000000121032684",
+        None,
+    ]
+
+
+def test_normalise_fundref():
+    # Crossref gives Fundref IDs as DOIs and ROR as bare IDs
+    assert normalise(
+        normalise_fundref, ["100000001", "https://doi.org/10.13039/100000002", "10.13039/ABC", "abc", None]
+    ) == ["10.13039/100000001", "10.13039/100000002", "10.13039/abc", "10.13039/abc", None]
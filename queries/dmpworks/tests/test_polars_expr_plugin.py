@@ -32,6 +32,67 @@ def test_revert_inverted_index():
     assert_frame_equal(df, expected)
 
 
+def test_strip_markup():
+    """Test that tags are stripped, entities decoded and whitespace normalised"""
+
+    text = [
+        "<jats:title>Abstract</jats:title><jats:p>Results in &lt;i&gt;vitro&lt;/i&gt; &amp; in vivo</jats:p>",
+        "  H<sub>2</sub>O \n p &lt; 0.05, &alpha;&#946; \"quoted\"  ",
+        "a <b and c> d",
+        None,
+    ]
+    df = pl.DataFrame({"text": text}, schema={"text": pl.String})
+    df = df.with_columns(stripped=pe.strip_markup(pl.col("text")))
+
+    expected = pl.DataFrame(
+        {
+            "text": text,
+            "stripped": ["Abstract Results in vitro & in vivo", 'H2O p < 0.05, αβ "quoted"', "a <b and c> d", None],
+        },
+        schema={"text": pl.String, "stripped": pl.String},
+    )
+    assert_frame_equal(df, expected)
+
+
+def test_canonicalise_identifier():
+    """Test that identifiers are canonicalised and invalid identifiers are flagged or dropped"""
+
+    df = pl.DataFrame(
+        {
+            "doi": ["https://doi.org/10.1234/ABC", "doi:10.1234/abc", "not a doi", None],
+            "orcid": ["https://orcid.org/0000-0002-1825-0097", "0000000218250097", "0000-0002-1825-0098", None],
+            "ror": ["https://ror.org/01an7q238", "021NXHR62", "01an7q239", None],
+            "isni": ["0000 0001 2103 2683", "https://isni.org/isni/0000000121032683", "0000 0001 2103 2684", None],
+            "fundref": ["100000001", "https://doi.org/10.13039/100000002", "abc", None],
+        }
+    )
+    df = df.select(
+        doi=pe.canonical_doi(pl.col("doi")),
+        orcid=pe.canonical_orcid(pl.col("orcid")),
+        ror=pe.canonical_ror(pl.col("ror")),
+        isni=pe.canonical_isni(pl.col("isni")),
+        fundref=pe.canonical_fundref(pl.col("fundref")),
+        ror_validity=pe.canonical_ror(pl.col("ror"), with_validity=True),
+    )
+
+    expected = pl.DataFrame(
+        {
+            "doi": ["10.1234/abc", "10.1234/abc", None, None],
+            "orcid": ["0000-0002-1825-0097", "0000-0002-1825-0097", None, None],
+            "ror": ["01an7q238", "021nxhr62", None, None],
+            "isni": ["0000000121032683", "0000000121032683", None, None],
+            "fundref": ["10.13039/100000001", "10.13039/100000002", None, None],
+            "ror_validity": [
+                {"id": "01an7q238", "valid": True},
+                {"id": "021nxhr62", "valid": True},
+                {"id": "01an7q239", "valid": False},
+                {"id": None, "valid": False},
+            ],
+        }
+    )
+    assert_frame_equal(df, expected)
+
+
 def test_parse_datacite_affiliations():
     """Test that DataCite affiliations can be parsed"""
 